@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from queue import Queue
+from time import perf_counter
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, ProcessOffloader
+
+WORKER_COUNTS = (1, 2, 4, 8)
+EVENTS = 200
+
+
+class FuzzyPlugin:
+    """
+    A synthetic plugin that does cpu bound fuzzy matching on chat text.
+    """
+    cpu_bound = True
+    on_event = 'chat'
+
+    def __init__(self, instance: Mock) -> None:
+        """
+        Initialize the plugin.
+
+        Args:
+            instance (Mock): The fake instance.
+        """
+        self.instance = instance
+
+    @staticmethod
+    def compute(event: dict) -> int:
+        """
+        Edit distance between the message and a long phrase, done the slow way.
+
+        Args:
+            event (dict): The event attributes.
+
+        Returns:
+            int: The edit distance.
+        """
+        message, phrase = event['chat_message'], 'the quick brown fox jumps over the lazy dog ' * 6
+        previous = list(range(len(phrase) + 1))
+        for row, left in enumerate(message, 1):
+            current = [row]
+            for column, right in enumerate(phrase, 1):
+                current.append(min(previous[column] + 1, current[-1] + 1, previous[column - 1] + (left != right)))
+            previous = current
+        return previous[-1]
+
+    def handle_event(self, event: SimpleNamespace, result: int) -> None:
+        """
+        Say the result.
+
+        Args:
+            event (SimpleNamespace): The event.
+            result (int): The edit distance.
+        """
+        self.instance.say(str(result))
+
+
+def throughput(workers: int) -> float:
+    """
+    Measure events handled per second with a number of worker processes.
+
+    Args:
+        workers (int): The number of worker processes.
+
+    Returns:
+        float: Events per second.
+    """
+    results = Queue()
+    offloader = ProcessOffloader(workers=workers, deliver=results.put)
+    bus = PluginBus(Mock(), offloader=offloader)
+    bus.register_plugin(FuzzyPlugin(bus.instance))
+    event = SimpleNamespace(chat_message='a quick brown dog jumps over the lazy fox ' * 6)
+
+    bus.publish('chat', event)
+    results.get()()
+
+    began = perf_counter()
+    for _ in range(EVENTS):
+        bus.publish('chat', event)
+    for _ in range(EVENTS):
+        results.get()()
+    elapsed = perf_counter() - began
+
+    offloader.shutdown()
+    return EVENTS / elapsed
+
+
+def main() -> None:
+    """
+    Print throughput inline and for each worker count.
+    """
+    plugin = FuzzyPlugin(Mock())
+    event = SimpleNamespace(chat_message='a quick brown dog jumps over the lazy fox ' * 6)
+    began = perf_counter()
+    for _ in range(EVENTS // 10):
+        plugin.handle_event(event, plugin.compute(vars(event)))
+    inline = EVENTS // 10 / (perf_counter() - began)
+
+    print(f"{'workers':>8}{'events/s':>12}{'speedup':>10}")
+    print(f"{'inline':>8}{inline:>12,.1f}{1:>9.2f}x")
+    for workers in WORKER_COUNTS:
+        rate = throughput(workers)
+        print(f"{workers:>8}{rate:>12,.1f}{rate / inline:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
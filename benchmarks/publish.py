@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from enum import Enum
+from functools import partial
+from timeit import repeat
+from typing import Callable, Dict, Union
+from unittest.mock import Mock
+
+from korth_spirit import EventEnum
+from plugin_bot.plugin import PluginBus
+
+SUBSCRIBER_COUNTS = (1, 10, 100)
+PUBLISHES = 20_000
+
+
+class LegacyBus:
+    """
+    The list based publish path the compiled dispatch table replaced, kept for comparison.
+    """
+    def __init__(self) -> None:
+        """
+        Initialize the legacy bus.
+        """
+        self._subscribers: Dict = {}
+
+    def subscribe(self, event: Union[str, Enum], subscriber: Callable) -> "LegacyBus":
+        """
+        Subscribe to an event.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            subscriber (Callable): The subscriber.
+
+        Returns:
+            LegacyBus: The legacy bus.
+        """
+        self._subscribers.setdefault(event, []).append(subscriber)
+        return self
+
+    def publish(self, event: Union[str, Enum], *args, **kwargs) -> "LegacyBus":
+        """
+        Publish an event.
+
+        Args:
+            event (Union[str, Enum]): The event.
+
+        Returns:
+            LegacyBus: The legacy bus.
+        """
+        for subscriber in self._subscribers.get(event, []):
+            subscriber(*args, **kwargs)
+
+        return self
+
+
+def noop(*args, **kwargs) -> None:
+    """
+    A subscriber that does nothing, so only dispatch cost is measured.
+    """
+
+
+def throughput(bus, event: Union[str, Enum], subscribers: int) -> float:
+    """
+    Measure publish throughput of a bus.
+
+    Args:
+        bus: The bus to measure.
+        event (Union[str, Enum]): The event to publish.
+        subscribers (int): The number of distinct subscribers to register.
+
+    Returns:
+        float: Publishes per second, best of five runs.
+    """
+    for _ in range(subscribers):
+        bus.subscribe(event, partial(noop))
+
+    best = min(repeat(lambda: bus.publish(event, None), number=PUBLISHES, repeat=5))
+    return PUBLISHES / best
+
+
+def main() -> None:
+    """
+    Print publish throughput before and after for each subscriber count.
+    """
+    print(f"{'event':<24}{'subscribers':>12}{'legacy/s':>14}{'compiled/s':>14}{'speedup':>10}")
+    for event in (EventEnum.AW_EVENT_CHAT, 'version_requested'):
+        for count in SUBSCRIBER_COUNTS:
+            before = throughput(LegacyBus(), event, count)
+            after = throughput(PluginBus(Mock()), event, count)
+            print(f"{str(event):<24}{count:>12}{before:>14,.0f}{after:>14,.0f}{after / before:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
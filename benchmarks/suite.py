@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+from contextlib import contextmanager
+from os import chdir, getcwd, mkdir, path
+from random import Random
+from statistics import median, quantiles
+from sys import modules, path as sys_path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from timeit import Timer
+from typing import Callable, Dict, Iterator, List
+from unittest.mock import Mock, patch
+
+from korth_spirit import EventEnum, Instance
+from plugin_bot.plugin import (PluginBus, PluginData, PluginFinder,
+                               PluginInjector, PluginLoader)
+from plugin_bot.plugin_instance import PluginInstance, Runtime
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), "baseline.json")
+THRESHOLD = 1.5
+ROUNDS = 9
+CALIBRATION_LOOPS = 1000
+CHAT_LATENCY_LIMIT = 0.02
+SUBSCRIBER_COUNTS = (1, 10, 100)
+PLUGIN_COUNTS = (10, 100, 1000)
+PLUGIN_TEMPLATE = '''from korth_spirit import Instance
+
+
+class BenchPlugin{number}:
+    @property
+    def on_event(self) -> str:
+        return "bench.{number}"
+
+    def __init__(self, instance: Instance) -> None:
+        self.instance = instance
+
+    def handle_event(self, event) -> None:
+        pass
+'''
+
+
+class InjectedPlugin:
+    """
+    A plugin whose handler takes two dependencies, to measure what injecting them costs per call.
+    """
+    def handle_event(self, event: object, instance: Instance, publish: Callable) -> None:
+        """
+        Handle the event.
+
+        Args:
+            event (object): The event.
+            instance (Instance): The instance.
+            publish (Callable): Publishes custom events.
+        """
+
+
+def calibrate() -> int:
+    """
+    A fixed loop of plain Python that every metric is measured in, so that results from a
+    slower or busier machine still compare against the baseline.
+
+    Returns:
+        int: The sum of the first thousand squares.
+    """
+    total = 0
+    for number in range(1000):
+        total += number * number
+
+    return total
+
+
+def typical(function: Callable, number: int = 1, rounds: int = ROUNDS) -> float:
+    """
+    Time a function against the calibration loop, keeping the median round so that one lucky or unlucky
+    round moves nothing. Rounds last at least 0.2 seconds, and the calibration loop is timed right after
+    each of them so that both see the machine in the same state.
+
+    Args:
+        function (Callable): The function.
+        number (int, optional): The fewest calls per round. Defaults to 1.
+        rounds (int, optional): The rounds. Defaults to 9.
+
+    Returns:
+        float: Calibration loops per call.
+    """
+    timer, calibration = Timer(function), Timer(calibrate)
+    number = max(number, timer.autorange()[0])
+    return median(
+        timer.timeit(number) / number / (calibration.timeit(CALIBRATION_LOOPS) / CALIBRATION_LOOPS)
+        for _ in range(rounds)
+    )
+
+
+@contextmanager
+def generated_plugins(count: int) -> Iterator[str]:
+    """
+    Write a package of generated plugin files and make it importable the way the finder expects.
+
+    Args:
+        count (int): The number of plugin files.
+
+    Yields:
+        str: The plugin path to give the finder.
+    """
+    package = f"bench_plugins_{count}"
+    cwd = getcwd()
+    with TemporaryDirectory() as directory:
+        mkdir(path.join(directory, package))
+        open(path.join(directory, package, "__init__.py"), "w").close()
+        for number in range(count):
+            with open(path.join(directory, package, f"plugin_{number:04}.py"), "w") as plugin_file:
+                plugin_file.write(PLUGIN_TEMPLATE.format(number=number))
+
+        chdir(directory)
+        sys_path.insert(0, directory)
+        try:
+            yield package
+        finally:
+            sys_path.remove(directory)
+            chdir(cwd)
+            for name in [name for name in modules if name.split(".")[0] == package]:
+                del modules[name]
+
+
+def bench_publish() -> Dict[str, float]:
+    """
+    Measure publishing to a growing number of subscribers, for an SDK event and a custom event.
+
+    Returns:
+        Dict[str, float]: Calibration loops per publish by event and subscriber count.
+    """
+    results = {}
+    for event in (EventEnum.AW_EVENT_CHAT, "version_requested"):
+        for count in SUBSCRIBER_COUNTS:
+            bus = PluginBus(Mock())
+            for _ in range(count):
+                bus.subscribe(event, lambda *args, **kwargs: None)
+
+            name = event.name if isinstance(event, EventEnum) else event
+            results[f"publish.{name}.{count}"] = typical(lambda: bus.publish(event, None), 20_000 // count)
+
+    return results
+
+
+def bench_plugins() -> Dict[str, float]:
+    """
+    Measure finding and reloading generated plugins.
+
+    Returns:
+        Dict[str, float]: Calibration loops per find and per reload by plugin count.
+    """
+    results = {}
+    for count in PLUGIN_COUNTS:
+        with generated_plugins(count) as package:
+            finder = PluginFinder(plugin_path=package)
+            loader = PluginLoader(
+                injector=PluginInjector(dependencies={Instance: Mock()}),
+                bus=PluginBus(Mock()),
+                finder=finder,
+            )
+            rounds = ROUNDS if count < 1000 else 3
+            results[f"find_plugins.{count}"] = typical(lambda: list(finder.find_plugins()), rounds=rounds)
+            results[f"reload.{count}"] = typical(loader.reload, rounds=rounds)
+
+    return results
+
+
+def bench_injector() -> Dict[str, float]:
+    """
+    Measure the per call overhead of a handler with injected dependencies over passing them by hand.
+
+    Returns:
+        Dict[str, float]: Calibration loops per call with and without injection, and the difference.
+    """
+    instance, publish = Mock(), Mock()
+    direct = InjectedPlugin()
+
+    class Injected(InjectedPlugin):
+        pass
+
+    PluginInjector(dependencies={Instance: instance, "publish": publish}).inject(
+        PluginData(name="injected", module=None, class_=Injected)
+    )
+    injected = Injected()
+
+    results = {
+        "injector.direct": typical(lambda: direct.handle_event(None, instance=instance, publish=publish), 100_000),
+        "injector.injected": typical(lambda: injected.handle_event(None), 100_000),
+    }
+    results["injector.overhead"] = max(0.0, results["injector.injected"] - results["injector.direct"])
+    return results
+
+
+def bench_chat_latency(events: int = 200, gap: float = 0.02) -> float:
+    """
+    Measure how long chat from the SDK waits for the pump, from the callback queueing it to the wait ending.
+    The SDK is simulated by an aw_wait that sleeps, delivering chat at random moments as the real one would.
+    Unlike the other metrics this is wall time, as it is bounded by the wait slices rather than the machine.
+
+    Args:
+        events (int, optional): The chat events to deliver. Defaults to 200.
+        gap (float, optional): The mean seconds between chat events. Defaults to 0.02.
+
+    Returns:
+        float: The 99th percentile of seconds from arrival to dispatch.
+    """
+    runtime = Runtime()
+    random = Random(0)
+    due = [perf_counter()]
+    for _ in range(events - 1):
+        due.append(due[-1] + random.expovariate(1 / gap))
+    due.reverse()
+    arrived: List[float] = []
+    latencies: List[float] = []
+
+    def aw_wait(milliseconds: int) -> int:
+        end = perf_counter() + milliseconds / 1000
+        while due and due[-1] <= end:
+            sleep(max(0.0, due.pop() - perf_counter()))
+            arrived.append(perf_counter())
+            runtime.arrive()
+        sleep(max(0.0, end - perf_counter()))
+        return 0
+
+    try:
+        with patch("plugin_bot.plugin_instance.aw_wait", aw_wait):
+            while due:
+                runtime.wait(PluginInstance.MAX_TIMER)
+                dispatched = perf_counter()
+                latencies.extend(dispatched - arrival for arrival in arrived)
+                arrived.clear()
+    finally:
+        runtime.close()
+
+    return quantiles(latencies, n=100)[98]
+
+
+def run() -> Dict[str, float]:
+    """
+    Run every benchmark.
+
+    Returns:
+        Dict[str, float]: Calibration loops per operation by metric name, lower is better.
+    """
+    results = {}
+    for benchmark in (bench_publish, bench_plugins, bench_injector):
+        results.update(benchmark())
+
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float = THRESHOLD) -> List[str]:
+    """
+    Find the metrics that regressed past the threshold.
+    The overhead metric is a difference of two timings and too noisy to gate on by itself.
+
+    Args:
+        results (Dict[str, float]): The new results.
+        baseline (Dict[str, float]): The baseline results.
+        threshold (float, optional): How many times slower than the baseline a metric may get. Defaults to 1.5.
+
+    Returns:
+        List[str]: A description of each regression.
+    """
+    return [
+        f"{name}: {results[name]:.4f} loops against a baseline of {baseline[name]:.4f} loops "
+        f"({results[name] / baseline[name]:.2f}x)"
+        for name in sorted(results)
+        if name in baseline and name != "injector.overhead"
+        and baseline[name] > 0 and results[name] > baseline[name] * threshold
+    ]
+
+
+def load_baseline(filename: str = BASELINE) -> Dict[str, float]:
+    """
+    Load the stored baseline.
+
+    Args:
+        filename (str, optional): The baseline file. Defaults to the one beside this module.
+
+    Returns:
+        Dict[str, float]: The baseline results, empty if none was stored.
+    """
+    if not path.exists(filename):
+        return {}
+
+    with open(filename) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(results: Dict[str, float], filename: str = BASELINE) -> None:
+    """
+    Store results as the baseline.
+
+    Args:
+        results (Dict[str, float]): The results.
+        filename (str, optional): The baseline file. Defaults to the one beside this module.
+    """
+    with open(filename, "w") as baseline:
+        json.dump(results, baseline, indent=4, sort_keys=True)
+        baseline.write("\n")
+
+
+def main() -> None:
+    """
+    Print every metric beside its baseline, in calibration loops per operation.
+    """
+    baseline = load_baseline()
+    print(f"{'metric':<36}{'loops/op':>14}{'baseline':>14}{'ratio':>8}")
+    for name, value in run().items():
+        stored = baseline.get(name)
+        ratio = f"{value / stored:>7.2f}x" if stored else f"{'-':>8}"
+        print(f"{name:<36}{value:>14.4f}{stored or 0:>14.4f}{ratio}")
+    print(f"p99 chat latency {bench_chat_latency() * 1000:.1f}ms, limit {CHAT_LATENCY_LIMIT * 1000:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
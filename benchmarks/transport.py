@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from multiprocessing import get_context
+from os import path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, SocketTransport
+
+TOPICS = ('ping', 'pong', 'stop')
+ROUND_TRIPS = 1000
+
+
+def echo(directory: str) -> None:
+    """
+    Run a bot process that answers every ping with a pong until it is told to stop.
+
+    Args:
+        directory (str): The transport directory.
+    """
+    bus = PluginBus(Mock())
+    transport = SocketTransport(directory, TOPICS, name='echo').attach(bus)
+    stopped = []
+    bus.subscribe('ping', lambda number: bus.publish('pong', number))
+    bus.subscribe('stop', lambda: stopped.append(True))
+
+    while not stopped:
+        transport.poll()
+        transport.flush()
+        sleep(0)
+    transport.close()
+
+
+def main() -> None:
+    """
+    Print the round trip time of a custom event to another bot process and back.
+    """
+    with TemporaryDirectory() as directory:
+        process = get_context('spawn').Process(target=echo, args=(directory,))
+        process.start()
+        while not path.exists(path.join(directory, 'echo.sock')):
+            sleep(0.01)
+
+        bus = PluginBus(Mock())
+        transport = SocketTransport(directory, TOPICS, name='bench').attach(bus)
+        pongs = []
+        bus.subscribe('pong', pongs.append)
+        sleep(1.5)
+
+        round_trips = []
+        for number in range(ROUND_TRIPS):
+            began = perf_counter()
+            bus.publish('ping', number)
+            transport.flush()
+            while not pongs:
+                sleep(0)
+                transport.poll()
+            round_trips.append(perf_counter() - began)
+            pongs.clear()
+
+        bus.publish('stop')
+        transport.flush()
+        process.join()
+        transport.close()
+
+    round_trips.sort()
+    print(f"round trips: {ROUND_TRIPS}")
+    print(f"median: {median(round_trips) * 1e6:.0f}us")
+    print(f"p99: {round_trips[int(len(round_trips) * 0.99)] * 1e6:.0f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,11 +18,15 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+from argparse import ArgumentParser
+
 from korth_spirit.configuration import (AggregateConfiguration,
                                         EnvironmentConfiguration,
                                         InputConfiguration, JsonConfiguration)
 
 from .plugin_instance import PluginInstance
+from .supervisor import supervise
 
 
 def main(argv: list[str]) -> None:
@@ -32,6 +36,17 @@ def main(argv: list[str]) -> None:
     Args:
         argv (list[str]): The command line arguments.
     """
+    parser = ArgumentParser(prog=argv[0] if argv else None)
+    parser.add_argument('--worlds', help='host every world configured in this JSON list instead of a single bot')
+    parser.add_argument('--workers', type=int, default=1, help='processes to split the --worlds between')
+    arguments = parser.parse_args(argv[1:])
+
+    if arguments.worlds:
+        with open(arguments.worlds, "r") as file:
+            worlds = json.load(file)
+        supervise(worlds, workers=arguments.workers)
+        return
+
     with PluginInstance(
         configuration=AggregateConfiguration(
             configurations={
@@ -18,16 +18,70 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-from .bus import PluginBus
-from .finder import PluginFinder
+from .breaker import BreakerState, CircuitBreaker
+from .bus import CONSUMED, PluginBus, Propagation
+from .chat_queue import ChatQueue
+from .custom_event import custom_event
+from .event_queue import EventQueue, OverflowPolicy, QueueStats
+from .executor import ExecutorStats, KeyedExecutor, PumpProxy
+from .finder import PluginFinder, SharedFinder
 from .injector import PluginInjector
 from .loader import PluginLoader
+from .matcher import Trigger, TriggerMatcher
+from .middleware import Middleware
+from .offload import ProcessOffloader
 from .plugin import PluginData
+from .predicate import Between, Equals, OneOf, Predicate, Prefix
+from .recording import Recorder, Replayer, ReplayInstance
+from .router import Command, CommandRouter, DuplicateCommandError
+from .scheduler import Scheduler, Timer
+from .stats import HandlerStats, Histogram, LoopStats, PluginStats
+from .store import SharedStore, open_store
+from .transport import SocketTransport
+from .watchdog import Watchdog
 
 __all__ = [
+    "CONSUMED",
+    "Between",
+    "BreakerState",
+    "ChatQueue",
+    "CircuitBreaker",
+    "Command",
+    "CommandRouter",
+    "DuplicateCommandError",
+    "Equals",
+    "EventQueue",
+    "ExecutorStats",
+    "HandlerStats",
+    "Histogram",
+    "KeyedExecutor",
+    "LoopStats",
+    "Middleware",
+    "OneOf",
+    "OverflowPolicy",
     "PluginBus",
     "PluginFinder",
     "PluginInjector",
     "PluginLoader",
-    "PluginData"
+    "PluginStats",
+    "PluginData",
+    "Predicate",
+    "Prefix",
+    "ProcessOffloader",
+    "Propagation",
+    "PumpProxy",
+    "QueueStats",
+    "Recorder",
+    "ReplayInstance",
+    "Replayer",
+    "Scheduler",
+    "SharedFinder",
+    "SharedStore",
+    "SocketTransport",
+    "Timer",
+    "Trigger",
+    "TriggerMatcher",
+    "Watchdog",
+    "custom_event",
+    "open_store",
 ]
@@ -0,0 +1,93 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, List, Optional
+
+
+class BatchSubscriber:
+    """
+    Accumulates events for a handle_events subscriber and delivers them as one list,
+    once the batch is full or its window has elapsed.
+    """
+    __slots__ = ("subscriber", "size", "window", "_events", "_deadline", "_lock")
+
+    def __init__(self, subscriber: Callable[[List[Any]], Any], size: int = 256, window: float = 0.05) -> None:
+        """
+        Initialize the batch subscriber.
+
+        Args:
+            subscriber (Callable[[List[Any]], Any]): Receives each batch.
+            size (int, optional): The number of events that flushes a batch. Defaults to 256.
+            window (float, optional): Seconds after its first event that a batch is due. Defaults to 0.05.
+        """
+        self.subscriber = subscriber
+        self.size = size
+        self.window = window
+        self._events: List[Any] = []
+        self._deadline: Optional[float] = None
+        self._lock = Lock()
+
+    def __call__(self, *args, **kwargs) -> None:
+        """
+        Add an event to the batch, flushing it if it is full.
+        A single argument is batched as is, several are batched as a tuple,
+        and an event with keyword arguments is batched as a tuple of its arguments and keyword arguments.
+        """
+        if kwargs:
+            event = (args, kwargs)
+        else:
+            event = args[0] if len(args) == 1 else args
+
+        with self._lock:
+            if not self._events:
+                self._deadline = monotonic() + self.window
+            self._events.append(event)
+            full = len(self._events) >= self.size
+
+        if full:
+            self.flush()
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """
+        The monotonic time the pending batch is due, if there is one.
+
+        Returns:
+            Optional[float]: The deadline.
+        """
+        return self._deadline
+
+    def flush(self) -> int:
+        """
+        Deliver the pending batch.
+
+        Returns:
+            int: The number of events delivered.
+        """
+        with self._lock:
+            events, self._events = self._events, []
+            self._deadline = None
+
+        if events:
+            self.subscriber(events)
+
+        return len(events)
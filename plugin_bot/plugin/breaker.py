@@ -0,0 +1,259 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import iscoroutinefunction
+from collections import deque
+from enum import Enum, auto
+from logging import getLogger
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Hashable
+
+logger = getLogger(__name__)
+
+
+class BreakerState(Enum):
+    """
+    The state of a plugin's circuit breaker.
+    """
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class Circuit:
+    """
+    The breaker of one plugin, shared by every handler of the plugin, so failures on any of its events
+    count together and an open breaker skips all of them.
+    After the cooldown one call probes it: success closes the breaker, failure opens it again.
+    Blocking handlers report from executor threads, so the state only changes under a lock.
+    """
+    __slots__ = ("name", "state", "retry_at", "_breaker", "_failures", "_lock")
+
+    def __init__(self, breaker: "CircuitBreaker", name: str) -> None:
+        """
+        Initialize the circuit.
+
+        Args:
+            breaker (CircuitBreaker): The breaker settings.
+            name (str): The plugin name to log.
+        """
+        self.name = name
+        self.state = BreakerState.CLOSED
+        self.retry_at = 0.0
+        self._breaker = breaker
+        self._failures: Deque[float] = deque()
+        self._lock = Lock()
+
+    def allows(self) -> bool:
+        """
+        Check whether a call may go ahead, letting one through to probe an open breaker that has cooled down.
+
+        Returns:
+            bool: Whether the call may go ahead.
+        """
+        if self.state is BreakerState.CLOSED:
+            return True
+
+        with self._lock:
+            if self.state is BreakerState.CLOSED:
+                return True
+            if self.state is BreakerState.HALF_OPEN or perf_counter() < self.retry_at:
+                return False
+
+            self.state = BreakerState.HALF_OPEN
+            return True
+
+    def failed(self, error: Exception) -> None:
+        """
+        Count a failure, opening the breaker once there are too many in the window.
+        Only failures while closed are logged with their traceback, so a broken plugin
+        costs at most threshold tracebacks per window.
+
+        Args:
+            error (Exception): The exception the handler raised.
+        """
+        breaker = self._breaker
+        with self._lock:
+            now = perf_counter()
+            if self.state is BreakerState.HALF_OPEN:
+                self.state = BreakerState.OPEN
+                self.retry_at = now + breaker.cooldown
+                logger.warning("Plugin %s still fails (%r), skipping it for %.0fs.", self.name, error, breaker.cooldown)
+                return
+
+            if self.state is BreakerState.OPEN:
+                return
+
+            logger.error("Plugin %s failed.", self.name, exc_info=error)
+            self._failures.append(now)
+            while self._failures[0] < now - breaker.window:
+                self._failures.popleft()
+
+            if len(self._failures) >= breaker.threshold:
+                self.state = BreakerState.OPEN
+                self.retry_at = now + breaker.cooldown
+                self._failures.clear()
+                logger.warning(
+                    "Plugin %s failed %d times in %.0fs, skipping it for %.0fs.",
+                    self.name, breaker.threshold, breaker.window, breaker.cooldown,
+                )
+
+    def succeeded(self) -> None:
+        """
+        Close the breaker after a successful probe.
+        """
+        if self.state is not BreakerState.HALF_OPEN:
+            return
+
+        with self._lock:
+            if self.state is BreakerState.HALF_OPEN:
+                self.state = BreakerState.CLOSED
+                logger.info("Plugin %s recovered.", self.name)
+
+
+class BreakerSubscriber:
+    """
+    Wraps a handler so that its exceptions are caught and counted against its plugin's circuit,
+    and so that it is skipped while the circuit is open.
+    """
+    __slots__ = ("subscriber", "circuit")
+
+    def __init__(self, subscriber: Callable, circuit: Circuit) -> None:
+        """
+        Initialize the breaker subscriber.
+
+        Args:
+            subscriber (Callable): The handler.
+            circuit (Circuit): The circuit of its plugin.
+        """
+        self.subscriber = subscriber
+        self.circuit = circuit
+
+    def __call__(self, *args, **kwargs) -> object:
+        """
+        Call the handler unless its plugin's breaker is open.
+
+        Returns:
+            object: What the handler returned, or None if it failed or was skipped.
+        """
+        circuit = self.circuit
+        if circuit.state is not BreakerState.CLOSED and not circuit.allows():
+            return None
+
+        try:
+            result = self.subscriber(*args, **kwargs)
+        except Exception as error:
+            circuit.failed(error)
+            return None
+
+        circuit.succeeded()
+        return result
+
+    async def call_async(self, *args, **kwargs) -> object:
+        """
+        Await the async handler unless its plugin's breaker is open.
+
+        Returns:
+            object: What the handler returned, or None if it failed or was skipped.
+        """
+        circuit = self.circuit
+        if circuit.state is not BreakerState.CLOSED and not circuit.allows():
+            return None
+
+        try:
+            result = await self.subscriber(*args, **kwargs)
+        except Exception as error:
+            circuit.failed(error)
+            return None
+
+        circuit.succeeded()
+        return result
+
+
+class CircuitBreaker:
+    """
+    Isolates plugins whose handlers keep raising, so a broken plugin stops costing every event.
+    """
+
+    def __init__(self, threshold: int = 5, window: float = 60.0, cooldown: float = 30.0) -> None:
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            threshold (int, optional): The failures within the window that open a plugin's breaker. Defaults to 5.
+            window (float, optional): The seconds failures are counted over. Defaults to 60.0.
+            cooldown (float, optional): The seconds an open breaker skips the plugin before probing it. Defaults to 30.0.
+        """
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._circuits: Dict[Hashable, Circuit] = {}
+
+    def guard(self, subscriber: Callable, owner: Hashable, name: str) -> Callable:
+        """
+        Wrap a handler in the breaker of the plugin it belongs to.
+
+        Args:
+            subscriber (Callable): The handler, which may be a coroutine function.
+            owner (Hashable): The plugin, whose handlers share one breaker.
+            name (str): The plugin name to log.
+
+        Returns:
+            Callable: The guarded handler, a coroutine function if the handler was one.
+        """
+        circuit = self._circuits.get(owner)
+        if circuit is None:
+            circuit = self._circuits[owner] = Circuit(self, name)
+        guarded = BreakerSubscriber(subscriber, circuit)
+
+        return guarded.call_async if iscoroutinefunction(subscriber) else guarded
+
+    def wrap(self, handler: Callable, plugin: Any, event: Any) -> Callable:
+        """
+        Guard a plugin's handler, as middleware.
+
+        Args:
+            handler (Callable): The handler.
+            plugin (Any): The plugin.
+            event (Any): The event.
+
+        Returns:
+            Callable: The guarded handler.
+        """
+        return self.guard(handler, plugin, type(plugin).__name__)
+
+    def release(self, plugin: Any) -> None:
+        """
+        Forget the breaker of an unregistered plugin.
+
+        Args:
+            plugin (Any): The plugin.
+        """
+        self._circuits.pop(plugin, None)
+
+    def states(self) -> Dict[str, BreakerState]:
+        """
+        Get the state of every guarded plugin.
+
+        Returns:
+            Dict[str, BreakerState]: The breaker state by plugin name.
+        """
+        return {circuit.name: circuit.state for circuit in list(self._circuits.values())}
@@ -17,50 +17,527 @@
 # NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
-from enum import Enum
-from typing import List, Union, get_args
+from asyncio import (AbstractEventLoop, gather, iscoroutinefunction,
+                     new_event_loop, run_coroutine_threadsafe)
+from collections import OrderedDict
+from concurrent.futures import Future
+from enum import Enum, auto
+from functools import partial
+from logging import getLogger
+from threading import Lock
+from time import monotonic
+from typing import (Any, Dict, Hashable, Iterable, List, Mapping, Optional,
+                    Sequence, Set, Tuple, Union, get_args)
 
 from korth_spirit import CallBackEnum, EventEnum, Instance
 
+from .batch import BatchSubscriber
+from .custom_event import TOPICS, check
+from .event_queue import EventQueue
+from .executor import BlockingSubscriber, KeyedExecutor
+from .matcher import Trigger, TriggerMatcher
+from .middleware import Middleware
+from .offload import OffloadedSubscriber, ProcessOffloader
 from .plugin import Plugin
+from .predicate import Predicate, PredicateIndex, Prefix
+from .recording import Recorder
+from .router import CommandRouter
+from .topic import is_pattern, matches
 
 AW_TYPE = Union[EventEnum, CallBackEnum]
+RESOLVED_LIMIT = 1024
+logger = getLogger(__name__)
+
+class Propagation(Enum):
+    """
+    Returned by a subscriber to control the subscribers after it.
+    Plugins on the same event are called highest priority property first,
+    so a handler returning CONSUMED keeps the event from plugins of lower priority.
+    """
+    CONSUMED = auto()
+
+CONSUMED = Propagation.CONSUMED
+
+class CoroutineSubscriber:
+    """
+    Wraps an async subscriber so that publishing schedules it on the bus event loop.
+    """
+    __slots__ = ("subscriber", "_bus")
+
+    def __init__(self, subscriber: callable, bus: "PluginBus") -> None:
+        """
+        Initialize the coroutine subscriber.
+
+        Args:
+            subscriber (callable): The coroutine function.
+            bus (PluginBus): The bus that owns the event loop.
+        """
+        self.subscriber = subscriber
+        self._bus = bus
+
+    def __call__(self, *args, **kwargs) -> Future:
+        """
+        Schedule the subscriber on the event loop.
+
+        Returns:
+            Future: The future of the scheduled coroutine.
+        """
+        future = run_coroutine_threadsafe(
+            self.subscriber(*args, **kwargs),
+            self._bus.loop,
+        )
+        future.add_done_callback(self._report)
+        return future
+
+    def _report(self, future: Future) -> None:
+        """
+        Log the failure of a scheduled coroutine, since nothing awaits it.
+
+        Args:
+            future (Future): The finished future.
+        """
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                "Subscriber %r failed.", self.subscriber,
+                exc_info=future.exception(),
+            )
+
 class PluginBus:
 
-    def __init__(self, instance: Instance) -> None:
+    def __init__(
+        self,
+        instance: Instance,
+        loop: Optional[AbstractEventLoop] = None,
+        executor: Optional[KeyedExecutor] = None,
+        offloader: Optional[ProcessOffloader] = None,
+        queue: Optional[EventQueue] = None,
+        router: Optional[CommandRouter] = None,
+        matcher: Optional[TriggerMatcher] = None,
+        recorder: Optional[Recorder] = None,
+        middleware: Sequence[Middleware] = (),
+    ) -> None:
         """
         Initialize the plugin bus.
 
         Args:
             instance (Instance): The instance of the bot.
+            loop (AbstractEventLoop, optional): The event loop async subscribers run on. Defaults to a new loop.
+            executor (KeyedExecutor, optional): The pool blocking plugins run on. Defaults to a new pool.
+            offloader (ProcessOffloader, optional): The processes cpu bound plugins run on. Defaults to a new pool.
+            queue (EventQueue, optional): Buffers Active Worlds events until drained. Defaults to dispatching them at once.
+            router (CommandRouter, optional): Routes chat commands to plugins declaring on_command. Defaults to a new router.
+            matcher (TriggerMatcher, optional): Scans chat for plugins declaring on_trigger. Defaults to a new matcher.
+            recorder (Recorder, optional): Logs every Active Worlds event relayed in, for replaying later.
+                Defaults to recording nothing.
+            middleware (Sequence[Middleware], optional): Wraps plugin handlers, the first innermost,
+                and forgets unregistered plugins, such as PluginStats, CircuitBreaker, Watchdog and Scheduler.
+                Defaults to calling handlers bare, with their exceptions still caught and logged.
         """
         self.instance = instance
+        self._loop = loop
+        self._executor = executor
+        self._offloader = offloader
+        self._queue = queue
+        self._router = router
+        self._matcher = matcher
+        self.recorder = recorder
+        self.middleware = list(middleware)
+        self._batches: Set[BatchSubscriber] = set()
         self._subscribers = {}
+        self._registry: Dict[Tuple[Union[str, Enum], callable], Optional[Hashable]] = {}
+        self._where: Dict[Tuple[Union[str, Enum], callable], Dict[str, Predicate]] = {}
+        self._priorities: Dict[Tuple[Union[str, Enum], callable], int] = {}
+        self._owners: Dict[Hashable, List[Tuple[Union[str, Enum], callable]]] = {}
+        self._relays: Dict[AW_TYPE, callable] = {}
+        self._keys: Dict[Union[str, Enum], Union[str, Enum]] = {}
+        self._patterns: List[str] = []
+        self._dispatch: Dict[int, Union[Tuple[callable, ...], PredicateIndex]] = {}
+        self._resolved: "OrderedDict[str, Union[Tuple[callable, ...], PredicateIndex]]" = OrderedDict()
+        self._lock = Lock()
+
+    def _deliveries(self, event: Union[str, Enum]) -> List[Tuple[Union[str, Enum], callable]]:
+        """
+        Get the subscriptions an event is delivered to, highest priority first and otherwise in registration order.
+        A concrete topic is also delivered to the subscribers of every wildcard pattern matching it,
+        after its own subscribers of the same priority.
+
+        Args:
+            event (Union[str, Enum]): The event.
+
+        Returns:
+            List[Tuple[Union[str, Enum], callable]]: The subscriptions as (subscribed event, subscriber) pairs.
+        """
+        deliveries = [(event, subscriber) for subscriber in self._subscribers.get(event, ())]
+        if isinstance(event, str) and not is_pattern(event):
+            for pattern in self._patterns:
+                if matches(pattern, event):
+                    deliveries.extend((pattern, subscriber) for subscriber in self._subscribers[pattern])
+
+        deliveries.sort(key=lambda delivery: -self._priorities.get(delivery, 0))
+
+        return deliveries
+
+    def _entry(self, event: Union[str, Enum]) -> Union[Tuple[callable, ...], PredicateIndex]:
+        """
+        Build the subscribers an event is dispatched to.
+        Events with filtered subscribers get a predicate index instead of a plain tuple.
+
+        Args:
+            event (Union[str, Enum]): The event.
+
+        Returns:
+            Union[Tuple[callable, ...], PredicateIndex]: The subscribers in dispatch order.
+        """
+        deliveries = self._deliveries(event)
+        subscribers = tuple(
+            CoroutineSubscriber(subscriber, self) if iscoroutinefunction(subscriber) else subscriber
+            for _, subscriber in deliveries
+        )
+        predicates = [self._where.get(delivery) for delivery in deliveries]
+        if any(predicates):
+            subscribers = PredicateIndex(subscribers, predicates)
+
+        return subscribers
+
+    def _build(self, event: Union[str, Enum], keys: dict, dispatch: dict) -> None:
+        """
+        Build the dispatch table entry for an event into the given tables.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            keys (dict): The table of first registered keys being built.
+            dispatch (dict): The dispatch table being built.
+        """
+        dispatch[id(keys.setdefault(event, event))] = self._entry(event)
+
+    def _compile(self, event: Union[str, Enum]) -> None:
+        """
+        Rebuild the dispatch table entry for an event.
+        The table is keyed by the identity of the first key registered for the event,
+        so publishing an enum member or an interned string never calls __hash__.
+        Both tables are replaced rather than mutated, so publishers never need the lock.
+        Changing the subscribers of a wildcard pattern rebuilds every topic with subscribers of its own
+        and forgets every topic resolved against the patterns on publish.
+
+        Args:
+            event (Union[str, Enum]): The event.
+        """
+        keys = dict(self._keys)
+        dispatch = dict(self._dispatch)
+
+        if event not in self._subscribers or not self._subscribers[event]:
+            self._subscribers.pop(event, None)
+            if event in self._patterns:
+                self._patterns.remove(event)
+        elif is_pattern(event) and event not in self._patterns:
+            self._patterns.append(event)
+
+        events = [event]
+        self._resolved.pop(event, None)
+        if is_pattern(event):
+            events = [topic for topic in keys if isinstance(topic, str)] + [event]
+            self._resolved.clear()
+
+        for topic in events:
+            if topic in self._subscribers:
+                self._build(topic, keys, dispatch)
+            elif topic in keys:
+                dispatch.pop(id(keys.pop(topic)), None)
+
+        self._dispatch = dispatch
+        self._keys = keys
+
+    def _resolve(self, event: Union[str, Enum]) -> Union[Tuple[callable, ...], PredicateIndex]:
+        """
+        Resolve a topic nothing subscribed to directly against the wildcard patterns.
+        The RESOLVED_LIMIT most recently published topics are kept, even when nothing matched them,
+        so topics named per user or per session cannot grow the cache without bound.
+
+        Args:
+            event (Union[str, Enum]): The event.
+
+        Returns:
+            Union[Tuple[callable, ...], PredicateIndex]: The subscribers of the matching patterns.
+        """
+        if not self._patterns or not isinstance(event, str):
+            return ()
+
+        with self._lock:
+            subscribers = self._resolved.get(event)
+            if subscribers is not None:
+                self._resolved.move_to_end(event)
+                return subscribers
+
+            subscribers = self._resolved[event] = self._entry(event)
+            if len(self._resolved) > RESOLVED_LIMIT:
+                self._resolved.popitem(last=False)
+
+            return subscribers
+
+    @property
+    def loop(self) -> AbstractEventLoop:
+        """
+        The event loop async subscribers are scheduled on.
+
+        Returns:
+            AbstractEventLoop: The event loop.
+        """
+        if self._loop is None:
+            self._loop = new_event_loop()
+
+        return self._loop
+
+    @property
+    def executor(self) -> KeyedExecutor:
+        """
+        The thread pool blocking plugins are dispatched on.
+
+        Returns:
+            KeyedExecutor: The executor.
+        """
+        if self._executor is None:
+            self._executor = KeyedExecutor()
+
+        return self._executor
+
+    @property
+    def offloader(self) -> ProcessOffloader:
+        """
+        The worker processes cpu bound plugins are dispatched on.
+
+        Returns:
+            ProcessOffloader: The offloader.
+        """
+        if self._offloader is None:
+            self._offloader = ProcessOffloader()
+
+        return self._offloader
+
+    @property
+    def router(self) -> CommandRouter:
+        """
+        The router chat commands are dispatched through.
+
+        Returns:
+            CommandRouter: The command router.
+        """
+        if self._router is None:
+            self._router = CommandRouter()
+
+        return self._router
+
+    @property
+    def matcher(self) -> TriggerMatcher:
+        """
+        The matcher chat is scanned for trigger phrases with.
+
+        Returns:
+            TriggerMatcher: The trigger matcher.
+        """
+        if self._matcher is None:
+            self._matcher = TriggerMatcher()
+
+        return self._matcher
+
+    def _release_router(self) -> None:
+        """
+        Stop routing chat to the command router and trigger matcher once they have nothing left to route.
+        """
+        if self._router is not None and not len(self._router):
+            self.unsubscribe(EventEnum.AW_EVENT_CHAT, self._router.route)
+
+        if self._matcher is not None and not len(self._matcher):
+            self.unsubscribe(EventEnum.AW_EVENT_CHAT, self._matcher.route)
+
+    def _events(self, plugin: Plugin) -> List[Tuple[Union[str, Enum], Optional[callable]]]:
+        """
+        Get the events a plugin listens for, with the method handling each if the plugin names one.
+        on_event may be a single event, a collection of events, or a mapping from event to method name.
+
+        Args:
+            plugin (Plugin): The plugin.
+
+        Returns:
+            List[Tuple[Union[str, Enum], Optional[callable]]]: The events and their methods, None for the default.
+        """
+        events = plugin.on_event
+        if isinstance(events, Mapping):
+            return [
+                (event, getattr(plugin, method) if isinstance(method, str) else method)
+                for event, method in events.items()
+            ]
+
+        if isinstance(events, (list, tuple, set, frozenset)):
+            return [(event, None) for event in events]
+
+        return [(events, None)]
+
+    def _handler(self, plugin: Plugin, event: Union[str, Enum], method: Optional[callable] = None) -> callable:
+        """
+        Get the subscriber for a plugin according to its execution policy.
+        Plugins defining handle_events receive their events in batches, unless the event names its own method.
+        The plugin's own handler is wrapped by the middleware first, so it applies wherever the policy runs it.
+
+        Args:
+            plugin (Plugin): The plugin.
+            event (Union[str, Enum]): The event the handler is recorded under.
+            method (Optional[callable], optional): The method handling the event. Defaults to handle_event.
+
+        Returns:
+            callable: The subscriber.
+        """
+        batched = method is None and hasattr(type(plugin), "handle_events")
+        handler = method or (plugin.handle_events if batched else plugin.handle_event)
+        for layer in self.middleware:
+            handler = layer.wrap(handler, plugin, event)
+
+        if getattr(plugin, "blocking", False) is True:
+            handler = BlockingSubscriber(
+                subscriber=handler,
+                executor=self.executor,
+                key=getattr(plugin, "ordering_key", None),
+            )
+        elif getattr(plugin, "cpu_bound", False) is True:
+            handler = OffloadedSubscriber(
+                subscriber=handler,
+                offloader=self.offloader,
+                module=type(plugin).__module__,
+                name=f"{type(plugin).__qualname__}.compute",
+            )
+
+        if batched:
+            handler = BatchSubscriber(
+                subscriber=handler,
+                size=getattr(plugin, "batch_size", 256),
+                window=getattr(plugin, "batch_window", 0.05),
+            )
+            self._batches.add(handler)
+
+        return handler
+
+    def _release(self, plugin: Plugin) -> None:
+        """
+        Have the middleware forget an unregistered plugin.
+
+        Args:
+            plugin (Plugin): The plugin.
+        """
+        for layer in self.middleware:
+            layer.release(plugin)
+
+    def _retire(self, subscribers: Iterable[callable]) -> None:
+        """
+        Deliver what removed batch subscribers were still holding.
+
+        Args:
+            subscribers (Iterable[callable]): The removed subscribers.
+        """
+        for subscriber in subscribers:
+            if subscriber in self._batches:
+                self._batches.discard(subscriber)
+                subscriber.flush()
+
+    def _attach(self, event: Union[str, Enum]) -> None:
+        """
+        Relay an Active Worlds event from the instance bus into this bus, through the queue if there is one.
+        Only one relay is subscribed per event, however many plugins listen to it.
+        Only these events are recorded, since replaying them reproduces the custom events plugins publish.
+
+        Args:
+            event (Union[str, Enum]): The event.
+        """
+        if not isinstance(event, get_args(AW_TYPE)) or event in self._relays:
+            return
+
+        forward = self.publish if self._queue is None else self._queue.put
+        if self.recorder is not None:
+            forward = self.recorder.tap(forward)
+
+        self._relays[event] = partial(forward, event)
+        self.instance.bus.subscribe(
+            event=event,
+            subscriber=self._relays[event],
+        )
+
+    def _detach(self, event: Union[str, Enum]) -> None:
+        """
+        Remove the relay for an Active Worlds event once nothing listens to it.
+
+        Args:
+            event (Union[str, Enum]): The event.
+        """
+        if event in self._subscribers or event not in self._relays:
+            return
+
+        try:
+            self.instance.bus.unsubscribe(
+                event=event,
+                subscriber=self._relays.pop(event),
+            )
+        except ValueError:
+            pass
 
     def register_plugin(self, plugin: Plugin) -> "PluginBus":
         """
         Register a plugin.
 
+        Raises:
+            DuplicateCommandError: If another plugin already answers one of its commands.
+            TypeError: If a handler cannot receive the declared custom event of its topic.
+
         Args:
             plugin (PluginData): The plugin data.
 
         Returns:
             PluginBus: The plugin bus.
         """
-        if self.has_subscriber(plugin.on_event, plugin.handle_event):   
+        if plugin in self._owners or plugin in self.router or plugin in self.matcher:
             return self
 
-        if isinstance(plugin.on_event, get_args(AW_TYPE)):
-            self.instance.bus.subscribe(
-                event=plugin.on_event,
-                subscriber=plugin.handle_event,
+        command = getattr(plugin, "on_command", None)
+        if isinstance(command, (str, list, tuple, set, frozenset)):
+            self.router.check(command, plugin)
+            self.router.register(
+                commands=command,
+                handler=self._handler(plugin, EventEnum.AW_EVENT_CHAT),
+                owner=plugin,
+                signature=plugin.handle_event,
             )
-            return self
-        
-        self.subscribe(
-            event=plugin.on_event,
-            subscriber=plugin.handle_event,
-        )
+            return self.subscribe(
+                event=EventEnum.AW_EVENT_CHAT,
+                subscriber=self.router.route,
+                where={"chat_message": Prefix(self.router.prefix)},
+            )
+
+        triggers = getattr(plugin, "on_trigger", None)
+        if isinstance(triggers, (str, Trigger, list, tuple, set, frozenset)):
+            self.matcher.register(
+                triggers=triggers,
+                handler=self._handler(plugin, EventEnum.AW_EVENT_CHAT),
+                owner=plugin,
+                signature=plugin.handle_event,
+            )
+            return self.subscribe(
+                event=EventEnum.AW_EVENT_CHAT,
+                subscriber=self.matcher.route,
+            )
+
+        events = self._events(plugin)
+        if not hasattr(type(plugin), "handle_events"):
+            for event, method in events:
+                check(event, method or plugin.handle_event, type(plugin).__name__)
+
+        where = getattr(plugin, "where", None)
+        priority = getattr(plugin, "priority", 0)
+        for event, method in events:
+            self.subscribe(
+                event=event,
+                subscriber=self._handler(plugin, event, method),
+                owner=plugin,
+                where=where if isinstance(where, dict) else None,
+                priority=priority if isinstance(priority, int) else 0,
+            )
+
         return self
 
     def register_plugins(self, plugins: List[Plugin]) -> "PluginBus":
@@ -75,6 +552,8 @@ class PluginBus:
         """
         for plugin in plugins:
             self.register_plugin(plugin)
+
+        return self
     
     def unregister_plugin(self, plugin: Plugin) -> "PluginBus":
         """
@@ -86,25 +565,30 @@ class PluginBus:
         Returns:
             PluginBus: The plugin bus.
         """
-        if isinstance(plugin.on_event, get_args(AW_TYPE)):
-            try:
-                self.instance.bus.unsubscribe(
-                    event=plugin.on_event,
-                    subscriber=plugin.handle_event,
-                )
-            except ValueError:
-                pass
+        self._release(plugin)
+
+        if plugin in self.router or plugin in self.matcher:
+            self.router.unregister(plugin)
+            self.matcher.unregister(plugin)
+            self._release_router()
             return self
 
-        self.unsubscribe(
-            event=plugin.on_event,
-            subscriber=plugin.handle_event,
-        )
+        subscriptions = self._owners.get(plugin) or [
+            (event, method or plugin.handle_event) for event, method in self._events(plugin)
+        ]
+
+        for event, subscriber in list(subscriptions):
+            self.unsubscribe(
+                event=event,
+                subscriber=subscriber,
+            )
         return self
 
     def unregister_plugins(self, plugins: List[Plugin]) -> "PluginBus":
         """
         Unregister a list of plugins.
+        Every subscription owned by the plugins is removed in a single pass,
+        and relays are only dropped for events nothing else listens to.
 
         Args:
             plugins (List[PluginData]): The list of plugins.
@@ -112,21 +596,71 @@ class PluginBus:
         Returns:
             PluginBus: The plugin bus.
         """
-        self._subscribers = {}
-        self.instance.bus.unsubscribe_all()
+        with self._lock:
+            removed: Dict[Union[str, Enum], set] = {}
+            for plugin in plugins:
+                self._release(plugin)
+                self.router.unregister(plugin)
+                self.matcher.unregister(plugin)
+                for event, subscriber in self._owners.pop(plugin, ()):
+                    del self._registry[(event, subscriber)]
+                    self._where.pop((event, subscriber), None)
+                    self._priorities.pop((event, subscriber), None)
+                    removed.setdefault(event, set()).add(subscriber)
+
+            for event, subscribers in removed.items():
+                self._subscribers[event] = [
+                    subscriber for subscriber in self._subscribers[event]
+                    if subscriber not in subscribers
+                ]
+                self._compile(event)
+                self._detach(event)
+
+        for subscribers in removed.values():
+            self._retire(subscribers)
+        self._release_router()
+
+        return self
 
-    def subscribe(self, event: Union[str, Enum], subscriber: callable) -> "PluginBus":
+    def subscribe(
+        self,
+        event: Union[str, Enum],
+        subscriber: callable,
+        owner: Any = None,
+        where: Optional[Dict[str, Predicate]] = None,
+        priority: int = 0,
+    ) -> "PluginBus":
         """
         Subscribe to an event.
+        Subscribing the same subscriber to the same event again has no effect.
+        A subscriber returning CONSUMED stops the event reaching subscribers of lower priority.
 
         Args:
             event (Union[str, Enum]): The event.
             subscriber (callable): The subscriber.
+            owner (Any, optional): The plugin the subscription belongs to. Defaults to None.
+            where (Optional[Dict[str, Predicate]], optional): Predicates by event attribute that must
+                all hold for the subscriber to be called. Defaults to None.
+            priority (int, optional): Subscribers with a higher priority are called first. Defaults to 0.
 
         Returns:
             PluginBus: The plugin bus.
         """
-        self._subscribers.setdefault(event, []).append(subscriber)
+        with self._lock:
+            if (event, subscriber) in self._registry:
+                return self
+
+            self._registry[(event, subscriber)] = owner
+            if where:
+                self._where[(event, subscriber)] = where
+            if priority:
+                self._priorities[(event, subscriber)] = priority
+            if owner is not None:
+                self._owners.setdefault(owner, []).append((event, subscriber))
+
+            self._subscribers.setdefault(event, []).append(subscriber)
+            self._compile(event)
+            self._attach(event)
         return self
 
     def unsubscribe(self, event: Union[str, Enum], subscriber: callable) -> "PluginBus":
@@ -140,10 +674,24 @@ class PluginBus:
         Returns:
             PluginBus: The plugin bus.
         """
-        try:
+        with self._lock:
+            try:
+                owner = self._registry.pop((event, subscriber))
+            except KeyError:
+                return self
+            self._where.pop((event, subscriber), None)
+            self._priorities.pop((event, subscriber), None)
+
+            if owner is not None:
+                self._owners[owner].remove((event, subscriber))
+                if not self._owners[owner]:
+                    del self._owners[owner]
+
             self._subscribers[event].remove(subscriber)
-        except (KeyError, ValueError):
-            pass
+            self._compile(event)
+            self._detach(event)
+
+        self._retire([subscriber])
         return self
 
     def publish(self, event: Union[str, Enum], *args, **kwargs) -> "PluginBus":
@@ -151,18 +699,125 @@ class PluginBus:
         Publish an event.
 
         Args:
-            event (Union[str, Enum]): The event.
+            event (Union[str, Enum]): The event, or an instance of a declared custom event,
+                which subscribers of its topic receive as their first argument.
             args (List[Any]): The arguments.
             kwargs (Dict[str, Any]): The keyword arguments.
 
         Returns:
             PluginBus: The plugin bus.
         """
-        for subscriber in self._subscribers.get(event, []):
-            subscriber(*args, **kwargs)
+        subscribers = self._dispatch.get(id(event))
+        if subscribers is None and event.__class__ in TOPICS:
+            event, args = TOPICS[event.__class__], (event, *args)
+            subscribers = self._dispatch.get(id(event))
+        if subscribers is None:
+            subscribers = self._dispatch.get(id(self._keys.get(event)))
+        if subscribers is None:
+            subscribers = self._resolve(event)
+        if subscribers.__class__ is PredicateIndex:
+            subscribers = subscribers.match(*args, **kwargs)
+
+        for subscriber in subscribers:
+            try:
+                if subscriber(*args, **kwargs) is CONSUMED:
+                    break
+            except Exception:
+                logger.exception("Subscriber %r failed on %r.", subscriber, event)
         
         return self
 
+    def drain(self, limit: Optional[int] = None) -> int:
+        """
+        Dispatch the Active Worlds events waiting in the queue.
+
+        Args:
+            limit (Optional[int], optional): The most events to dispatch. Defaults to all queued.
+
+        Returns:
+            int: The number of events dispatched.
+        """
+        if self._queue is None:
+            return 0
+
+        return self._queue.drain(self.publish, limit)
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Deliver the batches whose window has elapsed.
+
+        Args:
+            force (bool, optional): Deliver every pending batch. Defaults to False.
+
+        Returns:
+            int: The number of events delivered.
+        """
+        now = monotonic()
+        delivered = 0
+        for batch in list(self._batches):
+            if batch.deadline is None or not (force or batch.deadline <= now):
+                continue
+            try:
+                delivered += batch.flush()
+            except Exception:
+                logger.exception("Batch subscriber %r failed.", batch.subscriber)
+
+        return delivered
+
+    def next_flush(self) -> Optional[float]:
+        """
+        Get the seconds until the next batch is due.
+
+        Returns:
+            Optional[float]: The seconds until the earliest deadline, or None if no batch is pending.
+        """
+        deadlines = [batch.deadline for batch in list(self._batches) if batch.deadline is not None]
+        if not deadlines:
+            return None
+
+        return max(0.0, min(deadlines) - monotonic())
+
+    async def publish_async(self, event: Union[str, Enum], *args, **kwargs) -> "PluginBus":
+        """
+        Publish an event and wait for its async subscribers.
+        Synchronous subscribers run inline, async subscribers run concurrently on the running loop.
+
+        Args:
+            event (Union[str, Enum]): The event, or an instance of a declared custom event,
+                which subscribers of its topic receive as their first argument.
+            args (List[Any]): The arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            PluginBus: The plugin bus.
+        """
+        subscribers = self._dispatch.get(id(event))
+        if subscribers is None and event.__class__ in TOPICS:
+            event, args = TOPICS[event.__class__], (event, *args)
+            subscribers = self._dispatch.get(id(event))
+        if subscribers is None:
+            subscribers = self._dispatch.get(id(self._keys.get(event)))
+        if subscribers is None:
+            subscribers = self._resolve(event)
+        if subscribers.__class__ is PredicateIndex:
+            subscribers = subscribers.match(*args, **kwargs)
+
+        pending = []
+        for subscriber in subscribers:
+            try:
+                if isinstance(subscriber, CoroutineSubscriber):
+                    pending.append(subscriber.subscriber(*args, **kwargs))
+                elif subscriber(*args, **kwargs) is CONSUMED:
+                    break
+            except Exception:
+                logger.exception("Subscriber %r failed on %r.", subscriber, event)
+
+        for result in await gather(*pending, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error("Subscriber failed on %r.", event, exc_info=result)
+
+        return self
+
     def has_subscriber(self, event: Union[str, Enum], subscriber: callable) -> bool:
         """
         Check if a subscriber is subscribed to an event.
@@ -174,4 +829,4 @@ class PluginBus:
         Returns:
             bool: Whether or not the subscriber is subscribed.
         """
-        return subscriber in self._subscribers.get(event, [])
+        return (event, subscriber) in self._registry
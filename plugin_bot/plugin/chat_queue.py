@@ -0,0 +1,191 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from collections import deque
+from logging import getLogger
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from korth_spirit import Instance
+
+logger = getLogger(__name__)
+MESSAGE = Tuple[Optional[int], str]
+
+
+class ChatQueue:
+    """
+    Outbound chat held until the event pump flushes it, so handlers never call the SDK to talk.
+
+    A token bucket limits the lines sent, rate per second with bursts of up to burst lines.
+    Consecutive messages to the same audience are merged into as few lines as the
+    length limit allows, and messages over the limit are split between words.
+    """
+
+    def __init__(
+        self,
+        instance: Instance,
+        rate: float = 4.0,
+        burst: int = 8,
+        limit: int = 255,
+        separator: str = " | ",
+        notify: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Initialize the chat queue.
+
+        Args:
+            instance (Instance): The instance that says and whispers the lines.
+            rate (float, optional): The lines per second sent once the burst is spent. Defaults to 4.0.
+            burst (int, optional): The most lines sent back to back. Defaults to 8.
+            limit (int, optional): The longest line the world accepts. Defaults to 255.
+            separator (str, optional): Joins merged messages. Defaults to " | ".
+            notify (Optional[Callable[[], Any]], optional): Called after a message is queued, to wake whatever
+                flushes the queue. Defaults to None.
+        """
+        self.instance = instance
+        self.rate = rate
+        self.burst = burst
+        self.limit = limit
+        self.separator = separator
+        self.notify = notify
+        self.sent = 0
+        self._pending: Deque[MESSAGE] = deque()
+        self._tokens = float(burst)
+        self._refilled = monotonic()
+        self._lock = Lock()
+
+    def say(self, message: str) -> "ChatQueue":
+        """
+        Queue a message to everyone.
+
+        Args:
+            message (str): The message.
+
+        Returns:
+            ChatQueue: The chat queue.
+        """
+        with self._lock:
+            self._pending.append((None, message))
+
+        if self.notify is not None:
+            self.notify()
+        return self
+
+    def whisper(self, session: int, message: str) -> "ChatQueue":
+        """
+        Queue a message to one avatar.
+
+        Args:
+            session (int): The session to whisper to.
+            message (str): The message.
+
+        Returns:
+            ChatQueue: The chat queue.
+        """
+        with self._lock:
+            self._pending.append((session, message))
+
+        if self.notify is not None:
+            self.notify()
+        return self
+
+    def _refill(self, now: float) -> None:
+        """
+        Add the tokens earned since the last refill.
+
+        Args:
+            now (float): The current monotonic time.
+        """
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _line(self) -> MESSAGE:
+        """
+        Take the next line off the queue, merging the messages after it that fit.
+
+        Returns:
+            MESSAGE: The session to whisper to or None to say, and the line.
+        """
+        session, line = self._pending.popleft()
+        if len(line) > self.limit:
+            cut = line.rfind(" ", 0, self.limit + 1)
+            cut = cut if cut > 0 else self.limit
+            self._pending.appendleft((session, line[cut:].lstrip()))
+            return session, line[:cut]
+
+        while self._pending:
+            following, message = self._pending[0]
+            if following != session or len(line) + len(self.separator) + len(message) > self.limit:
+                break
+            self._pending.popleft()
+            line = f"{line}{self.separator}{message}"
+
+        return session, line
+
+    def flush(self) -> int:
+        """
+        Send as many lines as the token bucket allows.
+        Meant to be called from the thread that owns the SDK.
+
+        Returns:
+            int: The number of lines sent.
+        """
+        lines: List[MESSAGE] = []
+        with self._lock:
+            self._refill(monotonic())
+            while self._pending and self._tokens >= 1:
+                self._tokens -= 1
+                lines.append(self._line())
+
+        for session, line in lines:
+            try:
+                if session is None:
+                    self.instance.say(line)
+                else:
+                    self.instance.whisper(session, line)
+            except Exception:
+                logger.exception("Could not send %r.", line)
+        self.sent += len(lines)
+
+        return len(lines)
+
+    def next_flush(self) -> Optional[float]:
+        """
+        Get the seconds until a line can next be sent.
+
+        Returns:
+            Optional[float]: The seconds until a token is available, or None if nothing is queued.
+        """
+        with self._lock:
+            if not self._pending:
+                return None
+            self._refill(monotonic())
+
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def __len__(self) -> int:
+        """
+        Get the number of queued messages.
+
+        Returns:
+            int: The number of messages.
+        """
+        return len(self._pending)
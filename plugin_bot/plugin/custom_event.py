@@ -0,0 +1,122 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import inspect
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Type
+
+from .topic import is_pattern
+
+TYPES: Dict[str, type] = {}
+TOPICS: Dict[type, str] = {}
+
+def custom_event(topic: str) -> Callable[[type], type]:
+    """
+    Declare the payload of a custom event.
+    The class becomes a slotted dataclass, and publishing an instance of it publishes the instance
+    on the topic, handed to every subscriber by reference.
+    A plugin whose handler cannot receive the instance as its only argument is refused when it is loaded.
+
+    Example:
+        @custom_event("version_requested")
+        class VersionRequested:
+            avatar_name: str
+
+        publish(VersionRequested(avatar_name="Bob"))
+
+    Args:
+        topic (str): The concrete topic the event is published on.
+
+    Raises:
+        ValueError: If the topic is a pattern, or another class already declared it.
+
+    Returns:
+        Callable[[type], type]: The class decorator.
+    """
+    if is_pattern(topic):
+        raise ValueError(f"Custom event topic {topic!r} must not be a pattern.")
+
+    def declare(class_: type) -> type:
+        declared = dataclass(class_, slots=True)
+        previous = TYPES.get(topic)
+        if previous is not None and _name(previous) != _name(declared):
+            raise ValueError(f"Topic {topic!r} is already declared by {_name(previous)}.")
+
+        TYPES[topic] = declared
+        TOPICS[declared] = topic
+        return declared
+
+    return declare
+
+def declared(topic: object) -> Optional[type]:
+    """
+    Get the class declared for a topic.
+
+    Args:
+        topic (object): The topic.
+
+    Returns:
+        Optional[type]: The latest class declared for the topic, or None.
+    """
+    return TYPES.get(topic) if isinstance(topic, str) else None
+
+def check(topic: str, handler: Callable, owner: str) -> None:
+    """
+    Check that a handler can receive the event declared for a topic, before it is ever published.
+    The handler must accept the event as its only positional argument, and if it annotates that argument,
+    with the declared class. Classes are compared by name, since reloading a plugin declares its class again.
+
+    Args:
+        topic (str): The topic.
+        handler (Callable): The handler, with its injected arguments already bound.
+        owner (str): The plugin to name in the error.
+
+    Raises:
+        TypeError: If the handler cannot receive the event.
+    """
+    class_ = declared(topic)
+    if class_ is None:
+        return
+
+    try:
+        signature = inspect.signature(handler)
+        bound = signature.bind(None)
+    except (TypeError, ValueError) as error:
+        raise TypeError(f"{owner} cannot handle {_name(class_)} on {topic!r}: {error}") from None
+
+    accepted = {_name(base) for base in class_.__mro__}
+    for name in bound.arguments:
+        annotation = signature.parameters[name].annotation
+        if annotation in (inspect.Parameter.empty, Any) or not isinstance(annotation, type):
+            continue
+        if _name(annotation) not in accepted:
+            raise TypeError(f"{owner} expects {annotation.__qualname__} on {topic!r}, which carries {_name(class_)}.")
+
+def _name(class_: Type) -> str:
+    """
+    Get the qualified name of a class including its module.
+
+    Args:
+        class_ (Type): The class.
+
+    Returns:
+        str: The name.
+    """
+    return f"{class_.__module__}.{class_.__qualname__}"
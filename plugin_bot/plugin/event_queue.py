@@ -0,0 +1,232 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from threading import Condition
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+
+class OverflowPolicy(Enum):
+    """
+    What an event queue does with an event that arrives while it is full.
+    """
+    BLOCK = auto()
+    DROP_OLDEST = auto()
+    PRIORITY = auto()
+    COALESCE = auto()
+
+
+@dataclass
+class QueueStats:
+    """
+    Data class for the counters of an event queue.
+    """
+    capacity: int
+    queued: int
+    enqueued: int
+    dispatched: int
+    coalesced: int
+    dropped: Dict[Any, int] = field(default_factory=dict)
+
+
+class EventQueue:
+    """
+    Bounded queue between event intake and plugin dispatch.
+
+    BLOCK waits for room, so it only suits producers on another thread than the one draining.
+    DROP_OLDEST sheds the oldest queued event.
+    PRIORITY sheds the oldest event of the lowest priority, or the incoming event when it ranks lower
+    still, and drains higher priorities first.
+    COALESCE replaces a queued event that shares a coalescing key with the incoming one,
+    and otherwise sheds the oldest.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        priorities: Optional[Dict[Any, int]] = None,
+        coalesce: Optional[Dict[Any, Callable[..., Hashable]]] = None,
+        timeout: Optional[float] = None,
+        notify: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Initialize the event queue.
+
+        Raises:
+            ValueError: If the capacity is less than one.
+
+        Args:
+            capacity (int, optional): The most events held at once. Defaults to 1024.
+            policy (OverflowPolicy, optional): The overflow policy. Defaults to OverflowPolicy.DROP_OLDEST.
+            priorities (Optional[Dict[Any, int]], optional): Priority per event for PRIORITY, higher first. Defaults to 0.
+            coalesce (Optional[Dict[Any, Callable[..., Hashable]]], optional): Maps an event's arguments to
+                its coalescing key for COALESCE. Defaults to None.
+            timeout (Optional[float], optional): Seconds BLOCK waits before shedding the event. Defaults to forever.
+            notify (Optional[Callable[[], Any]], optional): Called after an event is queued, to wake whatever
+                drains the queue. Defaults to None.
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity must be at least 1, not {capacity}.")
+
+        self._capacity = capacity
+        self._policy = policy
+        self._priorities = (priorities or {}) if policy is OverflowPolicy.PRIORITY else {}
+        self._coalesce = (coalesce or {}) if policy is OverflowPolicy.COALESCE else {}
+        self._timeout = timeout
+        self._notify = notify
+        self._order: List[int] = sorted({0, *self._priorities.values()}, reverse=True)
+        self._levels: Dict[int, Deque[list]] = {priority: deque() for priority in self._order}
+        self._index: Dict[Hashable, list] = {}
+        self._size = 0
+        self._enqueued = 0
+        self._dispatched = 0
+        self._coalesced = 0
+        self._dropped: Dict[Any, int] = {}
+        self._lock = Condition()
+
+    def __len__(self) -> int:
+        """
+        Get the number of queued events.
+
+        Returns:
+            int: The number of queued events.
+        """
+        return self._size
+
+    def _shed(self, entry: list) -> None:
+        """
+        Count a shed event and forget its coalescing key.
+
+        Args:
+            entry (list): The shed entry.
+        """
+        self._dropped[entry[0]] = self._dropped.get(entry[0], 0) + 1
+        if entry[3] is not None:
+            self._index.pop(entry[3], None)
+
+    def _make_room(self, priority: int) -> bool:
+        """
+        Free a slot for an incoming event according to the overflow policy.
+
+        Args:
+            priority (int): The priority of the incoming event.
+
+        Returns:
+            bool: Whether the incoming event may be queued.
+        """
+        if self._policy is OverflowPolicy.BLOCK:
+            return self._lock.wait_for(lambda: self._size < self._capacity, self._timeout)
+
+        lowest = next(level for level in reversed(self._order) if self._levels[level])
+        if lowest > priority:
+            return False
+
+        self._shed(self._levels[lowest].popleft())
+        self._size -= 1
+        return True
+
+    def put(self, event: Any, *args, **kwargs) -> "EventQueue":
+        """
+        Queue an event.
+
+        Args:
+            event (Any): The event.
+            args (List[Any]): The arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            EventQueue: The event queue.
+        """
+        priority = self._priorities.get(event, 0)
+        key = None
+        with self._lock:
+            if event in self._coalesce:
+                key = (event, self._coalesce[event](*args, **kwargs))
+                entry = self._index.get(key)
+                if entry is not None:
+                    entry[1], entry[2] = args, kwargs
+                    self._coalesced += 1
+                    return self
+
+            if self._size >= self._capacity and not self._make_room(priority):
+                self._dropped[event] = self._dropped.get(event, 0) + 1
+                return self
+
+            entry = [event, args, kwargs, key]
+            self._levels[priority].append(entry)
+            if key is not None:
+                self._index[key] = entry
+            self._size += 1
+            self._enqueued += 1
+
+        if self._notify is not None:
+            self._notify()
+        return self
+
+    def drain(self, dispatch: Callable[..., Any], limit: Optional[int] = None) -> int:
+        """
+        Dispatch queued events, highest priority first.
+
+        Args:
+            dispatch (Callable[..., Any]): Called with each event and its arguments.
+            limit (Optional[int], optional): The most events to dispatch. Defaults to all queued.
+
+        Returns:
+            int: The number of events dispatched.
+        """
+        batch = []
+        with self._lock:
+            remaining = self._size if limit is None else min(limit, self._size)
+            for priority in self._order:
+                level = self._levels[priority]
+                while level and len(batch) < remaining:
+                    entry = level.popleft()
+                    if entry[3] is not None:
+                        del self._index[entry[3]]
+                    batch.append(entry)
+
+            self._size -= len(batch)
+            self._dispatched += len(batch)
+            self._lock.notify_all()
+
+        for event, args, kwargs, _ in batch:
+            dispatch(event, *args, **kwargs)
+
+        return len(batch)
+
+    def stats(self) -> QueueStats:
+        """
+        Get the counters of the queue.
+
+        Returns:
+            QueueStats: The queue depth and what was queued, dispatched, coalesced and shed.
+        """
+        with self._lock:
+            return QueueStats(
+                capacity=self._capacity,
+                queued=self._size,
+                enqueued=self._enqueued,
+                dispatched=self._dispatched,
+                coalesced=self._coalesced,
+                dropped=dict(self._dropped),
+            )
@@ -0,0 +1,315 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import AbstractEventLoop
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from logging import getLogger
+from threading import Condition, get_ident
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+logger = getLogger(__name__)
+TASK = Tuple[Callable, tuple, dict]
+
+
+@dataclass
+class ExecutorStats:
+    """
+    Data class for a snapshot of the executor.
+    """
+    workers: int
+    active: int
+    queued: int
+    keys: int
+    completed: int
+    utilisation: float
+
+
+class KeyedExecutor:
+    """
+    Bounded thread pool that keeps tasks sharing a key in submission order,
+    while tasks with different keys, or with no key, run in parallel.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        """
+        Initialize the keyed executor.
+
+        Args:
+            max_workers (int, optional): The number of worker threads. Defaults to 4.
+        """
+        self._workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plugin")
+        self._lock = Condition()
+        self._backlog: Dict[Hashable, Deque[TASK]] = {}
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._busy = 0.0
+        self._started = perf_counter()
+
+    def _run(self, key: Optional[Hashable], task: TASK) -> None:
+        """
+        Run a task, then hand the next task for its key back to the pool.
+        Resubmitting rather than draining the backlog keeps one busy key from holding a worker.
+
+        Args:
+            key (Optional[Hashable]): The ordering key.
+            task (TASK): The task.
+        """
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+
+        function, args, kwargs = task
+        began = perf_counter()
+        try:
+            function(*args, **kwargs)
+        except Exception:
+            logger.exception("Blocking subscriber %r failed.", function)
+        finally:
+            elapsed = perf_counter() - began
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._busy += elapsed
+
+                following = None
+                if key is not None:
+                    backlog = self._backlog[key]
+                    if backlog:
+                        following = backlog.popleft()
+                    else:
+                        del self._backlog[key]
+                self._lock.notify_all()
+
+        if following is not None:
+            try:
+                self._pool.submit(self._run, key, following)
+            except RuntimeError:
+                with self._lock:
+                    self._queued -= 1 + len(self._backlog.pop(key, ()))
+                    self._lock.notify_all()
+
+    def submit(self, key: Optional[Hashable], function: Callable, *args, **kwargs) -> "KeyedExecutor":
+        """
+        Submit a task.
+
+        Raises:
+            RuntimeError: If the executor has been shut down.
+
+        Args:
+            key (Optional[Hashable]): The ordering key, or None if the task may run in any order.
+            function (Callable): The function to run.
+            args (List[Any]): The arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            KeyedExecutor: The keyed executor.
+        """
+        task = (function, args, kwargs)
+        with self._lock:
+            self._queued += 1
+            if key is not None:
+                if key in self._backlog:
+                    self._backlog[key].append(task)
+                    return self
+                self._backlog[key] = deque()
+
+        try:
+            self._pool.submit(self._run, key, task)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+                if key is not None and not self._backlog.get(key):
+                    self._backlog.pop(key, None)
+            raise
+
+        return self
+
+    def pending(self) -> int:
+        """
+        Get the number of tasks queued or running.
+
+        Returns:
+            int: The number of tasks in flight.
+        """
+        with self._lock:
+            return self._queued + self._active
+
+    def stats(self) -> ExecutorStats:
+        """
+        Get a snapshot of the executor.
+
+        Returns:
+            ExecutorStats: The queue depth, active workers and utilisation since start.
+        """
+        with self._lock:
+            elapsed = perf_counter() - self._started
+            return ExecutorStats(
+                workers=self._workers,
+                active=self._active,
+                queued=self._queued,
+                keys=len(self._backlog),
+                completed=self._completed,
+                utilisation=self._busy / (elapsed * self._workers) if elapsed else 0.0,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads.
+
+        Args:
+            wait (bool, optional): Whether to wait for queued tasks. Defaults to True.
+        """
+        if wait:
+            with self._lock:
+                self._lock.wait_for(lambda: not self._queued and not self._active)
+
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class BlockingSubscriber:
+    """
+    Wraps a blocking subscriber so that publishing hands it to the keyed executor.
+
+    A plugin opts in with a blocking property returning True, and may define an ordering_key method
+    taking the same arguments as handle_event, whose result keeps events sharing a key in order.
+    Its SDK calls still reach the pump thread, through the PumpProxy it is injected as its instance.
+    """
+    __slots__ = ("subscriber", "_executor", "_key")
+
+    def __init__(self, subscriber: Callable, executor: KeyedExecutor, key: Optional[Callable] = None) -> None:
+        """
+        Initialize the blocking subscriber.
+
+        Args:
+            subscriber (Callable): The blocking subscriber.
+            executor (KeyedExecutor): The executor to run it on.
+            key (Optional[Callable], optional): Maps the event arguments to an ordering key. Defaults to None.
+        """
+        self.subscriber = subscriber
+        self._executor = executor
+        self._key = key
+
+    def __call__(self, *args, **kwargs) -> None:
+        """
+        Submit the subscriber to the executor.
+        """
+        self._executor.submit(
+            self._key(*args, **kwargs) if self._key else None,
+            self.subscriber,
+            *args,
+            **kwargs,
+        )
+
+
+class PumpProxy:
+    """
+    Stands in for the bot instance in plugins, so SDK calls made off the pump thread, such as from
+    blocking handlers, run on the pump thread instead, as the SDK is not thread safe.
+    Such a call is scheduled on the event loop, which the pump runs between SDK waits,
+    and the calling thread waits for its result. Calls made on the pump thread go straight through.
+    """
+    __slots__ = ("_target", "_loop", "_notify", "_timeout", "_thread")
+
+    def __init__(
+        self,
+        target: Any,
+        loop: AbstractEventLoop,
+        notify: Optional[Callable[[], Any]] = None,
+        timeout: float = 5.0,
+    ) -> None:
+        """
+        Initialize the pump proxy on the pump thread.
+
+        Args:
+            target (Any): The bot instance.
+            loop (AbstractEventLoop): The event loop the pump runs.
+            notify (Optional[Callable[[], Any]], optional): Wakes the pump once a call is scheduled. Defaults to None.
+            timeout (float, optional): The seconds a call from another thread waits for the pump. Defaults to 5.0.
+        """
+        self._target = target
+        self._loop = loop
+        self._notify = notify
+        self._timeout = timeout
+        self._thread = get_ident()
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Get an attribute of the instance, its methods made safe to call from any thread.
+
+        Args:
+            name (str): The attribute name.
+
+        Returns:
+            Any: The attribute.
+        """
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+
+        return partial(self._call, value)
+
+    def _call(self, method: Callable, *args, **kwargs) -> Any:
+        """
+        Call a method of the instance on the pump thread.
+
+        Raises:
+            TimeoutError: If the pump did not run the call within the timeout.
+
+        Args:
+            method (Callable): The method.
+
+        Returns:
+            Any: What the method returned, the proxy in place of the instance.
+        """
+        if get_ident() == self._thread:
+            result = method(*args, **kwargs)
+        else:
+            future = Future()
+            self._loop.call_soon_threadsafe(self._run, future, method, args, kwargs)
+            if self._notify is not None:
+                self._notify()
+            result = future.result(self._timeout)
+
+        return self if result is self._target else result
+
+    @staticmethod
+    def _run(future: Future, method: Callable, args: tuple, kwargs: dict) -> None:
+        """
+        Run a call on the pump thread, handing its outcome to the waiting thread.
+
+        Args:
+            future (Future): The future the caller waits on.
+            method (Callable): The method.
+            args (tuple): The arguments.
+            kwargs (dict): The keyword arguments.
+        """
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            future.set_result(method(*args, **kwargs))
+        except BaseException as exception:
+            future.set_exception(exception)
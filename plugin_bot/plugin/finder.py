@@ -20,9 +20,9 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from importlib import import_module, reload
 from os import listdir
-from typing import Iterable
+from typing import Iterable, List, Optional
 
-from .plugin import Plugin, PluginData
+from .plugin import PLUGIN_TYPES, PluginData
 
 
 class PluginFinder:
@@ -47,7 +47,7 @@ class PluginFinder:
             List[PluginData]: The plugins.
         """
         self._plugins = []
-        for plugin_file in listdir(self._path):
+        for plugin_file in sorted(listdir(self._path)):
             if not plugin_file.endswith(".py"):
                 continue
 
@@ -69,7 +69,7 @@ class PluginFinder:
 
         exports = [
             getattr(plugin_module, attr) for attr in dir(plugin_module)
-            if isinstance(getattr(plugin_module, attr), Plugin)
+            if isinstance(getattr(plugin_module, attr), PLUGIN_TYPES)
         ]
 
         for plugin_class in exports:
@@ -78,3 +78,52 @@ class PluginFinder:
                 module=plugin_module,
                 class_=plugin_class
             )
+
+
+class SharedFinder(PluginFinder):
+    """
+    Imports the plugins once for every bot in the process.
+    Each call to find_plugins yields fresh subclasses of the imported plugin classes,
+    so injecting one bot's dependencies leaves the plugins of the others untouched.
+    """
+
+    def __init__(self, plugin_path: str) -> None:
+        """
+        Initializes the shared finder.
+
+        Args:
+            plugin_path (str): The path to the plugins.
+        """
+        super().__init__(plugin_path)
+        self._found: Optional[List[PluginData]] = None
+
+    def find_plugins(self) -> Iterable[PluginData]:
+        """
+        Derives plugins from the imported classes, importing them on the first call.
+
+        Returns:
+            List[PluginData]: The plugins.
+        """
+        if self._found is None:
+            self._found = list(super().find_plugins())
+
+        for plugin in self._found:
+            yield PluginData(
+                name=plugin.name,
+                module=plugin.module,
+                class_=type(plugin.class_.__name__, (plugin.class_,), {
+                    "__module__": plugin.class_.__module__,
+                    "__qualname__": plugin.class_.__qualname__,
+                }),
+            )
+
+    def refresh(self) -> "SharedFinder":
+        """
+        Reimports the plugins on the next call to find_plugins.
+
+        Returns:
+            SharedFinder: The shared finder.
+        """
+        self._found = None
+
+        return self
@@ -20,10 +20,38 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import inspect
 from functools import partialmethod, update_wrapper
-from typing import Callable, Dict, Iterable, Type
+from typing import Callable, Dict, Hashable, Iterable, Tuple, Type
+from weakref import WeakKeyDictionary
 
 from .plugin import PluginData
 
+_SIGNATURES: "WeakKeyDictionary[Callable, Tuple[Tuple[str, ...], Tuple[Tuple[str, object], ...]]]" = WeakKeyDictionary()
+
+
+def _signature(func: Callable) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, object], ...]]:
+    """
+    Gets the argument names and annotations of a function, inspecting each function only once.
+    Every injector shares the result, so plugin classes injected once per world are inspected once per process.
+
+    Args:
+        func (Callable): The function.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[Tuple[str, object], ...]]: The argument names, then the annotations by name.
+    """
+    signature = _SIGNATURES.get(func)
+    if signature is None:
+        full_arg_spec = inspect.getfullargspec(func)
+        signature = _SIGNATURES[func] = (
+            tuple(full_arg_spec.args + (full_arg_spec.kwonlyargs or [])),
+            tuple(
+                (arg_name, arg_type) for arg_name, arg_type in func.__annotations__.items()
+                if arg_name != 'return'
+            ),
+        )
+
+    return signature
+
 
 class PluginInjector:
     """
@@ -54,9 +82,8 @@ class PluginInjector:
         """
         return {
             arg_name: self.get_dependency(arg_type)
-            for arg_name, arg_type in func.__annotations__.items()
+            for arg_name, arg_type in _signature(func)[1]
             if arg_type in self._dependencies.keys()
-            and arg_name != 'return'
         }
 
     def _get_named_injectables(self, func: Callable) -> Dict:
@@ -69,13 +96,9 @@ class PluginInjector:
         Returns:
             Dict: The named arguments to inject into the function.
         """
-        full_arg_spec = inspect.getfullargspec(func)
-        args = full_arg_spec.args
-        args.extend(full_arg_spec.kwonlyargs or [])
-
         return {
             arg_name: self.get_dependency(arg_name)
-            for arg_name in args
+            for arg_name in _signature(func)[0]
             if arg_name in self._dependencies.keys()
         }
 
@@ -140,6 +163,30 @@ class PluginInjector:
 
         return self
 
+    def bindings(self, func: Callable, keys: Iterable[Hashable]) -> Dict[str, Hashable]:
+        """
+        Gets which of the given keys a function accepts, matched by argument name or annotation like inject.
+        Resolving this once lets values that change on every call be passed by keyword cheaply.
+
+        Args:
+            func (Callable): The function, bound or partially applied.
+            keys (Iterable[Hashable]): The types and names that values are available under.
+
+        Returns:
+            Dict[str, Hashable]: The key to pass for each accepted argument name.
+        """
+        keys = set(keys)
+        bound = {}
+        for name, parameter in inspect.signature(func).parameters.items():
+            if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+            if parameter.annotation in keys:
+                bound[name] = parameter.annotation
+            elif name in keys:
+                bound[name] = name
+
+        return bound
+
     def get_dependency(self, dependency: Type) -> object:
         """
         Gets the dependency from the injector.
@@ -18,12 +18,16 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from logging import getLogger
 from typing import List
 
 from .bus import PluginBus
 from .finder import PluginFinder
 from .injector import PluginInjector
 from .plugin import Plugin, PluginData
+from .router import DuplicateCommandError
+
+logger = getLogger(__name__)
 
 
 class PluginLoader:
@@ -72,8 +76,12 @@ class PluginLoader:
         for plugin_data in self._finder.find_plugins():
             try:
                 self.load(plugin_data)
+            except DuplicateCommandError as error:
+                logger.error("Plugin %s was not loaded: %s", plugin_data.class_.__name__, error)
             except ValueError:
                 pass
+            except TypeError:
+                logger.exception("Plugin %s was not loaded.", plugin_data.class_.__name__)
 
         return self
 
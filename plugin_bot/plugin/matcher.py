@@ -0,0 +1,263 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from collections import deque
+from dataclasses import dataclass
+from logging import getLogger
+from threading import Lock
+from typing import (Any, Callable, Dict, FrozenSet, Hashable, Iterable, List,
+                    Tuple, Union)
+
+from .injector import PluginInjector
+
+logger = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Trigger:
+    """
+    Data class for a trigger phrase, optionally only matched at the start of a chat line.
+    """
+    phrase: str
+    anchored: bool = False
+
+
+class TriggerMatcher:
+    """
+    Matches every registered trigger phrase against a chat line in one pass.
+
+    Phrases from all plugins share one Aho-Corasick automaton, so overlapping phrases
+    are all found and the scan costs the same however many phrases there are.
+    Matching ignores case and only counts whole words.
+    Adding or removing phrases edits the trie in place, and the failure links are
+    rebuilt on the next scan.
+    """
+
+    def __init__(self, injector: PluginInjector = None) -> None:
+        """
+        Initialize the trigger matcher.
+
+        Args:
+            injector (PluginInjector, optional): Resolves whether a handler accepts the matched trigger.
+                Defaults to an injector without dependencies.
+        """
+        self._injector = injector or PluginInjector(dependencies={})
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[FrozenSet[str]] = [frozenset()]
+        self._outputs: List[Tuple[str, ...]] = [()]
+        self._phrases: Dict[str, Dict[Hashable, Trigger]] = {}
+        self._handlers: Dict[Hashable, Tuple[Callable, Dict[str, Hashable]]] = {}
+        self._dirty = False
+        self._lock = Lock()
+
+    def __contains__(self, owner: Hashable) -> bool:
+        """
+        Check if a plugin has triggers registered.
+
+        Args:
+            owner (Hashable): The plugin.
+
+        Returns:
+            bool: Whether the plugin has triggers registered.
+        """
+        return owner in self._handlers
+
+    def __len__(self) -> int:
+        """
+        Get the number of registered phrases.
+
+        Returns:
+            int: The number of phrases.
+        """
+        return len(self._phrases)
+
+    def _insert(self, phrase: str) -> None:
+        """
+        Add a phrase to the trie.
+
+        Args:
+            phrase (str): The lower cased phrase.
+        """
+        node = 0
+        for character in phrase:
+            following = self._goto[node].get(character)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][character] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(frozenset())
+                self._outputs.append(())
+            node = following
+
+        self._terminal[node] = self._terminal[node] | {phrase}
+        self._dirty = True
+
+    def _remove(self, phrase: str) -> None:
+        """
+        Stop a phrase from matching. Its trie nodes stay, to be reused.
+
+        Args:
+            phrase (str): The lower cased phrase.
+        """
+        node = 0
+        for character in phrase:
+            node = self._goto[node][character]
+
+        self._terminal[node] = self._terminal[node] - {phrase}
+        self._dirty = True
+
+    def _link(self) -> None:
+        """
+        Rebuild the failure links and the phrases each node completes, breadth first.
+        """
+        pending = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            self._outputs[node] = tuple(self._terminal[node])
+            pending.append(node)
+
+        while pending:
+            node = pending.popleft()
+            for character, following in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and character not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(character, 0)
+                self._outputs[following] = tuple(self._terminal[following]) + self._outputs[self._fail[following]]
+                pending.append(following)
+
+        self._dirty = False
+
+    def register(
+        self,
+        triggers: Union[str, Trigger, Iterable[Union[str, Trigger]]],
+        handler: Callable,
+        owner: Hashable,
+        signature: Callable = None,
+    ) -> "TriggerMatcher":
+        """
+        Register a handler for one or more trigger phrases.
+
+        Args:
+            triggers (Union[str, Trigger, Iterable[Union[str, Trigger]]]): The phrases.
+            handler (Callable): Called with the chat event, and the matched phrase if it accepts trigger.
+            owner (Hashable): The plugin the triggers belong to.
+            signature (Callable, optional): The function whose arguments decide what is passed,
+                when the handler wraps it. Defaults to the handler.
+
+        Returns:
+            TriggerMatcher: The trigger matcher.
+        """
+        if isinstance(triggers, (str, Trigger)):
+            triggers = [triggers]
+
+        with self._lock:
+            self._handlers[owner] = (handler, self._injector.bindings(signature or handler, ("trigger",)))
+            for trigger in triggers:
+                if isinstance(trigger, str):
+                    trigger = Trigger(trigger)
+                phrase = trigger.phrase.lower()
+                if phrase not in self._phrases:
+                    self._phrases[phrase] = {}
+                    self._insert(phrase)
+                self._phrases[phrase][owner] = trigger
+
+        return self
+
+    def unregister(self, owner: Hashable) -> "TriggerMatcher":
+        """
+        Unregister every trigger of a plugin.
+
+        Args:
+            owner (Hashable): The plugin.
+
+        Returns:
+            TriggerMatcher: The trigger matcher.
+        """
+        with self._lock:
+            if self._handlers.pop(owner, None) is None:
+                return self
+
+            for phrase in [phrase for phrase, owners in self._phrases.items() if owner in owners]:
+                del self._phrases[phrase][owner]
+                if not self._phrases[phrase]:
+                    del self._phrases[phrase]
+                    self._remove(phrase)
+
+        return self
+
+    def scan(self, text: str) -> Dict[Hashable, str]:
+        """
+        Find the plugins whose triggers occur in a line of text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            Dict[Hashable, str]: The first phrase matched for each plugin, in order of occurrence.
+        """
+        if self._dirty:
+            with self._lock:
+                self._link()
+
+        goto, fail, outputs, phrases = self._goto, self._fail, self._outputs, self._phrases
+        text = text.lower()
+        matched: Dict[Hashable, str] = {}
+        node = 0
+        for end, character in enumerate(text, 1):
+            while node and character not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(character, 0)
+
+            for phrase in outputs[node]:
+                start = end - len(phrase)
+                if (start and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                    continue
+                for owner, trigger in phrases.get(phrase, {}).items():
+                    if owner not in matched and (start == 0 or not trigger.anchored):
+                        matched[owner] = trigger.phrase
+
+        return matched
+
+    def route(self, event: Any) -> Any:
+        """
+        Scan a chat event once and call the handler of every plugin it triggers.
+        A handler that raises is logged, and the handlers after it still run.
+
+        Args:
+            event (Any): The chat event.
+
+        Returns:
+            Any: The first non None value a handler returned, so a handler may consume the event.
+        """
+        returned = None
+        for owner, phrase in self.scan(event.chat_message).items():
+            handler, bindings = self._handlers[owner]
+            try:
+                result = handler(event, **{argument: phrase for argument in bindings})
+            except Exception:
+                logger.exception("Trigger handler %r failed on %r.", handler, phrase)
+                continue
+            if returned is None:
+                returned = result
+
+        return returned
@@ -0,0 +1,75 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import iscoroutinefunction
+from typing import Any, Callable, Protocol, runtime_checkable
+
+from .plugin import EVENT_TYPE
+
+
+@runtime_checkable
+class Middleware(Protocol):
+    """
+    Middleware interface, for what the bus layers around plugin handlers, such as stats, breakers and the watchdog.
+
+    The bus hands each plugin's own handler to its middleware in order as the plugin is registered,
+    each wrapping what the one before returned, and then dispatches the result according to the plugin's
+    execution policy. Every middleware hears when the plugin is unregistered.
+    """
+    def wrap(self, handler: Callable, plugin: Any, event: EVENT_TYPE) -> Callable:
+        """
+        Wrap a handler of a plugin.
+
+        Args:
+            handler (Callable): The handler, which may be a coroutine function.
+            plugin (Any): The plugin.
+            event (EVENT_TYPE): The event the handler receives.
+
+        Returns:
+            Callable: The wrapped handler, or the handler itself to leave it be.
+        """
+        ...
+
+    def release(self, plugin: Any) -> None:
+        """
+        Forget a plugin that was unregistered.
+
+        Args:
+            plugin (Any): The plugin.
+        """
+        ...
+
+def runs_inline(plugin: Any, handler: Callable) -> bool:
+    """
+    Check if the bus calls a plugin's handler on the pump thread, rather than on the executor,
+    a worker process or the event loop.
+
+    Args:
+        plugin (Any): The plugin.
+        handler (Callable): The handler.
+
+    Returns:
+        bool: Whether the handler runs inline.
+    """
+    return (
+        getattr(plugin, "blocking", False) is not True
+        and getattr(plugin, "cpu_bound", False) is not True
+        and not iscoroutinefunction(handler)
+    )
@@ -0,0 +1,299 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import marshal
+from dataclasses import fields, is_dataclass
+from functools import partial
+from importlib import import_module
+from itertools import count
+from logging import getLogger
+from multiprocessing import get_context
+from multiprocessing.connection import Connection, wait
+from os import cpu_count
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = getLogger(__name__)
+PRIMITIVES = (str, int, float, bool, bytes, type(None))
+
+
+def to_payload(argument: Any) -> Any:
+    """
+    Reduce an event argument to values marshal can encode.
+    Objects such as SDK events become a dict of their primitive attributes, and batches a list of those.
+    Declared custom events become a dict of all their fields.
+
+    Args:
+        argument (Any): The argument.
+
+    Returns:
+        Any: The marshallable payload.
+    """
+    if isinstance(argument, PRIMITIVES):
+        return argument
+
+    if isinstance(argument, (list, tuple)):
+        return [to_payload(item) for item in argument]
+
+    if is_dataclass(argument) and not isinstance(argument, type):
+        return {field.name: to_payload(getattr(argument, field.name)) for field in fields(argument)}
+
+    if hasattr(argument, "__dict__"):
+        return {
+            name: value for name, value in vars(argument).items()
+            if isinstance(value, PRIMITIVES) and not name.startswith("_")
+        }
+
+    return argument
+
+
+def _resolve(module: str, name: str) -> Callable:
+    """
+    Import a function by module and qualified name.
+
+    Args:
+        module (str): The module name.
+        name (str): The qualified name within the module.
+
+    Returns:
+        Callable: The function.
+    """
+    target = import_module(module)
+    for part in name.split("."):
+        target = getattr(target, part)
+
+    return target
+
+
+def _serve(connection: Connection) -> None:
+    """
+    Worker loop, answering marshalled tasks until an empty frame or the pipe closes.
+
+    Args:
+        connection (Connection): The worker end of the pipe.
+    """
+    functions: Dict[Tuple[str, str], Callable] = {}
+    while True:
+        try:
+            message = connection.recv_bytes()
+        except EOFError:
+            return
+
+        if not message:
+            return
+
+        task, module, name, args = marshal.loads(message)
+
+        try:
+            function = functions.get((module, name))
+            if function is None:
+                function = functions[(module, name)] = _resolve(module, name)
+            reply = marshal.dumps((task, True, function(*args)))
+        except Exception as exception:
+            reply = marshal.dumps((task, False, f"{type(exception).__name__}: {exception}"))
+
+        connection.send_bytes(reply)
+
+
+class ProcessOffloader:
+    """
+    Pool of worker processes for CPU bound plugin work.
+    Tasks and results cross the pipes as marshal frames, and functions are named
+    by module and qualified name, so nothing is pickled.
+    """
+
+    def __init__(self, workers: Optional[int] = None, deliver: Optional[Callable[[Callable], Any]] = None) -> None:
+        """
+        Initialize the process offloader.
+
+        Args:
+            workers (Optional[int], optional): The number of worker processes. Defaults to the cpu count.
+            deliver (Optional[Callable[[Callable], Any]], optional): Schedules a result callback on the thread
+                that should run it. Defaults to running it on the collecting thread.
+        """
+        self._workers = workers or cpu_count() or 1
+        self._deliver = deliver or (lambda callback: callback())
+        self._lock = Lock()
+        self._tasks = count()
+        self._pending: Dict[int, Tuple[Connection, Callable]] = {}
+        self._inflight: Dict[Connection, int] = {}
+        self._connections: List[Connection] = []
+        self._processes: List = []
+        self._collector: Optional[Thread] = None
+
+    def _start(self) -> None:
+        """
+        Spawn the workers and the thread that collects their results.
+        """
+        context = get_context("spawn")
+        for _ in range(self._workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._processes.append(process)
+            self._connections.append(parent)
+            self._inflight[parent] = 0
+
+        self._collector = Thread(target=self._collect, name="offload-collector", daemon=True)
+        self._collector.start()
+
+    def _collect(self) -> None:
+        """
+        Hand finished results to the deliver callable until every worker pipe has closed.
+        """
+        connections = list(self._connections)
+        while connections:
+            for connection in wait(connections):
+                try:
+                    task, ok, result = marshal.loads(connection.recv_bytes())
+                except (EOFError, OSError):
+                    connections.remove(connection)
+                    self._lost(connection)
+                    continue
+
+                with self._lock:
+                    _, callback = self._pending.pop(task)
+                    self._inflight[connection] -= 1
+
+                if ok:
+                    self._deliver(partial(callback, result))
+                else:
+                    logger.error("Offloaded task for %r failed: %s", callback, result)
+
+    def _lost(self, connection: Connection) -> None:
+        """
+        Stop sending to a worker whose pipe closed, and forget the tasks it was still running.
+
+        Args:
+            connection (Connection): The closed pipe.
+        """
+        with self._lock:
+            self._inflight.pop(connection, None)
+            lost = [task for task, (owner, _) in self._pending.items() if owner is connection]
+            for task in lost:
+                _, callback = self._pending.pop(task)
+                logger.error("Offloaded task for %r was lost with its worker.", callback)
+
+    def submit(self, module: str, name: str, args: tuple, callback: Callable[[Any], Any]) -> "ProcessOffloader":
+        """
+        Run a function on the least busy worker.
+        The task is encoded before anything is recorded, so a task that cannot be sent is never awaited.
+
+        Raises:
+            ValueError: If the arguments cannot be marshalled.
+            RuntimeError: If every worker has exited.
+
+        Args:
+            module (str): The module of the function.
+            name (str): The qualified name of the function.
+            args (tuple): Marshallable arguments.
+            callback (Callable[[Any], Any]): Receives the result.
+
+        Returns:
+            ProcessOffloader: The process offloader.
+        """
+        task = next(self._tasks)
+        frame = marshal.dumps((task, module, name, args))
+
+        with self._lock:
+            if self._collector is None:
+                self._start()
+            if not self._inflight:
+                raise RuntimeError("Every offload worker has exited.")
+
+            connection = min(self._inflight, key=self._inflight.get)
+            self._inflight[connection] += 1
+            self._pending[task] = (connection, callback)
+            try:
+                connection.send_bytes(frame)
+            except OSError:
+                self._inflight[connection] -= 1
+                del self._pending[task]
+                raise
+
+        return self
+
+    def pending(self) -> int:
+        """
+        Get the number of tasks awaiting a result.
+
+        Returns:
+            int: The number of tasks in flight.
+        """
+        return len(self._pending)
+
+    def shutdown(self) -> None:
+        """
+        Let the workers finish their tasks, then wait for them to exit.
+        """
+        with self._lock:
+            for connection in self._inflight:
+                try:
+                    connection.send_bytes(b"")
+                except OSError:
+                    pass
+
+        for process in self._processes:
+            process.join()
+
+        if self._collector is not None:
+            self._collector.join()
+
+        for connection in self._connections:
+            connection.close()
+
+
+class OffloadedSubscriber:
+    """
+    Wraps a cpu bound plugin so that its compute function runs on the offloader
+    and handle_event receives the result on the delivering thread.
+
+    A plugin opts in with a cpu_bound property returning True. Its compute staticmethod receives
+    the event reduced to its primitive attributes, and returns a marshallable result,
+    which handle_event receives as the result keyword.
+    """
+    __slots__ = ("subscriber", "_offloader", "_module", "_name")
+
+    def __init__(self, subscriber: Callable, offloader: ProcessOffloader, module: str, name: str) -> None:
+        """
+        Initialize the offloaded subscriber.
+
+        Args:
+            subscriber (Callable): The handler that receives the result.
+            offloader (ProcessOffloader): The offloader to run the compute function on.
+            module (str): The module of the compute function.
+            name (str): The qualified name of the compute function.
+        """
+        self.subscriber = subscriber
+        self._offloader = offloader
+        self._module = module
+        self._name = name
+
+    def __call__(self, *args, **kwargs) -> None:
+        """
+        Submit the compute function with the marshalled event arguments.
+        """
+        self._offloader.submit(
+            module=self._module,
+            name=self._name,
+            args=tuple(to_payload(argument) for argument in args),
+            callback=lambda result: self.subscriber(*args, result=result, **kwargs),
+        )
@@ -21,7 +21,8 @@
 from dataclasses import dataclass
 from enum import Enum
 from types import ModuleType
-from typing import Protocol, Type, Union, runtime_checkable
+from typing import (Collection, List, Mapping, Protocol, Type, Union,
+                    runtime_checkable)
 
 from korth_spirit import CallBackEnum, EventEnum
 from korth_spirit.events import Event
@@ -32,6 +33,36 @@ class Plugin(Protocol):
     """
     Plugin interface.
     """
+    def on_event(self) -> Union[EVENT_TYPE, Collection[EVENT_TYPE], Mapping[EVENT_TYPE, str]]:
+        """
+        Event to listen for, which may be a wildcard pattern over dotted topics.
+        A collection of events delivers all of them to handle_event, and a mapping from
+        event to method name delivers each event to its own method instead.
+
+        Returns:
+            Union[EVENT_TYPE, Collection[EVENT_TYPE], Mapping[EVENT_TYPE, str]]: The events to listen for.
+        """
+        ...
+
+    def handle_event(self, event: Event) -> None:
+        """
+        Handle the event.
+        May be declared async def, in which case it is scheduled on the bot's event loop.
+
+        Args:
+            event (Event): The event.
+        """
+        ...
+
+@runtime_checkable
+class BatchPlugin(Protocol):
+    """
+    Batch plugin interface, for plugins that would rather receive events in bulk.
+
+    The bus collects the events and delivers them once batch_size events are waiting
+    or batch_window seconds have passed since the first, 256 and 0.05 unless the plugin
+    defines those attributes.
+    """
     def on_event(self) -> EVENT_TYPE:
         """
         Event to listen for.
@@ -41,15 +72,88 @@ class Plugin(Protocol):
         """
         ...
 
+    def handle_events(self, events: List[Event]) -> None:
+        """
+        Handle a batch of events, oldest first.
+
+        Args:
+            events (List[Event]): The events.
+        """
+        ...
+
+@runtime_checkable
+class EventMapPlugin(Protocol):
+    """
+    Event map plugin interface, for plugins handling each of several events in its own method.
+
+    on_event maps each event to the name of the method handling it, such as
+    {EventEnum.AW_EVENT_AVATAR_ADD: "arrived", EventEnum.AW_EVENT_AVATAR_DELETE: "left"},
+    so one instance keeps its state across all of them.
+    """
+    def on_event(self) -> Mapping[EVENT_TYPE, str]:
+        """
+        Events to listen for, and their methods.
+
+        Returns:
+            Mapping[EVENT_TYPE, str]: The method name by event.
+        """
+        ...
+
+@runtime_checkable
+class CommandPlugin(Protocol):
+    """
+    Command plugin interface, for plugins answering a chat command such as "!version".
+
+    on_command is the command name without its prefix, or a collection of aliases.
+    handle_event receives the chat event, plus the parsed Command and its args
+    if it declares them by name or annotation.
+    """
+    def on_command(self) -> Union[str, Collection[str]]:
+        """
+        Command to answer.
+
+        Returns:
+            Union[str, Collection[str]]: The command name or its aliases.
+        """
+        ...
+
     def handle_event(self, event: Event) -> None:
         """
-        Handle the event.
+        Handle the command.
 
         Args:
-            event (Event): The event.
+            event (Event): The chat event.
+        """
+        ...
+
+@runtime_checkable
+class TriggerPlugin(Protocol):
+    """
+    Trigger plugin interface, for plugins reacting to phrases anywhere in chat.
+
+    on_trigger is a phrase, a Trigger anchored to the start of the line, or a collection of them.
+    handle_event receives the chat event, plus the matched phrase if it declares trigger.
+    """
+    def on_trigger(self) -> Union[str, Collection[str]]:
+        """
+        Phrases to react to.
+
+        Returns:
+            Union[str, Collection[str]]: The phrases.
         """
         ...
 
+    def handle_event(self, event: Event) -> None:
+        """
+        Handle the chat event.
+
+        Args:
+            event (Event): The chat event.
+        """
+        ...
+
+PLUGIN_TYPES = (Plugin, BatchPlugin, EventMapPlugin, CommandPlugin, TriggerPlugin)
+
 @dataclass
 class PluginData:
     """
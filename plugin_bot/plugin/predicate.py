@@ -0,0 +1,237 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+MISSING = object()
+
+
+class Predicate:
+    """
+    Base class for a condition on one attribute of an event.
+    """
+    __slots__ = ()
+
+    def matches(self, value: Any) -> bool:
+        """
+        Check the condition against a value.
+
+        Args:
+            value (Any): The attribute value.
+
+        Returns:
+            bool: Whether the value satisfies the condition.
+        """
+        raise NotImplementedError
+
+
+class OneOf(Predicate):
+    """
+    The attribute equals one of the values.
+    """
+    __slots__ = ("values", "ignore_case")
+
+    def __init__(self, *values: Hashable, ignore_case: bool = False) -> None:
+        """
+        Initialize the predicate.
+
+        Args:
+            values (Hashable): The accepted values.
+            ignore_case (bool, optional): Compare strings case insensitively, other values as they are.
+                Defaults to False.
+        """
+        self.values = tuple(value.lower() if ignore_case and isinstance(value, str) else value for value in values)
+        self.ignore_case = ignore_case
+
+    def matches(self, value: Any) -> bool:
+        return (value.lower() if self.ignore_case and isinstance(value, str) else value) in self.values
+
+
+class Equals(OneOf):
+    """
+    The attribute equals the value.
+    """
+    __slots__ = ()
+
+    def __init__(self, value: Hashable, ignore_case: bool = False) -> None:
+        """
+        Initialize the predicate.
+
+        Args:
+            value (Hashable): The accepted value.
+            ignore_case (bool, optional): Compare strings case insensitively. Defaults to False.
+        """
+        super().__init__(value, ignore_case=ignore_case)
+
+
+class Prefix(Predicate):
+    """
+    The attribute is a string starting with one of the prefixes.
+    """
+    __slots__ = ("values", "ignore_case")
+
+    def __init__(self, *values: str, ignore_case: bool = False) -> None:
+        """
+        Initialize the predicate.
+
+        Args:
+            values (str): The accepted prefixes.
+            ignore_case (bool, optional): Compare case insensitively. Defaults to False.
+        """
+        self.values = tuple(value.lower() if ignore_case else value for value in values)
+        self.ignore_case = ignore_case
+
+    def matches(self, value: Any) -> bool:
+        return isinstance(value, str) and (value.lower() if self.ignore_case else value).startswith(self.values)
+
+
+class Between(Predicate):
+    """
+    The attribute lies within an inclusive range, such as a band of citizen numbers.
+    """
+    __slots__ = ("low", "high")
+
+    def __init__(self, low: Any, high: Any) -> None:
+        """
+        Initialize the predicate.
+
+        Args:
+            low (Any): The lowest accepted value.
+            high (Any): The highest accepted value.
+        """
+        self.low = low
+        self.high = high
+
+    def matches(self, value: Any) -> bool:
+        try:
+            return self.low <= value <= self.high
+        except TypeError:
+            return False
+
+
+class AttributeIndex:
+    """
+    Index of every predicate on one attribute, so a value is checked against all of them at once.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the attribute index.
+        """
+        self._exact: Tuple[Dict[Hashable, List[int]], Dict[Hashable, List[int]]] = ({}, {})
+        self._prefixes: Tuple[Dict[int, Dict[str, List[int]]], Dict[int, Dict[str, List[int]]]] = ({}, {})
+        self._ranges: List[Tuple[Between, int]] = []
+        self._others: List[Tuple[Predicate, int]] = []
+
+    def add(self, predicate: Predicate, position: int) -> None:
+        """
+        Index a predicate.
+
+        Args:
+            predicate (Predicate): The predicate.
+            position (int): The position of its subscriber.
+        """
+        if isinstance(predicate, OneOf):
+            for value in predicate.values:
+                self._exact[predicate.ignore_case].setdefault(value, []).append(position)
+        elif isinstance(predicate, Prefix):
+            for value in predicate.values:
+                self._prefixes[predicate.ignore_case].setdefault(len(value), {}).setdefault(value, []).append(position)
+        elif isinstance(predicate, Between):
+            self._ranges.append((predicate, position))
+        else:
+            self._others.append((predicate, position))
+
+    def collect(self, value: Any, counts: Dict[int, int]) -> None:
+        """
+        Count a hit for every subscriber whose predicate the value satisfies.
+
+        Args:
+            value (Any): The attribute value.
+            counts (Dict[int, int]): Hits per subscriber position.
+        """
+        hits: List[int] = []
+        folded = value.lower() if isinstance(value, str) else value
+
+        for ignore_case, candidate in ((False, value), (True, folded)):
+            try:
+                hits.extend(self._exact[ignore_case].get(candidate, ()))
+            except TypeError:
+                pass
+
+            if isinstance(candidate, str):
+                for length, prefixes in self._prefixes[ignore_case].items():
+                    hits.extend(prefixes.get(candidate[:length], ()))
+
+        hits.extend(position for predicate, position in self._ranges if predicate.matches(value))
+        hits.extend(position for predicate, position in self._others if predicate.matches(value))
+
+        for position in set(hits):
+            counts[position] = counts.get(position, 0) + 1
+
+
+class PredicateIndex:
+    """
+    Dispatch list for an event whose subscribers declare predicates.
+    Predicates are compiled into per attribute indexes once, so matching an event
+    costs a few lookups however many subscribers filter on it.
+
+    A plugin declares them with a where property mapping event attribute names to predicates,
+    such as {"chat_message": Prefix("!", ignore_case=True)}, and is only called for events
+    satisfying every one of them.
+    """
+
+    def __init__(self, subscribers: Sequence[callable], predicates: Sequence[Optional[Dict[str, Predicate]]]) -> None:
+        """
+        Initialize the predicate index.
+
+        Args:
+            subscribers (Sequence[callable]): The subscribers in dispatch order.
+            predicates (Sequence[Optional[Dict[str, Predicate]]]): The predicates of each subscriber by attribute.
+        """
+        self._subscribers = tuple(subscribers)
+        self._always = [position for position, where in enumerate(predicates) if not where]
+        self._needed = {position: len(where) for position, where in enumerate(predicates) if where}
+        self._attributes: Dict[str, AttributeIndex] = {}
+
+        for position, where in enumerate(predicates):
+            for attribute, predicate in (where or {}).items():
+                self._attributes.setdefault(attribute, AttributeIndex()).add(predicate, position)
+
+    def match(self, *args, **kwargs) -> Tuple[callable, ...]:
+        """
+        Get the subscribers whose predicates all hold for an event.
+        Attributes are read from the first argument, or from a keyword argument of the same name.
+
+        Returns:
+            Tuple[callable, ...]: The matching subscribers in dispatch order.
+        """
+        source = args[0] if args else None
+        counts: Dict[int, int] = {}
+        for attribute, index in self._attributes.items():
+            value = kwargs[attribute] if attribute in kwargs else getattr(source, attribute, MISSING)
+            if value is not MISSING:
+                index.collect(value, counts)
+
+        positions = [position for position, count in counts.items() if count == self._needed[position]]
+        positions.extend(self._always)
+        positions.sort()
+
+        return tuple(self._subscribers[position] for position in positions)
@@ -0,0 +1,337 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import marshal
+from enum import Enum
+from functools import partial
+from struct import Struct
+from threading import Lock
+from time import perf_counter, sleep
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from korth_spirit import CallBackEnum, EventEnum
+
+from .custom_event import declared
+from .offload import to_payload
+
+HEADER = b"PBR\x01"
+LENGTH = Struct("<I")
+KINDS: Tuple[type, ...] = (str, EventEnum, CallBackEnum)
+RECORD = Tuple[float, Union[str, Enum], Tuple[Any, ...], Dict[str, Any]]
+
+
+class Recorder:
+    """
+    Writes events to a compact log: a header, then one length prefixed marshal record per event
+    holding its nanosecond offset from the start of the recording, the event and its payload,
+    with objects such as SDK events reduced to their primitive attributes.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = perf_counter) -> None:
+        """
+        Initialize the recorder, truncating the log.
+
+        Args:
+            path (str): The path of the log.
+            clock (Callable[[], float], optional): The clock in seconds. Defaults to perf_counter.
+        """
+        self._file = open(path, "wb")
+        self._file.write(HEADER)
+        self._lock = Lock()
+        self._clock = clock
+        self._started = clock()
+        self.recorded = 0
+
+    def record(self, event: Union[str, Enum], *args, **kwargs) -> None:
+        """
+        Append an event to the log.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            args (List[Any]): The arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+        """
+        kind = KINDS.index(type(event))
+        body = marshal.dumps((
+            round((self._clock() - self._started) * 1e9),
+            kind,
+            event if kind == 0 else event.name,
+            [to_payload(argument) for argument in args],
+            {name: to_payload(value) for name, value in kwargs.items()},
+        ))
+        with self._lock:
+            self._file.write(LENGTH.pack(len(body)))
+            self._file.write(body)
+            self.recorded += 1
+
+    def tap(self, forward: Callable) -> Callable:
+        """
+        Wrap a relay target so that every event passing through it is recorded first.
+
+        Args:
+            forward (Callable): Takes the event and its arguments.
+
+        Returns:
+            Callable: The recording relay target.
+        """
+        def relay(event: Union[str, Enum], *args, **kwargs) -> Any:
+            self.record(event, *args, **kwargs)
+            return forward(event, *args, **kwargs)
+
+        return relay
+
+    def close(self) -> None:
+        """
+        Flush and close the log.
+        """
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "Recorder":
+        """
+        Use the recorder as a context manager.
+
+        Returns:
+            Recorder: The recorder.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Close the log on leaving the context.
+        """
+        self.close()
+
+
+def read_log(path: str) -> Iterator[RECORD]:
+    """
+    Read the events of a log.
+    Recorded objects come back as namespaces of their attributes, with event_type set as the SDK sets it.
+
+    Args:
+        path (str): The path of the log.
+
+    Yields:
+        RECORD: The offset in seconds, the event, its arguments and keyword arguments.
+    """
+    with open(path, "rb") as log:
+        if log.read(len(HEADER)) != HEADER:
+            raise ValueError(f"{path} is not an event log.")
+
+        while True:
+            prefix = log.read(LENGTH.size)
+            if len(prefix) < LENGTH.size:
+                return
+
+            offset, kind, name, args, kwargs = marshal.loads(log.read(LENGTH.unpack(prefix)[0]))
+            event = name if kind == 0 else KINDS[kind][name]
+            yield (
+                offset / 1e9,
+                event,
+                tuple(revive(event, argument) for argument in args),
+                {key: revive(event, value) for key, value in kwargs.items()},
+            )
+
+
+def revive(event: Union[str, Enum], payload: Any) -> Any:
+    """
+    Turn a recorded object back into something plugins can read attributes from.
+
+    Args:
+        event (Union[str, Enum]): The event the payload was recorded with.
+        payload (Any): The payload.
+
+    Returns:
+        Any: The declared custom event of the topic or a namespace for recorded objects, the payload itself otherwise.
+    """
+    class_ = declared(event)
+    if class_ is not None and isinstance(payload, dict):
+        return class_(**payload)
+
+    if isinstance(payload, dict):
+        return SimpleNamespace(**{"event_type": event, **payload})
+
+    if isinstance(payload, list):
+        return [revive(event, item) for item in payload]
+
+    return payload
+
+
+class ReplayBus:
+    """
+    Stands in for the SDK event bus of an instance, delivering whatever is published to it.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the replay bus.
+        """
+        self._subscribers: Dict[Union[str, Enum], List[Callable]] = {}
+
+    def subscribe(self, event: Union[str, Enum], subscriber: Callable) -> "ReplayBus":
+        """
+        Subscribe to an event.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            subscriber (Callable): The subscriber.
+
+        Returns:
+            ReplayBus: The replay bus.
+        """
+        self._subscribers.setdefault(event, []).append(subscriber)
+        return self
+
+    def unsubscribe(self, event: Union[str, Enum], subscriber: Callable) -> "ReplayBus":
+        """
+        Unsubscribe from an event.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            subscriber (Callable): The subscriber.
+
+        Returns:
+            ReplayBus: The replay bus.
+        """
+        self._subscribers.get(event, []).remove(subscriber)
+        return self
+
+    def publish(self, event: Union[str, Enum], *args, **kwargs) -> "ReplayBus":
+        """
+        Publish an event as the SDK would.
+
+        Args:
+            event (Union[str, Enum]): The event.
+            args (List[Any]): The arguments.
+            kwargs (Dict[str, Any]): The keyword arguments.
+
+        Returns:
+            ReplayBus: The replay bus.
+        """
+        for subscriber in list(self._subscribers.get(event, ())):
+            subscriber(*args, **kwargs)
+
+        return self
+
+
+class ReplayInstance:
+    """
+    Stands in for an Instance when replaying, so the plugin pipeline runs without the SDK.
+    Calls to SDK methods such as say are recorded in calls instead of reaching a world.
+    """
+
+    def __init__(self, name: str = "Plugin Bot") -> None:
+        """
+        Initialize the replay instance.
+
+        Args:
+            name (str, optional): The bot name plugins see. Defaults to "Plugin Bot".
+        """
+        self.name = name
+        self.bus = ReplayBus()
+        self.calls: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    def __getattr__(self, name: str) -> Callable:
+        """
+        Get a method that records its calls.
+
+        Args:
+            name (str): The SDK method name.
+
+        Returns:
+            Callable: The recording method.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return partial(self._call, name)
+
+    def _call(self, name: str, *args, **kwargs) -> "ReplayInstance":
+        """
+        Record a call to an SDK method.
+
+        Args:
+            name (str): The method name.
+
+        Returns:
+            ReplayInstance: The replay instance, as SDK methods return their instance.
+        """
+        self.calls.append((name, args, kwargs))
+        return self
+
+
+class Replayer:
+    """
+    Feeds a recorded log back in, at its original pace, scaled, or as fast as possible.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        clock: Callable[[], float] = perf_counter,
+        sleep: Callable[[float], Any] = sleep,
+    ) -> None:
+        """
+        Initialize the replayer.
+
+        Args:
+            path (str): The path of the log.
+            clock (Callable[[], float], optional): The clock in seconds. Defaults to perf_counter.
+            sleep (Callable[[float], Any], optional): Waits for a number of seconds on that clock.
+                Defaults to time.sleep.
+        """
+        self.path = path
+        self._clock = clock
+        self._sleep = sleep
+
+    def replay(
+        self,
+        publish: Callable,
+        speed: Optional[float] = None,
+        between: Optional[Callable[[], Any]] = None,
+    ) -> int:
+        """
+        Publish every recorded event.
+
+        Args:
+            publish (Callable): Takes the event and its arguments, such as the publish of a ReplayInstance bus.
+            speed (Optional[float], optional): 1.0 keeps the recorded gaps between events, 2.0 halves them.
+                Defaults to None, which publishes as fast as possible.
+            between (Optional[Callable[[], Any]], optional): Called after each event, such as draining the
+                plugin bus queue the way the event pump would. Defaults to None.
+
+        Returns:
+            int: The number of events replayed.
+        """
+        replayed = 0
+        started = self._clock()
+        for offset, event, args, kwargs in read_log(self.path):
+            if speed:
+                delay = offset / speed - (self._clock() - started)
+                if delay > 0:
+                    self._sleep(delay)
+
+            publish(event, *args, **kwargs)
+            if between is not None:
+                between()
+            replayed += 1
+
+        return replayed
@@ -0,0 +1,204 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple, Union
+
+from .injector import PluginInjector
+
+
+class DuplicateCommandError(ValueError):
+    """
+    Raised when a plugin registers a command another plugin already answers.
+    """
+
+    def __init__(self, command: str, owner: Hashable, plugin: Hashable) -> None:
+        """
+        Initialize the error.
+
+        Args:
+            command (str): The command, with its prefix.
+            owner (Hashable): The plugin the command is registered to.
+            plugin (Hashable): The plugin that tried to register it.
+        """
+        super().__init__(
+            f"Command {command} of plugin {type(plugin).__name__} is already registered by plugin {type(owner).__name__}."
+        )
+        self.command = command
+        self.owner = owner
+        self.plugin = plugin
+
+
+@dataclass
+class Command:
+    """
+    Data class for a parsed chat command.
+    """
+    name: str
+    text: str = ""
+    args: List[str] = field(default_factory=list)
+
+
+class CommandRouter:
+    """
+    Routes chat commands such as "!version" to the one plugin registered for them.
+    Each chat line is parsed once and the handler found with a single dictionary lookup,
+    however many commands are registered.
+    """
+
+    def __init__(self, prefix: str = "!", injector: PluginInjector = None) -> None:
+        """
+        Initialize the command router.
+
+        Args:
+            prefix (str, optional): The prefix marking a chat line as a command. Defaults to "!".
+            injector (PluginInjector, optional): Resolves which parsed values a handler accepts.
+                Defaults to an injector without dependencies.
+        """
+        self.prefix = prefix
+        self._injector = injector or PluginInjector(dependencies={})
+        self._commands: Dict[str, Tuple[Callable, Dict[str, Hashable]]] = {}
+        self._owners: Dict[Hashable, List[str]] = {}
+
+    def __contains__(self, owner: Hashable) -> bool:
+        """
+        Check if a plugin has commands registered.
+
+        Args:
+            owner (Hashable): The plugin.
+
+        Returns:
+            bool: Whether the plugin has commands registered.
+        """
+        return owner in self._owners
+
+    def __len__(self) -> int:
+        """
+        Get the number of registered commands.
+
+        Returns:
+            int: The number of commands.
+        """
+        return len(self._commands)
+
+    def _names(self, commands: Union[str, Iterable[str]]) -> List[str]:
+        """
+        Normalize a command name or its aliases.
+
+        Args:
+            commands (Union[str, Iterable[str]]): The command name, or its name and aliases.
+
+        Returns:
+            List[str]: The lowercased names.
+        """
+        return [commands.lower()] if isinstance(commands, str) else [name.lower() for name in commands]
+
+    def check(self, commands: Union[str, Iterable[str]], owner: Hashable) -> "CommandRouter":
+        """
+        Check that none of the command names is taken, before anything is built for them.
+
+        Raises:
+            DuplicateCommandError: If a command is already registered.
+
+        Args:
+            commands (Union[str, Iterable[str]]): The command name, or its name and aliases, without the prefix.
+            owner (Hashable): The plugin the commands would belong to.
+
+        Returns:
+            CommandRouter: The command router.
+        """
+        for name in self._names(commands):
+            if name in self._commands:
+                holder = next(plugin for plugin, names in self._owners.items() if name in names)
+                raise DuplicateCommandError(f"{self.prefix}{name}", holder, owner)
+
+        return self
+
+    def register(
+        self,
+        commands: Union[str, Iterable[str]],
+        handler: Callable,
+        owner: Hashable,
+        signature: Callable = None,
+    ) -> "CommandRouter":
+        """
+        Register a handler for one or more command names.
+
+        Raises:
+            DuplicateCommandError: If a command is already registered.
+
+        Args:
+            commands (Union[str, Iterable[str]]): The command name, or its name and aliases, without the prefix.
+            handler (Callable): Called with the chat event and whichever of command and args it accepts.
+            owner (Hashable): The plugin the commands belong to.
+            signature (Callable, optional): The function whose arguments decide what is passed,
+                when the handler wraps it. Defaults to the handler.
+
+        Returns:
+            CommandRouter: The command router.
+        """
+        self.check(commands, owner)
+
+        names = self._names(commands)
+        bindings = self._injector.bindings(signature or handler, (Command, "command", "args", "text"))
+        for name in names:
+            self._commands[name] = (handler, bindings)
+        self._owners.setdefault(owner, []).extend(names)
+
+        return self
+
+    def unregister(self, owner: Hashable) -> "CommandRouter":
+        """
+        Unregister every command of a plugin.
+
+        Args:
+            owner (Hashable): The plugin.
+
+        Returns:
+            CommandRouter: The command router.
+        """
+        for name in self._owners.pop(owner, ()):
+            del self._commands[name]
+
+        return self
+
+    def route(self, event: Any) -> Any:
+        """
+        Parse a chat event and call the handler of its command, if there is one.
+
+        Args:
+            event (Any): The chat event.
+
+        Returns:
+            Any: What the handler returned, so it may consume the event.
+        """
+        message = event.chat_message
+        if not message.startswith(self.prefix):
+            return
+
+        name, _, text = message[len(self.prefix):].partition(" ")
+        target = self._commands.get(name.lower())
+        if target is None:
+            return
+
+        handler, bindings = target
+        command = Command(name=name.lower(), text=text.strip(), args=text.split())
+        values = {Command: command, "command": command, "args": command.args, "text": command.text}
+        return handler(event, **{argument: values[key] for argument, key in bindings.items()})
@@ -0,0 +1,409 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from collections import deque
+from logging import getLogger
+from math import ceil
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+logger = getLogger(__name__)
+LEVEL_BITS = (8, 6, 6, 6)
+EPSILON = 1e-6
+
+
+class Timer:
+    """
+    A callback scheduled on a Scheduler, which cancel removes in constant time.
+    """
+    __slots__ = ("callback", "args", "when", "interval", "owner", "_scheduler", "_slot")
+
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        callback: Callable,
+        args: Tuple[Any, ...],
+        when: int,
+        interval: Optional[int],
+        owner: Optional[Hashable],
+    ) -> None:
+        """
+        Initialize the timer.
+
+        Args:
+            scheduler (Scheduler): The scheduler the timer is on.
+            callback (Callable): Called when the timer fires.
+            args (Tuple[Any, ...]): The arguments to call it with.
+            when (int): The tick the timer fires on.
+            interval (Optional[int]): The ticks between repeats, or None to fire once.
+            owner (Optional[Hashable]): The plugin the timer belongs to.
+        """
+        self.callback = callback
+        self.args = args
+        self.when = when
+        self.interval = interval
+        self.owner = owner
+        self._scheduler = scheduler
+        self._slot: Optional[Dict["Timer", None]] = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether the timer will still fire.
+
+        Returns:
+            bool: True until it fires for the last time or is cancelled.
+        """
+        return self._slot is not None
+
+    def cancel(self) -> bool:
+        """
+        Stop the timer from firing.
+
+        Returns:
+            bool: True if the timer was still active.
+        """
+        return self._scheduler._remove(self)
+
+
+class Scheduler:
+    """
+    Runs delayed and periodic plugin callbacks from the pump, on a hierarchical timer wheel.
+
+    The first wheel has a slot for each of the next 256 ticks, and every further wheel covers 64 slots
+    of the wheel below, so inserting and cancelling a timer are constant time however many are pending.
+    Timers further out wait on an outer wheel and cascade inwards as their time nears.
+
+    Idle work is queued separately and only run with the time a tick has to spare.
+    Timers and idle work belong to the plugin whose bound method they call, and are cancelled when it is unloaded.
+    """
+
+    def __init__(self, resolution: float = 0.01, clock: Callable[[], float] = monotonic) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            resolution (float, optional): The seconds per tick. Defaults to 0.01.
+            clock (Callable[[], float], optional): The clock in seconds. Defaults to monotonic.
+        """
+        self.resolution = resolution
+        self._clock = clock
+        self._tick = self._ticks(clock())
+        self._wheels: List[List[Dict[Timer, None]]] = [[{} for _ in range(1 << bits)] for bits in LEVEL_BITS]
+        self._owners: Dict[Hashable, Dict[Timer, None]] = {}
+        self._idle: Deque[Tuple[Callable, Tuple[Any, ...], Optional[Hashable]]] = deque()
+        self._pending = 0
+
+    def _ticks(self, seconds: float) -> int:
+        """
+        Get the tick a time falls in, forgiving the rounding error of summed float seconds.
+
+        Args:
+            seconds (float): The time.
+
+        Returns:
+            int: The tick.
+        """
+        return int(seconds / self.resolution + EPSILON)
+
+    def _place(self, timer: Timer) -> None:
+        """
+        Put a timer in the slot of the innermost wheel that reaches its tick.
+
+        Args:
+            timer (Timer): The timer.
+        """
+        delta = max(timer.when - self._tick, 0)
+        shift = 0
+        for level, bits in enumerate(LEVEL_BITS):
+            if delta < 1 << (shift + bits) or level == len(LEVEL_BITS) - 1:
+                break
+            shift += bits
+
+        when = max(timer.when, self._tick + 1) if level == 0 else timer.when
+        slot = self._wheels[level][(min(when, self._tick + (1 << (shift + bits)) - 1) >> shift) & ((1 << bits) - 1)]
+        slot[timer] = None
+        timer._slot = slot
+
+    def _remove(self, timer: Timer) -> bool:
+        """
+        Take a timer off its wheel.
+
+        Args:
+            timer (Timer): The timer.
+
+        Returns:
+            bool: True if the timer was on the wheel.
+        """
+        if timer._slot is None:
+            return False
+
+        del timer._slot[timer]
+        timer._slot = None
+        self._pending -= 1
+        owned = self._owners.get(timer.owner)
+        if owned is not None:
+            owned.pop(timer, None)
+            if not owned:
+                del self._owners[timer.owner]
+
+        return True
+
+    def _schedule(
+        self,
+        delay: float,
+        callback: Callable,
+        args: Tuple[Any, ...],
+        interval: Optional[float],
+        owner: Optional[Hashable],
+    ) -> Timer:
+        """
+        Create a timer and put it on the wheel.
+
+        Args:
+            delay (float): The seconds until it first fires.
+            callback (Callable): The callback.
+            args (Tuple[Any, ...]): The arguments.
+            interval (Optional[float]): The seconds between repeats, or None to fire once.
+            owner (Optional[Hashable]): The owner, or None for the object the callback is bound to.
+
+        Returns:
+            Timer: The timer.
+        """
+        if owner is None:
+            owner = getattr(callback, "__self__", None)
+
+        timer = Timer(
+            scheduler=self,
+            callback=callback,
+            args=args,
+            when=max(ceil((self._clock() + delay) / self.resolution - EPSILON), self._tick + 1),
+            interval=None if interval is None else max(1, round(interval / self.resolution)),
+            owner=owner,
+        )
+        self._place(timer)
+        self._pending += 1
+        if owner is not None:
+            self._owners.setdefault(owner, {})[timer] = None
+
+        return timer
+
+    def call_later(self, delay: float, callback: Callable, *args, owner: Optional[Hashable] = None) -> Timer:
+        """
+        Call a function once after a delay.
+
+        Args:
+            delay (float): The seconds to wait.
+            callback (Callable): The function.
+            owner (Optional[Hashable], optional): The plugin the timer belongs to.
+                Defaults to the object the callback is bound to.
+
+        Returns:
+            Timer: The timer.
+        """
+        return self._schedule(delay, callback, args, None, owner)
+
+    def call_every(
+        self,
+        interval: float,
+        callback: Callable,
+        *args,
+        delay: Optional[float] = None,
+        owner: Optional[Hashable] = None,
+    ) -> Timer:
+        """
+        Call a function repeatedly, until its timer is cancelled.
+        A repeat that falls due while the pump is stalled runs once when it catches up, not once per missed interval.
+
+        Args:
+            interval (float): The seconds between calls.
+            callback (Callable): The function.
+            delay (Optional[float], optional): The seconds until the first call. Defaults to the interval.
+            owner (Optional[Hashable], optional): The plugin the timer belongs to.
+                Defaults to the object the callback is bound to.
+
+        Returns:
+            Timer: The timer.
+        """
+        return self._schedule(interval if delay is None else delay, callback, args, interval, owner)
+
+    def idle(self, callback: Callable, *args, owner: Optional[Hashable] = None) -> "Scheduler":
+        """
+        Queue background work for the time ticks have to spare.
+        Work returning True is queued again behind the rest, so long jobs can be done in slices.
+
+        Args:
+            callback (Callable): The function.
+            owner (Optional[Hashable], optional): The plugin the work belongs to.
+                Defaults to the object the callback is bound to.
+
+        Returns:
+            Scheduler: The scheduler.
+        """
+        if owner is None:
+            owner = getattr(callback, "__self__", None)
+
+        self._idle.append((callback, args, owner))
+        return self
+
+    def wrap(self, handler: Callable, plugin: Any, event: Any) -> Callable:
+        """
+        Leave a plugin's handler be, as the scheduler only takes part as middleware to hear of unloads.
+
+        Args:
+            handler (Callable): The handler.
+            plugin (Any): The plugin.
+            event (Any): The event.
+
+        Returns:
+            Callable: The handler.
+        """
+        return handler
+
+    def release(self, plugin: Any) -> None:
+        """
+        Cancel the timers and idle work of an unregistered plugin.
+
+        Args:
+            plugin (Any): The plugin.
+        """
+        self.cancel(plugin)
+
+    def cancel(self, owner: Hashable) -> int:
+        """
+        Cancel every timer and all idle work of a plugin.
+
+        Args:
+            owner (Hashable): The plugin.
+
+        Returns:
+            int: The number of timers cancelled.
+        """
+        timers = list(self._owners.get(owner, ()))
+        for timer in timers:
+            self._remove(timer)
+
+        if self._idle:
+            self._idle = deque(work for work in self._idle if work[2] is not owner)
+
+        return len(timers)
+
+    def advance(self) -> int:
+        """
+        Fire every timer that has fallen due.
+
+        Returns:
+            int: The number of callbacks run.
+        """
+        target = self._ticks(self._clock())
+        if not self._pending:
+            self._tick = max(self._tick, target)
+            return 0
+
+        fired = 0
+        first = self._wheels[0]
+        mask = len(first) - 1
+        while self._tick < target and self._pending:
+            self._tick += 1
+            if self._tick & mask == 0:
+                self._cascade()
+
+            slot = first[self._tick & mask]
+            while slot:
+                timer = next(iter(slot))
+                self._remove(timer)
+                if timer.interval is not None:
+                    timer.when = self._tick + timer.interval
+                    self._pending += 1
+                    self._place(timer)
+                    if timer.owner is not None:
+                        self._owners.setdefault(timer.owner, {})[timer] = None
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    logger.exception("Timer %r failed.", timer.callback)
+                fired += 1
+
+        self._tick = max(self._tick, target)
+        return fired
+
+    def _cascade(self) -> None:
+        """
+        Move the timers of the outer slots that just came into range onto the wheels below.
+        """
+        shift = LEVEL_BITS[0]
+        for level in range(1, len(LEVEL_BITS)):
+            index = (self._tick >> shift) & ((1 << LEVEL_BITS[level]) - 1)
+            slot = self._wheels[level][index]
+            self._wheels[level][index] = {}
+            for timer in slot:
+                self._place(timer)
+            if index:
+                return
+            shift += LEVEL_BITS[level]
+
+    def run_idle(self, budget: float) -> int:
+        """
+        Run queued idle work until the budget is spent or the queue is empty.
+
+        Args:
+            budget (float): The seconds idle work may take.
+
+        Returns:
+            int: The number of callbacks run.
+        """
+        deadline = self._clock() + budget
+        ran = 0
+        for _ in range(len(self._idle)):
+            callback, args, owner = self._idle.popleft()
+            try:
+                if callback(*args) is True:
+                    self._idle.append((callback, args, owner))
+            except Exception:
+                logger.exception("Idle work %r failed.", callback)
+            ran += 1
+            if self._clock() >= deadline:
+                break
+
+        return ran
+
+    def next_due(self) -> Optional[float]:
+        """
+        Get the seconds until the pump next has timer work to do.
+        Idle work only takes the time ticks have to spare, so it never brings a tick forward.
+
+        Returns:
+            Optional[float]: The seconds until the next timer, or until the wheel next cascades
+                if every timer is further out, or None if no timer is scheduled.
+        """
+        if not self._pending:
+            return None
+
+        first = self._wheels[0]
+        mask = len(first) - 1
+        ahead = len(first) - (self._tick & mask)
+        for step in range(1, ahead + 1):
+            if step < ahead and first[(self._tick + step) & mask]:
+                break
+
+        return max(0.0, (self._tick + step) * self.resolution - self._clock())
+
+    def __len__(self) -> int:
+        return self._pending
@@ -0,0 +1,357 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import mmap
+from contextlib import contextmanager
+from os import (O_CREAT, O_RDWR, SEEK_SET, close, fstat, ftruncate, lseek,
+                makedirs, path)
+from os import open as os_open
+from struct import Struct
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+from zlib import crc32
+
+try:
+    from fcntl import LOCK_EX, LOCK_UN, lockf
+except ImportError:
+    from msvcrt import LK_LOCK, LK_UNLCK, locking
+
+    def lock_header(fd: int) -> None:
+        """
+        Lock the header of a store file against other processes, waiting as long as it takes.
+
+        Args:
+            fd (int): The file descriptor.
+        """
+        lseek(fd, 0, SEEK_SET)
+        while True:
+            try:
+                locking(fd, LK_LOCK, SLOT.size)
+                return
+            except OSError:
+                # LK_LOCK gives up after ten seconds of retries, a busy store only means waiting longer.
+                continue
+
+    def unlock_header(fd: int) -> None:
+        """
+        Unlock the header of a store file.
+
+        Args:
+            fd (int): The file descriptor.
+        """
+        lseek(fd, 0, SEEK_SET)
+        locking(fd, LK_UNLCK, SLOT.size)
+else:
+    def lock_header(fd: int) -> None:
+        """
+        Lock the header of a store file against other processes, waiting as long as it takes.
+
+        Args:
+            fd (int): The file descriptor.
+        """
+        lockf(fd, LOCK_EX, SLOT.size, 0)
+
+    def unlock_header(fd: int) -> None:
+        """
+        Unlock the header of a store file.
+
+        Args:
+            fd (int): The file descriptor.
+        """
+        lockf(fd, LOCK_UN, SLOT.size, 0)
+
+HEADER = Struct("<4sI")
+MAGIC = b"PBS\x01"
+SLOT = Struct("<qIBB50s")
+VALUE = Struct("<q")
+KEY_SIZE = 50
+EMPTY, LIVE, DELETED = 0, 1, 2
+_STATE = 12
+_STORES: Dict[str, "SharedStore"] = {}
+_STORES_LOCK = Lock()
+
+
+def open_store(file: str, slots: int = 4096) -> "SharedStore":
+    """
+    Open the store of a file, sharing one store per file within the process.
+    File locks belong to the process and fcntl releases them when any of its descriptors of the file closes,
+    so opening the same file twice in one process would let either copy's writes race the other's.
+    Every caller closes the store once, and it is unmapped when the last one does.
+
+    Args:
+        file (str): The path of the file the store is mapped from.
+        slots (int, optional): The number of keys the store holds, if it creates the file. Defaults to 4096.
+
+    Returns:
+        SharedStore: The shared store.
+    """
+    with _STORES_LOCK:
+        store = _STORES.get(path.realpath(file))
+        if store is None:
+            store = _STORES[path.realpath(file)] = SharedStore(file, slots=slots)
+        else:
+            store._users += 1
+
+        return store
+
+
+class SharedStore:
+    """
+    Table of integers by string key, kept in a memory mapped file so every bot process on a host shares it
+    and it outlives plugin reloads. Suited to counters, cooldown timestamps and ban flags.
+
+    The file is a fixed layout open addressing hash table of 64 byte slots. A key keeps its slot once
+    claimed, even after it is deleted, so reads take no lock and see a value as soon as it is written.
+    Writes are serialised by a lock on the header of the file, taken with fcntl or, on Windows, msvcrt.
+    Within a process, open_store shares one store per file.
+    """
+
+    def __init__(self, file: str, slots: int = 4096) -> None:
+        """
+        Open the store, creating the file if it does not exist.
+
+        Args:
+            file (str): The path of the file the store is mapped from.
+            slots (int, optional): The number of keys the store holds, if it creates the file. Defaults to 4096.
+
+        Raises:
+            ValueError: If the file exists with a different layout.
+        """
+        directory = path.dirname(file)
+        if directory:
+            makedirs(directory, exist_ok=True)
+
+        self.file = path.realpath(file)
+        self._lock = Lock()
+        self._users = 1
+        self._fd = os_open(self.file, O_RDWR | O_CREAT, 0o644)
+        with self._locked():
+            if fstat(self._fd).st_size == 0:
+                ftruncate(self._fd, SLOT.size * (slots + 1))
+                self._map = mmap.mmap(self._fd, 0)
+                HEADER.pack_into(self._map, 0, MAGIC, slots)
+            else:
+                self._map = mmap.mmap(self._fd, 0)
+
+        magic, self.slots = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != SLOT.size * (self.slots + 1):
+            self._unmap()
+            raise ValueError(f"{file} is not a shared store.")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the write lock of the store, against threads of this process and then other processes.
+        """
+        with self._lock:
+            lock_header(self._fd)
+            try:
+                yield
+            finally:
+                unlock_header(self._fd)
+
+    def _find(self, key: str) -> Tuple[Optional[int], bool, bytes, int]:
+        """
+        Find the slot of a key by linear probing.
+
+        Args:
+            key (str): The key.
+
+        Raises:
+            ValueError: If the key is longer than the slot holds.
+
+        Returns:
+            Tuple[Optional[int], bool, bytes, int]: The offset of the key's slot, or of the empty slot it would claim,
+                or None if the table is full, then whether the key has a slot, the encoded key and its hash.
+        """
+        encoded = key.encode()
+        if len(encoded) > KEY_SIZE:
+            raise ValueError(f"Key {key!r} is longer than {KEY_SIZE} bytes.")
+
+        hashed = crc32(encoded)
+        memory = self._map
+        for probe in range(self.slots):
+            offset = SLOT.size * ((hashed + probe) % self.slots + 1)
+            if memory[offset + _STATE] == EMPTY:
+                return offset, False, encoded, hashed
+
+            _, slot_hash, _, length, slot_key = SLOT.unpack_from(memory, offset)
+            if slot_hash == hashed and length == len(encoded) and slot_key[:length] == encoded:
+                return offset, True, encoded, hashed
+
+        return None, False, encoded, hashed
+
+    def _write(self, key: str, value: int) -> None:
+        """
+        Write a value with the lock held, claiming a slot for the key if it has none.
+
+        Args:
+            key (str): The key.
+            value (int): The value.
+
+        Raises:
+            ValueError: If the store is full.
+        """
+        offset, found, encoded, hashed = self._find(key)
+        if offset is None:
+            raise ValueError(f"{self.file} has no free slot for {key!r}.")
+
+        if found:
+            VALUE.pack_into(self._map, offset, value)
+            self._map[offset + _STATE] = LIVE
+        else:
+            SLOT.pack_into(self._map, offset, value, hashed, EMPTY, len(encoded), encoded)
+            self._map[offset + _STATE] = LIVE
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        """
+        Get the value of a key, without taking the lock.
+
+        Args:
+            key (str): The key.
+            default (Optional[int], optional): The value of a missing key. Defaults to None.
+
+        Returns:
+            Optional[int]: The value.
+        """
+        offset, found, _, _ = self._find(key)
+        if not found or self._map[offset + _STATE] != LIVE:
+            return default
+
+        return VALUE.unpack_from(self._map, offset)[0]
+
+    def set(self, key: str, value: int) -> "SharedStore":
+        """
+        Set the value of a key.
+
+        Args:
+            key (str): The key.
+            value (int): The value, a signed 64 bit integer.
+
+        Returns:
+            SharedStore: The shared store.
+        """
+        with self._locked():
+            self._write(key, value)
+
+        return self
+
+    def add(self, key: str, amount: int = 1) -> int:
+        """
+        Atomically add to the value of a key, counting from zero if it is missing.
+
+        Args:
+            key (str): The key.
+            amount (int, optional): The amount to add. Defaults to 1.
+
+        Returns:
+            int: The new value.
+        """
+        with self._locked():
+            value = self.get(key, 0) + amount
+            self._write(key, value)
+
+        return value
+
+    def compare_and_set(self, key: str, expected: Optional[int], value: int) -> bool:
+        """
+        Atomically set the value of a key if it still has the expected value.
+
+        Args:
+            key (str): The key.
+            expected (Optional[int]): The value the key must have, or None if it must be missing.
+            value (int): The new value.
+
+        Returns:
+            bool: True if the value was set.
+        """
+        with self._locked():
+            if self.get(key) != expected:
+                return False
+
+            self._write(key, value)
+
+        return True
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete a key. Its slot stays reserved for it.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            bool: True if the key was present.
+        """
+        with self._locked():
+            offset, found, _, _ = self._find(key)
+            if not found or self._map[offset + _STATE] != LIVE:
+                return False
+
+            self._map[offset + _STATE] = DELETED
+
+        return True
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """
+        Iterate over the present keys and their values.
+
+        Returns:
+            Iterator[Tuple[str, int]]: The keys and values.
+        """
+        for slot in range(1, self.slots + 1):
+            value, _, state, length, key = SLOT.unpack_from(self._map, SLOT.size * slot)
+            if state == LIVE:
+                yield key[:length].decode(), value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def close(self) -> None:
+        """
+        Unmap the store once every user has closed it. The file and its values remain for other processes.
+        """
+        with _STORES_LOCK, self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            if _STORES.get(self.file) is self:
+                del _STORES[self.file]
+            self._unmap()
+
+    def _unmap(self) -> None:
+        """
+        Unmap the store and close its file.
+        """
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "SharedStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
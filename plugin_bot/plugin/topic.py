@@ -0,0 +1,86 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from functools import lru_cache
+from typing import Tuple
+
+SEPARATOR = "."
+ONE = "*"
+ANY = "#"
+
+def is_pattern(topic: object) -> bool:
+    """
+    Check if a topic is a wildcard pattern.
+    In a pattern "*" stands for exactly one dotted segment and "#" for any number of them,
+    so "moderation.*" matches "moderation.kick" and "stats.#" matches "stats" and "stats.chat.daily".
+
+    Args:
+        topic (object): The topic, which is only a pattern if it is a string.
+
+    Returns:
+        bool: Whether or not the topic contains a wildcard segment.
+    """
+    return isinstance(topic, str) and (ONE in _segments(topic) or ANY in _segments(topic))
+
+def matches(pattern: str, topic: str) -> bool:
+    """
+    Check if a concrete topic falls under a pattern.
+
+    Args:
+        pattern (str): The pattern.
+        topic (str): The topic.
+
+    Returns:
+        bool: Whether or not the pattern matches the topic.
+    """
+    return _match(_segments(pattern), _segments(topic))
+
+@lru_cache(maxsize=1024)
+def _segments(topic: str) -> Tuple[str, ...]:
+    """
+    Split a topic into its dotted segments.
+
+    Args:
+        topic (str): The topic.
+
+    Returns:
+        Tuple[str, ...]: The segments.
+    """
+    return tuple(topic.split(SEPARATOR))
+
+def _match(pattern: Tuple[str, ...], topic: Tuple[str, ...]) -> bool:
+    """
+    Match topic segments against pattern segments.
+
+    Args:
+        pattern (Tuple[str, ...]): The pattern segments.
+        topic (Tuple[str, ...]): The topic segments.
+
+    Returns:
+        bool: Whether or not the segments match.
+    """
+    if not pattern:
+        return not topic
+
+    head, rest = pattern[0], pattern[1:]
+    if head == ANY:
+        return any(_match(rest, topic[start:]) for start in range(len(topic) + 1))
+
+    return bool(topic) and head in (ONE, topic[0]) and _match(rest, topic[1:])
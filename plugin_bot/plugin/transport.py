@@ -0,0 +1,427 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import marshal
+from collections import deque
+from functools import partial
+from logging import getLogger
+from os import getpid, listdir, makedirs, path, replace, unlink
+from selectors import EVENT_READ, DefaultSelector
+from socket import SOCK_STREAM, socket
+from struct import Struct
+from threading import Lock, Thread, get_ident
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .bus import PluginBus
+from .offload import PRIMITIVES, to_payload
+from .recording import revive
+
+try:
+    from socket import AF_UNIX
+except ImportError:
+    AF_UNIX = None
+
+logger = getLogger(__name__)
+LENGTH = Struct("<I")
+SUFFIX = ".sock"
+FRAME = Tuple[str, Tuple[Any, ...], Dict[str, Any]]
+OBJECT = "__plugin_bot_object__"
+
+
+def pack(argument: Any) -> Any:
+    """
+    Reduce an event argument to values marshal can encode, keeping plain dicts, lists and tuples as they are.
+    Other objects are reduced as offloaded arguments are, and marked so that they are revived on arrival.
+
+    Args:
+        argument (Any): The argument.
+
+    Returns:
+        Any: The marshallable payload.
+    """
+    if isinstance(argument, PRIMITIVES):
+        return argument
+    if type(argument) is tuple:
+        return tuple(pack(item) for item in argument)
+    if type(argument) is list:
+        return [pack(item) for item in argument]
+    if type(argument) is dict:
+        return {name: pack(value) for name, value in argument.items()}
+
+    return {OBJECT: to_payload(argument)}
+
+
+def unpack(topic: str, payload: Any) -> Any:
+    """
+    Restore an argument packed by pack, reviving the objects in it.
+
+    Args:
+        topic (str): The topic the argument was published on.
+        payload (Any): The payload.
+
+    Returns:
+        Any: The argument.
+    """
+    if isinstance(payload, tuple):
+        return tuple(unpack(topic, item) for item in payload)
+    if isinstance(payload, list):
+        return [unpack(topic, item) for item in payload]
+    if isinstance(payload, dict):
+        if len(payload) == 1 and OBJECT in payload:
+            return revive(topic, payload[OBJECT])
+        return {name: unpack(topic, value) for name, value in payload.items()}
+
+    return payload
+
+
+def encode(topic: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> bytes:
+    """
+    Encode a custom event as a length prefixed marshal frame.
+
+    Args:
+        topic (str): The topic.
+        args (Tuple[Any, ...]): The arguments.
+        kwargs (Dict[str, Any]): The keyword arguments.
+
+    Returns:
+        bytes: The frame.
+    """
+    body = marshal.dumps((
+        topic,
+        [pack(argument) for argument in args],
+        {name: pack(value) for name, value in kwargs.items()},
+    ))
+    return LENGTH.pack(len(body)) + body
+
+
+def decode(buffer: bytearray) -> List[FRAME]:
+    """
+    Decode the complete frames at the start of a buffer, removing them from it.
+
+    Args:
+        buffer (bytearray): The bytes received so far.
+
+    Returns:
+        List[FRAME]: The topic, arguments and keyword arguments of each frame.
+    """
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= LENGTH.size:
+        size = LENGTH.unpack_from(buffer, offset)[0]
+        if len(buffer) - offset - LENGTH.size < size:
+            break
+        start = offset + LENGTH.size
+        topic, args, kwargs = marshal.loads(bytes(buffer[start:start + size]))
+        frames.append((
+            topic,
+            tuple(unpack(topic, argument) for argument in args),
+            {name: unpack(topic, value) for name, value in kwargs.items()},
+        ))
+        offset = start + size
+
+    del buffer[:offset]
+    return frames
+
+
+class SocketTransport:
+    """
+    Forwards chosen custom topics between bot processes on one host, without a broker.
+
+    Every process listens on its own Unix socket in a shared directory and connects to the
+    sockets of the others. Events published on an opted in topic are framed and buffered,
+    then written to every peer in one call each when the pump flushes. Writes never block the
+    pump: what a peer does not take is kept for it and written on later flushes. Frames from
+    peers are read on a background thread and published on the pump thread when it polls.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        topics: Iterable[str],
+        name: Optional[str] = None,
+        rescan: float = 1.0,
+        notify: Optional[Callable[[], Any]] = None,
+        backlog: int = 1 << 20,
+    ) -> None:
+        """
+        Initialize the socket transport.
+
+        Args:
+            directory (str): The directory every bot process shares its socket in.
+            topics (Iterable[str]): The custom topics forwarded to and accepted from peers.
+            name (Optional[str], optional): The name of this process's socket. Defaults to the process id.
+            rescan (float, optional): The seconds between looking for new peers. Defaults to 1.0.
+            notify (Optional[Callable[[], Any]], optional): Called from the reading thread after frames arrive,
+                and from other threads than the one that attached the transport after they buffer a frame,
+                to wake whatever polls and flushes it. Defaults to None.
+            backlog (int, optional): The most unwritten bytes kept for a peer before it is dropped. Defaults to 1 MiB.
+        """
+        self.directory = directory
+        self.topics = frozenset(topics)
+        self.address = path.join(directory, f"{name or getpid()}{SUFFIX}")
+        self.rescan = rescan
+        self.notify = notify
+        self.backlog = backlog
+        self.sent = 0
+        self.received = 0
+        self._bus: Optional[PluginBus] = None
+        self._subscriptions: List[Tuple[str, partial]] = []
+        self._outbound: List[bytes] = []
+        self._inbound: Deque[FRAME] = deque()
+        self._lock = Lock()
+        self._peers: Dict[str, socket] = {}
+        self._unwritten: Dict[str, bytearray] = {}
+        self._scanned = float("-inf")
+        self._relaying: Optional[FRAME] = None
+        self._selector = DefaultSelector()
+        self._listener: Optional[socket] = None
+        self._reader: Optional[Thread] = None
+        self._pump: Optional[int] = None
+
+    def attach(self, bus: PluginBus) -> "SocketTransport":
+        """
+        Start listening for peers and forwarding the opted in topics published on a bus.
+
+        Args:
+            bus (PluginBus): The bus.
+
+        Raises:
+            OSError: If the platform has no Unix domain sockets.
+
+        Returns:
+            SocketTransport: The socket transport.
+        """
+        if AF_UNIX is None:
+            raise OSError("Unix domain sockets are not available on this platform.")
+
+        makedirs(self.directory, exist_ok=True)
+        if path.exists(self.address):
+            unlink(self.address)
+
+        # Listen before the socket file takes its name, so peers never find it refusing connections.
+        binding = f"{self.address}.{getpid()}"
+        self._listener = socket(AF_UNIX, SOCK_STREAM)
+        self._listener.bind(binding)
+        self._listener.listen()
+        replace(binding, self.address)
+        self._selector.register(self._listener, EVENT_READ)
+        self._reader = Thread(target=self._read, name="plugin-transport", daemon=True)
+        self._reader.start()
+
+        self._bus = bus
+        self._pump = get_ident()
+        for topic in self.topics:
+            self._subscriptions.append((topic, partial(self._forward, topic)))
+            bus.subscribe(*self._subscriptions[-1])
+
+        return self
+
+    def _forward(self, topic: str, *args, **kwargs) -> None:
+        """
+        Buffer an event for the peers, unless it is the peer event being relayed,
+        waking the pump to flush it if it was published from another thread.
+
+        Args:
+            topic (str): The topic.
+        """
+        relaying = self._relaying
+        if relaying is not None and relaying[0] == topic and relaying[1] == args and relaying[2] == kwargs:
+            return
+
+        frame = encode(topic, args, kwargs)
+        with self._lock:
+            self._outbound.append(frame)
+        if self.notify is not None and get_ident() != self._pump:
+            self.notify()
+
+    def _connect(self) -> None:
+        """
+        Connect to the sockets of peers that appeared since the last scan,
+        removing the socket files of processes that died without removing their own.
+        """
+        self._scanned = monotonic()
+        for entry in listdir(self.directory):
+            address = path.join(self.directory, entry)
+            if not entry.endswith(SUFFIX) or address == self.address or address in self._peers:
+                continue
+
+            peer = socket(AF_UNIX, SOCK_STREAM)
+            peer.setblocking(False)
+            try:
+                peer.connect(address)
+            except ConnectionRefusedError:
+                peer.close()
+                logger.info("Removing the stale socket %s.", address)
+                try:
+                    unlink(address)
+                except OSError:
+                    pass
+                continue
+            except OSError:
+                peer.close()
+                continue
+            self._peers[address] = peer
+            self._unwritten[address] = bytearray()
+
+    def _drop(self, address: str) -> None:
+        """
+        Close the connection to a peer and forget what it was owed.
+
+        Args:
+            address (str): The address of the peer.
+        """
+        self._peers.pop(address).close()
+        del self._unwritten[address]
+
+    def flush(self) -> int:
+        """
+        Write the buffered frames to every peer, one write per peer, without waiting on slow peers.
+        A peer that falls more than the backlog behind is dropped, and reconnected on a later scan.
+
+        Returns:
+            int: The number of frames written.
+        """
+        with self._lock:
+            frames, self._outbound = self._outbound, []
+
+        if monotonic() - self._scanned >= self.rescan:
+            self._connect()
+
+        payload = b"".join(frames)
+        for address, peer in list(self._peers.items()):
+            unwritten = self._unwritten[address]
+            unwritten += payload
+            if not unwritten:
+                continue
+
+            try:
+                del unwritten[:peer.send(unwritten)]
+            except BlockingIOError:
+                pass
+            except OSError:
+                logger.info("Peer %s went away.", address)
+                self._drop(address)
+                continue
+
+            if len(unwritten) > self.backlog:
+                logger.warning("Peer %s fell %d bytes behind and was dropped.", address, len(unwritten))
+                self._drop(address)
+
+        self.sent += len(frames)
+        return len(frames)
+
+    def poll(self, limit: Optional[int] = None) -> int:
+        """
+        Publish the events received from peers on the bus.
+        Meant to be called from the thread that owns the SDK.
+
+        Args:
+            limit (Optional[int], optional): The most events to publish. Defaults to all received.
+
+        Returns:
+            int: The number of events published.
+        """
+        published = 0
+        while self._inbound and (limit is None or published < limit):
+            topic, args, kwargs = self._relaying = self._inbound.popleft()
+            try:
+                self._bus.publish(topic, *args, **kwargs)
+            finally:
+                self._relaying = None
+            published += 1
+
+        return published
+
+    def pending(self) -> int:
+        """
+        Get the number of frames waiting to be written or published, and of peers still owed earlier writes.
+
+        Returns:
+            int: The number of frames and peers.
+        """
+        return len(self._outbound) + len(self._inbound) + sum(1 for unwritten in self._unwritten.values() if unwritten)
+
+    def _read(self) -> None:
+        """
+        Accept peers and read their frames until closed.
+        """
+        buffers: Dict[socket, bytearray] = {}
+        while self._listener is not None:
+            try:
+                ready = self._selector.select(timeout=0.1)
+            except (OSError, ValueError):
+                return
+
+            for key, _ in ready:
+                connection = key.fileobj
+                if connection is self._listener:
+                    try:
+                        accepted, _ = self._listener.accept()
+                    except OSError:
+                        continue
+                    buffers[accepted] = bytearray()
+                    self._selector.register(accepted, EVENT_READ)
+                    # A new peer is listening too, so look for its socket on the next flush.
+                    self._scanned = float("-inf")
+                    continue
+
+                try:
+                    data = connection.recv(65536)
+                except OSError:
+                    data = b""
+                if not data:
+                    self._selector.unregister(connection)
+                    connection.close()
+                    buffers.pop(connection, None)
+                    continue
+
+                buffers[connection] += data
+                received = self.received
+                for frame in decode(buffers[connection]):
+                    if frame[0] in self.topics:
+                        self._inbound.append(frame)
+                        self.received += 1
+                if self.received != received and self.notify is not None:
+                    self.notify()
+
+    def close(self) -> None:
+        """
+        Stop forwarding, close every socket and remove this process's socket file.
+        """
+        for topic, subscriber in self._subscriptions:
+            self._bus.unsubscribe(topic, subscriber)
+        self._subscriptions.clear()
+
+        listener, self._listener = self._listener, None
+        if self._reader is not None:
+            self._reader.join()
+        if listener is not None:
+            listener.close()
+            if path.exists(self.address):
+                unlink(self.address)
+        for key in list(self._selector.get_map().values()):
+            if key.fileobj is not listener:
+                key.fileobj.close()
+        self._selector.close()
+        for peer in self._peers.values():
+            peer.close()
+        self._peers.clear()
+        self._unwritten.clear()
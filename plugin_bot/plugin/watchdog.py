@@ -0,0 +1,302 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from collections import deque
+from logging import getLogger
+from sys import _current_frames
+from threading import Event, Thread, get_ident
+from time import perf_counter, thread_time
+from traceback import format_stack
+from typing import Any, Callable, Deque, Optional, Tuple
+from weakref import WeakSet
+
+from .middleware import runs_inline
+
+logger = getLogger(__name__)
+
+
+class WatchdogSubscriber:
+    """
+    Wraps an inline subscriber so that its wall time per call and rolling cpu time are policed.
+    Overrunning its budget too often, or exhausting its cpu quota, suspends it for one window,
+    dropping its events, after which it runs inline again.
+
+    A plugin sets its own limits with a time_budget property, the wall seconds a call may take,
+    and a cpu_quota property, the cpu seconds it may use in the watchdog's window.
+    """
+    __slots__ = (
+        "subscriber", "name", "budget", "quota", "started", "thread", "reported",
+        "suspended_until", "skipped", "_watchdog", "_usage", "_used", "_overruns", "__weakref__",
+    )
+
+    def __init__(
+        self,
+        subscriber: Callable,
+        watchdog: "Watchdog",
+        name: str,
+        budget: float,
+        quota: float,
+    ) -> None:
+        """
+        Initialize the watchdog subscriber.
+
+        Args:
+            subscriber (Callable): The subscriber.
+            watchdog (Watchdog): The watchdog policing it.
+            name (str): The plugin name to log.
+            budget (float): The wall seconds a call may take.
+            quota (float): The cpu seconds the subscriber may use per window.
+        """
+        self.subscriber = subscriber
+        self.name = name
+        self.budget = budget
+        self.quota = quota
+        self.started: Optional[float] = None
+        self.thread: Optional[int] = None
+        self.reported = False
+        self.suspended_until = 0.0
+        self.skipped = 0
+        self._watchdog = watchdog
+        self._usage: Deque[Tuple[float, float]] = deque()
+        self._used = 0.0
+        self._overruns: Deque[float] = deque()
+
+    def __call__(self, *args, **kwargs) -> object:
+        """
+        Call the subscriber, measuring its wall and cpu time, unless it is suspended.
+
+        Returns:
+            object: What the subscriber returned, or None while suspended.
+        """
+        if self.suspended_until:
+            if perf_counter() < self.suspended_until:
+                self.skipped += 1
+                return None
+            self.suspended_until = 0.0
+
+        self.thread = get_ident()
+        self.reported = False
+        cpu = thread_time()
+        self.started = perf_counter()
+        try:
+            return self.subscriber(*args, **kwargs)
+        finally:
+            ended = perf_counter()
+            elapsed = ended - self.started
+            self.started = None
+            self._account(ended, elapsed, thread_time() - cpu)
+
+    def _suspend(self, now: float) -> None:
+        """
+        Drop the subscriber's events for one window, and forget what it used so far.
+
+        Args:
+            now (float): When the suspension starts.
+        """
+        self.suspended_until = now + self._watchdog.window
+        self._usage.clear()
+        self._used = 0.0
+        self._overruns.clear()
+
+    def _account(self, now: float, elapsed: float, cpu: float) -> None:
+        """
+        Charge a finished call against the budget and the rolling quota.
+
+        Args:
+            now (float): When the call finished.
+            elapsed (float): The wall seconds the call took.
+            cpu (float): The cpu seconds the call used.
+        """
+        watchdog = self._watchdog
+        window = watchdog.window
+        if elapsed > self.budget:
+            self._overruns.append(now)
+            while self._overruns[0] < now - window:
+                self._overruns.popleft()
+
+            if len(self._overruns) >= watchdog.overruns:
+                logger.warning(
+                    "Plugin %s overran its budget of %.3fs %d times in %.0fs, it is suspended for %.0fs.",
+                    self.name, self.budget, len(self._overruns), window, window,
+                )
+                self._suspend(now)
+                return
+
+            logger.warning("Plugin %s took %.3fs against a budget of %.3fs.", self.name, elapsed, self.budget)
+
+        self._usage.append((now, cpu))
+        self._used += cpu
+        while self._usage and self._usage[0][0] < now - window:
+            self._used -= self._usage.popleft()[1]
+
+        if self._used > self.quota:
+            logger.warning(
+                "Plugin %s used %.3fs of cpu in %.0fs against a quota of %.3fs, it is suspended for %.0fs.",
+                self.name, self._used, window, self.quota, window,
+            )
+            self._suspend(now)
+
+
+class Watchdog:
+    """
+    Polices the time inline plugin handlers take, so one slow plugin cannot keep stalling the event pump.
+    A monitor thread also notices calls that are still running past their budget and logs where they are stuck.
+
+    A running call cannot be interrupted, and the pump waits for it, so a handler stuck in an endless loop
+    holds the pump for good: the watchdog can only report it. Plugins whose work may run long
+    should be blocking or cpu bound instead, so that it runs off the pump.
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.05,
+        quota: float = 1.0,
+        window: float = 10.0,
+        overruns: int = 3,
+        interval: float = 0.1,
+    ) -> None:
+        """
+        Initialize the watchdog.
+
+        Args:
+            budget (float, optional): The default wall seconds a call may take. Defaults to 0.05.
+            quota (float, optional): The default cpu seconds a subscriber may use per window. Defaults to 1.0.
+            window (float, optional): The seconds overruns and cpu use are counted over, and suspensions last.
+                Defaults to 10.0.
+            overruns (int, optional): The calls over budget within the window that suspend a subscriber. Defaults to 3.
+            interval (float, optional): The seconds between checks for stuck calls. Defaults to 0.1.
+        """
+        self.budget = budget
+        self.quota = quota
+        self.window = window
+        self.overruns = overruns
+        self.interval = interval
+        self._watched: WeakSet = WeakSet()
+        self._stopped = Event()
+        self._monitor: Optional[Thread] = None
+
+    def watch(
+        self,
+        subscriber: Callable,
+        name: str,
+        budget: Optional[float] = None,
+        quota: Optional[float] = None,
+    ) -> WatchdogSubscriber:
+        """
+        Wrap a subscriber so that it is policed.
+
+        Args:
+            subscriber (Callable): The subscriber.
+            name (str): The plugin name to log.
+            budget (Optional[float], optional): The wall seconds a call may take. Defaults to the watchdog's.
+            quota (Optional[float], optional): The cpu seconds it may use per window. Defaults to the watchdog's.
+
+        Returns:
+            WatchdogSubscriber: The policed subscriber.
+        """
+        watched = WatchdogSubscriber(
+            subscriber=subscriber,
+            watchdog=self,
+            name=name,
+            budget=self.budget if budget is None else budget,
+            quota=self.quota if quota is None else quota,
+        )
+        self._watched.add(watched)
+
+        if self._monitor is None and not self._stopped.is_set():
+            self._monitor = Thread(target=self._run, name="plugin-watchdog", daemon=True)
+            self._monitor.start()
+
+        return watched
+
+    def wrap(self, handler: Callable, plugin: Any, event: Any) -> Callable:
+        """
+        Police a plugin's handler if it runs inline on the pump, as middleware.
+        The plugin's time_budget and cpu_quota properties override the watchdog's limits.
+
+        Args:
+            handler (Callable): The handler.
+            plugin (Any): The plugin.
+            event (Any): The event.
+
+        Returns:
+            Callable: The policed handler, or the handler itself if it runs elsewhere.
+        """
+        if not runs_inline(plugin, handler):
+            return handler
+
+        budget = getattr(plugin, "time_budget", None)
+        quota = getattr(plugin, "cpu_quota", None)
+        return self.watch(
+            subscriber=handler,
+            name=type(plugin).__name__,
+            budget=budget if isinstance(budget, (int, float)) else None,
+            quota=quota if isinstance(quota, (int, float)) else None,
+        )
+
+    def release(self, plugin: Any) -> None:
+        """
+        Forget an unregistered plugin, whose policed handlers are dropped with it.
+
+        Args:
+            plugin (Any): The plugin.
+        """
+
+    def check(self) -> int:
+        """
+        Log where every call running past its budget is stuck, once per call.
+        The call is charged as an overrun when it returns.
+
+        Returns:
+            int: The number of stuck calls reported.
+        """
+        now = perf_counter()
+        frames = None
+        reported = 0
+        for watched in list(self._watched):
+            started = watched.started
+            if started is None or watched.reported or now - started <= watched.budget:
+                continue
+
+            frames = frames or _current_frames()
+            frame = frames.get(watched.thread)
+            logger.warning(
+                "Plugin %s is stuck after %.3fs against a budget of %.3fs:\n%s",
+                watched.name, now - started, watched.budget, "".join(format_stack(frame)) if frame else "",
+            )
+            watched.reported = True
+            reported += 1
+
+        return reported
+
+    def _run(self) -> None:
+        """
+        Check for stuck calls until stopped.
+        """
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self) -> None:
+        """
+        Stop the monitor thread.
+        """
+        self._stopped.set()
+        if self._monitor is not None:
+            self._monitor.join()
@@ -18,36 +18,340 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-from korth_spirit import ConfigurableInstance, Instance
+from asyncio import AbstractEventLoop, all_tasks, gather, new_event_loop, sleep
+from dataclasses import dataclass, field
+from logging import getLogger
+from os import getpid
+from threading import Event
+from time import perf_counter_ns
+from typing import Callable, ClassVar, Optional, Tuple
+
+from korth_spirit import ConfigurableInstance, EventEnum, Instance
 from korth_spirit.configuration import Configuration
+from korth_spirit.sdk import aw_wait
+
+from .plugin import (ChatQueue, CircuitBreaker, EventQueue, KeyedExecutor,
+                     LoopStats, OverflowPolicy, PluginBus, PluginFinder,
+                     PluginInjector, PluginLoader, PluginStats,
+                     ProcessOffloader, PumpProxy, Recorder,
+                     Scheduler, SharedStore, SocketTransport, TriggerMatcher,
+                     Watchdog, open_store)
+
+logger = getLogger(__name__)
+
+@dataclass
+class Runtime:
+    """
+    The event loop and workers plugins run on, which every bot in a process can share,
+    and the wakeup that cuts the SDK wait of their pump short.
+    """
+    WAKE_SLICE: ClassVar[int] = 10
+    MAX_WAKE_SLICE: ClassVar[int] = 100
+    ACTIVE_WINDOW: ClassVar[int] = 5000
+
+    loop: AbstractEventLoop = field(default_factory=new_event_loop)
+    executor: KeyedExecutor = field(default_factory=KeyedExecutor)
+    offloader: ProcessOffloader = field(init=False)
+    watchdog: Watchdog = field(init=False)
+    stats: LoopStats = field(default_factory=LoopStats)
+    wakeup: Event = field(default_factory=Event)
+    arrived: float = float("-inf")
 
-from .plugin import PluginBus, PluginFinder, PluginInjector, PluginLoader
+    def __post_init__(self) -> None:
+        self.offloader = ProcessOffloader(deliver=self._deliver)
+        self.watchdog = Watchdog()
 
+    def _deliver(self, callback: Callable) -> None:
+        """
+        Schedules an offloaded result on the loop and wakes the pump to run it.
+
+        Args:
+            callback (Callable): The result callback.
+        """
+        self.loop.call_soon_threadsafe(callback)
+        self.wake()
+
+    def wake(self) -> None:
+        """
+        Ends the pump's SDK wait within a slice, from any thread.
+        """
+        self.wakeup.set()
+
+    def arrive(self) -> None:
+        """
+        Wakes the pump for an event queued by the SDK, and keeps its wait slices short for a while after.
+        """
+        self.arrived = perf_counter_ns()
+        self.wakeup.set()
+
+    def wait(self, milliseconds: int) -> Tuple[int, bool]:
+        """
+        Waits on the SDK, which dispatches its events meanwhile, until the time is up or something wakes the pump.
+        The SDK wait cannot be interrupted, so it is taken in slices, checking the wakeup between them.
+        Slices last WAKE_SLICE milliseconds while blocking or offloaded tasks are in flight, or within
+        ACTIVE_WINDOW milliseconds of an SDK event arriving, as an event arriving during a slice is only
+        dispatched once it ends. Otherwise they double from there up to MAX_WAKE_SLICE, so a quiet bot
+        makes few SDK calls, at the cost of the first event after the quiet waiting up to a long slice.
+
+        Args:
+            milliseconds (int): The longest wait.
+
+        Returns:
+            Tuple[int, bool]: The nanoseconds waited, and whether the wait was cut short.
+        """
+        started = perf_counter_ns()
+        deadline = started + milliseconds * 1_000_000
+        woken = self.wakeup.is_set()
+        span = self.WAKE_SLICE
+        aw_wait(0 if woken else min(milliseconds, span))
+        while not woken:
+            woken = self.wakeup.is_set()
+            remaining = -((perf_counter_ns() - deadline) // 1_000_000)
+            if woken or remaining <= 0:
+                break
+            active = perf_counter_ns() - self.arrived < self.ACTIVE_WINDOW * 1_000_000
+            if active or self.executor.pending() or self.offloader.pending():
+                span = self.WAKE_SLICE
+            else:
+                span = min(span * 2, self.MAX_WAKE_SLICE)
+            aw_wait(min(remaining, span))
+
+        self.wakeup.clear()
+        return perf_counter_ns() - started, woken
+
+    def busy(self) -> bool:
+        """
+        Gets whether subscribers or offloaded tasks are in flight, besides the task pumping the SDK.
+
+        Returns:
+            bool: True if the SDK should be polled rather than waited on.
+        """
+        return len(all_tasks(self.loop)) > 1 or self.offloader.pending() > 0
+
+    def close(self) -> None:
+        """
+        Cancels in flight async, blocking and offloaded subscribers.
+        """
+        self.watchdog.stop()
+        self.offloader.shutdown()
+        tasks = all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(gather(*tasks, return_exceptions=True))
+        self.loop.close()
+        self.executor.shutdown(wait=False)
 
 class PluginInstance(ConfigurableInstance):
-    def __init__(self, configuration: Configuration):
+    TIMER: int = 100
+    MAX_TIMER: int = 1000
+    BUSY_TIMER: int = 5
+    QUEUE_CAPACITY: int = 4096
+    DRAIN_LIMIT: int = 256
+    IDLE_BUDGET: float = 0.005
+    STATS: bool = True
+    RECORDING: Optional[str] = None
+    TRANSPORT_DIRECTORY: str = ".plugin-bot"
+    TRANSPORT_TOPICS: Tuple[str, ...] = ()
+    STORE: Optional[str] = None
+    STORE_SLOTS: int = 4096
+
+    def __init__(
+        self,
+        configuration: Configuration,
+        runtime: Optional[Runtime] = None,
+        finder: Optional[PluginFinder] = None,
+    ):
         """
         Initializes a new instance of the PluginInstance class.
 
         Args:
             configuration (Configuration): The configuration of the bot.
+            runtime (Optional[Runtime], optional): A runtime shared with other bots, which closes it themselves.
+                Defaults to a runtime of its own.
+            finder (Optional[PluginFinder], optional): A finder shared with other bots.
+                Defaults to a finder for the configured plugin path.
         """        
         super().__init__(configuration)
-        bus: PluginBus = PluginBus(instance=self)
+        self._owns_runtime: bool = runtime is None
+        self._runtime: Runtime = runtime or Runtime()
+        self._timer: int = self.TIMER
+        self._loop: AbstractEventLoop = self._runtime.loop
+        self._executor: KeyedExecutor = self._runtime.executor
+        self._offloader: ProcessOffloader = self._runtime.offloader
+        self._queue: EventQueue = EventQueue(
+            capacity=self.QUEUE_CAPACITY,
+            policy=OverflowPolicy.PRIORITY,
+            priorities={EventEnum.AW_EVENT_CHAT: 1},
+            notify=self._runtime.arrive,
+        )
+        self._matcher: TriggerMatcher = TriggerMatcher()
+        self._stats: Optional[PluginStats] = PluginStats() if self.STATS else None
+        self._watchdog: Watchdog = self._runtime.watchdog
+        self._breaker: CircuitBreaker = CircuitBreaker()
+        self._chat: ChatQueue = ChatQueue(instance=self, notify=self._runtime.wake)
+        self._scheduler: Scheduler = Scheduler()
+        self._recorder: Optional[Recorder] = Recorder(self.RECORDING) if self.RECORDING else None
+        self._store: Optional[SharedStore] = open_store(self.STORE, slots=self.STORE_SLOTS) if self.STORE else None
+        self._bus: PluginBus = PluginBus(
+            instance=self,
+            loop=self._loop,
+            executor=self._executor,
+            offloader=self._offloader,
+            queue=self._queue,
+            matcher=self._matcher,
+            recorder=self._recorder,
+            middleware=[
+                layer for layer in (self._stats, self._breaker, self._watchdog, self._scheduler)
+                if layer is not None
+            ],
+        )
+        self._transport: Optional[SocketTransport] = SocketTransport(
+            directory=self.TRANSPORT_DIRECTORY,
+            topics=self.TRANSPORT_TOPICS,
+            name=None if self._owns_runtime else f"{getpid()}-{configuration.get_world_name()}",
+            notify=self._runtime.wake,
+        ).attach(self._bus) if self.TRANSPORT_TOPICS else None
         self._loader: PluginLoader = PluginLoader(
             injector = PluginInjector(
                 dependencies= {
-                    Instance: self,
-                    "publish": bus.publish,
+                    Instance: PumpProxy(self, self._loop, notify=self._runtime.wake),
+                    KeyedExecutor: self._executor,
+                    ProcessOffloader: self._offloader,
+                    EventQueue: self._queue,
+                    TriggerMatcher: self._matcher,
+                    CircuitBreaker: self._breaker,
+                    ChatQueue: self._chat,
+                    "chat": self._chat,
+                    Scheduler: self._scheduler,
+                    "scheduler": self._scheduler,
+                    PluginStats: self._stats,
+                    "stats": self._stats,
+                    SharedStore: self._store,
+                    "store": self._store,
+                    "publish": self._bus.publish,
+                    "publish_async": self._bus.publish_async,
                 }
             ),
-            bus = bus,
-            finder = PluginFinder(
+            bus = self._bus,
+            finder = finder or PluginFinder(
                 plugin_path=configuration.get_plugin_path(),
             ),
         )
 
-    def main_loop(self) -> None:
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Cancels in flight async, blocking and offloaded subscribers before leaving the world,
+        then logs the latency of every plugin handler.
+        """
+        self.close()
+
+        super().__exit__(exc_type, exc_val, exc_tb)
+
+    def close(self) -> None:
+        """
+        Delivers what plugins left pending and stops the runtime, unless it is shared.
+        """
+        self._bus.flush(force=True)
+        if self._transport is not None:
+            self._transport.flush()
+            self._transport.close()
+        if self._owns_runtime:
+            self._runtime.close()
+            logger.info("Pump tick latency in microseconds: %s", self._runtime.stats.report())
+        self._chat.flush()
+        if self._recorder is not None:
+            self._recorder.close()
+        if self._store is not None:
+            self._store.close()
+        if self._stats is not None:
+            logger.info("Plugin handler latency in microseconds:\n%s", self._stats.report())
+
+    def reload(self) -> "PluginInstance":
+        """
+        Reloads the plugins.
+
+        Returns:
+            PluginInstance: The plugin instance.
+        """
         self._loader.reload()
+
+        return self
+
+    def main_loop(self) -> None:
+        self.reload()
         
-        super().main_loop(timer = 100)
+        self._loop.run_until_complete(self._pump())
+
+    def busy(self) -> bool:
+        """
+        Gets whether work is in flight, so the SDK should be polled rather than waited on.
+
+        Returns:
+            bool: True if subscribers, offloaded tasks or transported events are in flight.
+        """
+        busy = self._runtime.busy()
+        if self._transport is not None:
+            busy = busy or self._transport.pending() > 0
+
+        return busy
+
+    def timeout(self, busy: bool) -> int:
+        """
+        Gets how long the SDK may be waited on before queued work is due.
+        While idle the wait doubles every tick from TIMER up to MAX_TIMER, as the wakeup ends it early anyway.
+
+        Args:
+            busy (bool): Whether work is in flight.
+
+        Returns:
+            int: The wait in milliseconds.
+        """
+        timer = 0 if busy or self._queue else self._timer
+        dues = [
+            due for due in (self._bus.next_flush(), self._chat.next_flush(), self._scheduler.next_due())
+            if due is not None
+        ]
+
+        return min([timer] + [int(due * 1000) for due in dues])
+
+    def service(self) -> int:
+        """
+        Dispatches queued events in a bounded batch, fires due timers, then flushes batches,
+        transported events and chat. Idle work gets what remains of the tick once no events wait.
+        A tick that did nothing but idle work lengthens the next idle wait, and any other brings it back to TIMER.
+
+        Returns:
+            int: The number of events, timers, frames and lines handled.
+        """
+        handled = self._bus.drain(self.DRAIN_LIMIT)
+        handled += self._scheduler.advance()
+        handled += self._bus.flush()
+        if self._transport is not None:
+            handled += self._transport.poll(self.DRAIN_LIMIT)
+            handled += self._transport.flush()
+        handled += self._chat.flush()
+        if not self._queue:
+            self._scheduler.run_idle(self.IDLE_BUDGET)
+
+        self._timer = self.TIMER if handled else min(self._timer * 2, self.MAX_TIMER)
+        return handled
+
+    async def _pump(self) -> None:
+        """
+        Waits on the SDK from inside the event loop, so async subscribers share the SDK thread.
+        Queued events are dispatched in bounded batches between waits, chat ahead of everything else,
+        and waits are cut short when a plugin's batch window is about to close, queued chat can be sent
+        or a timer is due. Events arriving from the SDK, chat said from other threads, offloaded results
+        and frames from other bot processes wake the pump within a slice of the wait.
+        While subscribers or offloaded tasks are in flight the SDK is polled rather than waited on,
+        which leaves the loop free to service their I/O.
+        Events from other bot processes are published, and events for them written, on every tick.
+        """
+        while True:
+            busy = self.busy()
+            waited, woken = self._runtime.wait(self.timeout(busy))
+            started = perf_counter_ns()
+            self.service()
+            self._runtime.stats.record(waited, perf_counter_ns() - started, woken)
+            await sleep(self.BUSY_TIMER / 1000 if busy else 0)
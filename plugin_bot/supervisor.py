@@ -0,0 +1,339 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import sleep
+from contextlib import ExitStack
+from logging import getLogger
+from multiprocessing import get_context
+from time import perf_counter_ns
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
+
+from korth_spirit import EventEnum, Instance
+from korth_spirit.configuration import Configuration, JsonConfiguration
+from korth_spirit.events import EventBus
+from korth_spirit.sdk import (AW_CALLBACK, CallBackEnum, aw_callback_set,
+                              aw_event_set, aw_instance)
+
+from .plugin import SharedFinder
+from .plugin_instance import PluginInstance, Runtime
+
+logger = getLogger(__name__)
+
+
+def _address(pointer: Any) -> Optional[int]:
+    """
+    Gets the address of an SDK instance handle, which aw_create gives as a pointer and aw_instance as an int.
+
+    Args:
+        pointer (Any): The handle.
+
+    Returns:
+        Optional[int]: The address.
+    """
+    return getattr(pointer, "value", pointer)
+
+
+class DictConfiguration(JsonConfiguration):
+    """
+    Configuration of one world out of a list of them.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Stores the configuration values.
+
+        Args:
+            config (Dict[str, Any]): The values, keyed like a configuration file.
+        """
+        self._config: dict = config
+
+
+class EventRouter:
+    """
+    Owns the SDK handler of each event for every bot in the process.
+    The SDK keeps one handler per event for the whole process, so an event is handed to the bus
+    of the bot the SDK made current for it, rather than to whichever bot hooked the event last.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the event router.
+        """
+        self._refs: Dict[Union[EventEnum, CallBackEnum], Any] = {}
+        self._buses: Dict[Optional[int], EventBus] = {}
+
+    def add(self, instance: Instance) -> "EventRouter":
+        """
+        Route the events of an instance that has been created to its bus.
+
+        Args:
+            instance (Instance): The instance.
+
+        Returns:
+            EventRouter: The event router.
+        """
+        self._buses[_address(instance._instance)] = instance.bus
+
+        return self
+
+    def remove(self, instance: Instance) -> "EventRouter":
+        """
+        Stop routing the events of an instance.
+
+        Args:
+            instance (Instance): The instance.
+
+        Returns:
+            EventRouter: The event router.
+        """
+        self._buses.pop(_address(instance._instance), None)
+
+        return self
+
+    def hook(self, event: Union[EventEnum, CallBackEnum, str]) -> "EventRouter":
+        """
+        Set the SDK handler of an event, once for every bot.
+
+        Args:
+            event (Union[EventEnum, CallBackEnum, str]): The event.
+
+        Returns:
+            EventRouter: The event router.
+        """
+        if event in self._refs:
+            return self
+
+        @AW_CALLBACK
+        def mini_pub() -> None:
+            self.route(event, aw_instance())
+
+        self._refs[event] = mini_pub
+        if type(event) is EventEnum:
+            aw_event_set(event, mini_pub)
+        elif type(event) is CallBackEnum:
+            aw_callback_set(event, mini_pub)
+
+        return self
+
+    def route(self, event: Union[EventEnum, CallBackEnum, str], instance: Any) -> bool:
+        """
+        Publish an event to the bus of the instance it arrived for.
+
+        Args:
+            event (Union[EventEnum, CallBackEnum, str]): The event.
+            instance (Any): The handle of the instance.
+
+        Returns:
+            bool: False if no bot is routed for the instance.
+        """
+        bus = self._buses.get(_address(instance))
+        if bus is None:
+            return False
+
+        bus.publish(event)
+        return True
+
+    def close(self) -> None:
+        """
+        Remove every SDK handler.
+        """
+        for event in self._refs:
+            if type(event) is EventEnum:
+                aw_event_set(event, None)
+            elif type(event) is CallBackEnum:
+                aw_callback_set(event, None)
+
+        self._refs = {}
+        self._buses = {}
+
+
+class RoutedEventBus(EventBus):
+    """
+    Instance bus of one bot among many, which leaves the SDK handlers to an event router.
+    """
+
+    def __init__(self, router: EventRouter):
+        """
+        Initialize the routed event bus.
+
+        Args:
+            router (EventRouter): The router that owns the SDK handlers.
+        """
+        super().__init__()
+        self._router = router
+
+    def _hook_aw_event(self, event: Union[EventEnum, CallBackEnum]) -> None:
+        """
+        Have the router hook the event, which it does once however many bots listen to it.
+
+        Args:
+            event (Union[EventEnum, CallBackEnum]): The event.
+        """
+        self._router.hook(event)
+
+    def unsubscribe_all(self) -> "RoutedEventBus":
+        """
+        Unsubscribe from all events, leaving the SDK handlers to the other bots.
+
+        Returns:
+            RoutedEventBus: The event bus.
+        """
+        self._refs = {}
+        self._subscribers = {}
+
+        return self
+
+
+class Supervisor:
+    """
+    Hosts a bot for each of many worlds in one process.
+    Plugin modules are imported and their signatures inspected once, while every world gets its own plugin
+    instances, buses and queues. The worlds share one event loop, worker pool and SDK wait.
+    """
+    BUSY_TIMER: int = PluginInstance.BUSY_TIMER
+
+    def __init__(self, configurations: Iterable[Configuration], world: Type[PluginInstance] = PluginInstance):
+        """
+        Initialize the supervisor.
+
+        Args:
+            configurations (Iterable[Configuration]): The configuration of each world.
+            world (Type[PluginInstance], optional): The bot class. Defaults to PluginInstance.
+        """
+        self._runtime: Runtime = Runtime()
+        self._router: EventRouter = EventRouter()
+        self._finders: Dict[str, SharedFinder] = {}
+        self._worlds: List[PluginInstance] = []
+        self._stack: ExitStack = ExitStack()
+
+        for configuration in configurations:
+            path = configuration.get_plugin_path()
+            finder = self._finders.setdefault(path, SharedFinder(plugin_path=path))
+            bot = world(configuration, runtime=self._runtime, finder=finder)
+            bot.bus = RoutedEventBus(self._router)
+            self._worlds.append(bot)
+
+    def __enter__(self) -> "Supervisor":
+        """
+        Enters every world.
+
+        Returns:
+            Supervisor: The supervisor.
+        """
+        try:
+            with ExitStack() as stack:
+                for bot in self._worlds:
+                    self._router.add(stack.enter_context(bot))
+                self._stack = stack.pop_all()
+        except BaseException:
+            self._router.close()
+            self._runtime.close()
+            raise
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Leaves every world, then stops the shared runtime.
+        """
+        try:
+            self._stack.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            self._router.close()
+            self._runtime.close()
+            logger.info("Pump tick latency in microseconds: %s", self._runtime.stats.report())
+
+    def worlds(self) -> List[PluginInstance]:
+        """
+        Get the bot of every world.
+
+        Returns:
+            List[PluginInstance]: The bots, in configuration order.
+        """
+        return self._worlds
+
+    def reload(self) -> "Supervisor":
+        """
+        Reimport the plugins, then reload them in every world.
+
+        Returns:
+            Supervisor: The supervisor.
+        """
+        for finder in self._finders.values():
+            finder.refresh()
+        for bot in self._worlds:
+            bot.reload()
+
+        return self
+
+    def main_loop(self) -> None:
+        self.reload()
+
+        self._runtime.loop.run_until_complete(self._pump())
+
+    async def _pump(self) -> None:
+        """
+        Waits on the SDK once for every world, for as long as the world with the soonest work allows,
+        then services each world in turn. Any world's wakeup ends the wait for all of them.
+        """
+        while True:
+            busy = any(bot.busy() for bot in self._worlds)
+            waited, woken = self._runtime.wait(
+                min([bot.timeout(busy) for bot in self._worlds], default=PluginInstance.TIMER)
+            )
+            started = perf_counter_ns()
+            for bot in self._worlds:
+                bot.service()
+            self._runtime.stats.record(waited, perf_counter_ns() - started, woken)
+            await sleep(self.BUSY_TIMER / 1000 if busy else 0)
+
+
+def _serve(worlds: List[Dict[str, Any]]) -> None:
+    """
+    Run a supervisor for some of the worlds.
+
+    Args:
+        worlds (List[Dict[str, Any]]): The configuration of each world.
+    """
+    with Supervisor(DictConfiguration(world) for world in worlds) as supervisor:
+        supervisor.main_loop()
+
+
+def supervise(worlds: List[Dict[str, Any]], workers: int = 1) -> None:
+    """
+    Host many worlds, in this process or split across worker processes.
+
+    Args:
+        worlds (List[Dict[str, Any]]): The configuration of each world, keyed like a configuration file.
+        workers (int, optional): The number of processes to split the worlds between. Defaults to 1.
+    """
+    if workers <= 1:
+        _serve(worlds)
+        return
+
+    context = get_context("spawn")
+    processes = [
+        context.Process(target=_serve, args=(worlds[worker::workers],), name=f"plugin-bot-{worker}")
+        for worker in range(min(workers, len(worlds)))
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
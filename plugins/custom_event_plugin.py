@@ -19,6 +19,9 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from korth_spirit import Instance
+from plugin_bot.plugin import ChatQueue
+
+from plugins.version_plugin import VersionRequested
 
 
 class CustomEventPlugin:
@@ -32,18 +35,19 @@ class CustomEventPlugin:
         """
         return 'version_requested'
 
-    def __init__(self, instance: Instance) -> None:
+    def __init__(self, instance: Instance, chat: ChatQueue) -> None:
         """
         Initialize the plugin.
         """
         self.instance = instance
+        self.chat = chat
     
-    def handle_event(self) -> None:
+    def handle_event(self, event: VersionRequested) -> None:
         """
         Handle the event.
 
         Args:
-            event (Event): The event.
+            event (VersionRequested): The event.
         """
-        self.instance.say(f"I am a creation of Johnathan Irvin [https://johnathanirvin.com]!")
-        self.instance.say(f"The most up to date version of plugin bot is on github [https://github.com/Korth-Spirit/Plugin-Bot]!")
+        self.chat.say(f"I am a creation of Johnathan Irvin [https://johnathanirvin.com]!")
+        self.chat.say(f"The most up to date version of plugin bot is on github [https://github.com/Korth-Spirit/Plugin-Bot]!")
@@ -20,6 +20,7 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from korth_spirit import EventEnum, Instance
 from korth_spirit.events import Event
+from plugin_bot.plugin import ChatQueue
 
 
 class GreeterPlugin:
@@ -33,11 +34,12 @@ class GreeterPlugin:
         """
         return EventEnum.AW_EVENT_AVATAR_ADD
 
-    def __init__(self, instance: Instance) -> None:
+    def __init__(self, instance: Instance, chat: ChatQueue) -> None:
         """
         Initialize the plugin.
         """
         self.instance = instance
+        self.chat = chat
     
     def handle_event(self, event: Event) -> None:
         """
@@ -46,4 +48,4 @@ class GreeterPlugin:
         Args:
             event (Event): The event.
         """
-        self.instance.say(f"Welcome, {event.avatar_name}!")
+        self.chat.say(f"Welcome, {event.avatar_name}!")
@@ -18,8 +18,23 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-from korth_spirit import EventEnum, Instance
+from typing import List
+
+from korth_spirit import Instance
 from korth_spirit.events import Event
+from plugin_bot.plugin import ChatQueue, Trigger
+
+GREETINGS = (
+    "hello",
+    "hi",
+    "hey",
+    "greetings",
+    "salutations",
+    "bonjour",
+    "hola",
+    "bonsoir",
+    "guten tag",
+)
 
 
 class SalutationPlugin:
@@ -27,17 +42,21 @@ class SalutationPlugin:
     Greeter plugin.
     """
     @property
-    def on_event(self) -> EventEnum:
+    def on_trigger(self) -> List[Trigger]:
         """
-        Event to listen for.
+        Greetings addressed to the bot, at the start of a chat line.
         """
-        return EventEnum.AW_EVENT_CHAT
+        return [
+            Trigger(f"{greet} {self.instance.name}", anchored=True)
+            for greet in GREETINGS
+        ]
 
-    def __init__(self, instance: Instance) -> None:
+    def __init__(self, instance: Instance, chat: ChatQueue) -> None:
         """
         Initialize the plugin.
         """
         self.instance = instance
+        self.chat = chat
     
     def handle_event(self, event: Event) -> None:
         """
@@ -46,23 +65,4 @@ class SalutationPlugin:
         Args:
             event (Event): The event.
         """
-        greetings = [
-            "hello",
-            "hi",
-            "hey",
-            "greetings",
-            "salutations",
-            "bonjour",
-            "hola",
-            "bonsoir",
-            "guten tag",
-        ]
-
-        if not any(
-            event.chat_message.lower().startswith(f'{greet} {self.instance.name.lower()}')
-            for greet in greetings
-        ):
-            return
-
-        self.instance.say(f"Hello, {event.avatar_name}!")
-
+        self.chat.say(f"Hello, {event.avatar_name}!")
@@ -20,8 +20,17 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from typing import Callable
 
-from korth_spirit import EventEnum, Instance
+from korth_spirit import Instance
 from korth_spirit.events import Event
+from plugin_bot.plugin import custom_event
+
+
+@custom_event("version_requested")
+class VersionRequested:
+    """
+    Published when someone asks for the version of the bot.
+    """
+    avatar_name: str
 
 
 class VersionPlugin:
@@ -29,11 +38,11 @@ class VersionPlugin:
     This plugin triggers a custom event.
     """
     @property
-    def on_event(self) -> EventEnum:
+    def on_command(self) -> str:
         """
-        Event to listen for.
+        Command to answer.
         """
-        return EventEnum.AW_EVENT_CHAT
+        return "version"
 
     def __init__(self, instance: Instance) -> None:
         """
@@ -48,8 +57,5 @@ class VersionPlugin:
         Args:
             event (Event): The event.
         """
-        chat_message = event.chat_message.lower()
-
-        if chat_message == "!version":
-            publish('version_requested')
+        publish(VersionRequested(avatar_name=event.avatar_name))
         
\ No newline at end of file
@@ -19,13 +19,64 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from argparse import ArgumentParser
+from sys import exit
+
 import pytest
-from coverage import coverage
+
+
+def bench(threshold: float, update: bool) -> int:
+    """
+    Run the benchmark suite against the stored baseline, and the chat latency against its limit.
+
+    Args:
+        threshold (float): How many times slower than the baseline a metric may get.
+        update (bool): Whether to store the results as the new baseline instead of comparing.
+
+    Returns:
+        int: The exit code, 1 if any metric regressed.
+    """
+    from benchmarks.suite import (CHAT_LATENCY_LIMIT, bench_chat_latency,
+                                  compare, load_baseline, run, save_baseline)
+
+    results = run()
+    if update:
+        save_baseline(results)
+        print(f"Stored {len(results)} metrics as the baseline.")
+        return 0
+
+    baseline = load_baseline()
+    if not baseline:
+        print("No baseline stored, run with --bench --update-baseline first.")
+        return 1
+
+    regressions = compare(results, baseline, threshold)
+    latency = bench_chat_latency()
+    if latency > CHAT_LATENCY_LIMIT:
+        regressions.append(f"p99 chat latency {latency * 1000:.1f}ms over the limit of {CHAT_LATENCY_LIMIT * 1000:.0f}ms")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(results) + 1 - len(regressions)} of {len(results) + 1} metrics within {threshold}x of the baseline "
+          f"or their limit.")
+
+    return 1 if regressions else 0
+
 
 if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--bench', action='store_true', help='run the benchmarks instead of the tests')
+    parser.add_argument('--threshold', type=float, default=1.5, help='slowdown against the baseline that fails --bench')
+    parser.add_argument('--update-baseline', action='store_true', help='store the --bench results as the baseline')
+    arguments = parser.parse_args()
+
+    if arguments.bench:
+        exit(bench(arguments.threshold, arguments.update_baseline))
+
+    from coverage import coverage
+
     cov = coverage(branch=True, omit=['test_*.py'])
     cov.start()
     pytest.main()
     print(cov.report())
     cov.html_report()
-    cov.stop()
\ No newline at end of file
+    cov.stop()
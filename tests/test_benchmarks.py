@@ -0,0 +1,60 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from benchmarks.suite import (calibrate, compare, load_baseline,
+                              save_baseline, typical)
+
+
+def test_compare_flags_regressions() -> None:
+    """
+    Test that only metrics slower than the threshold allows are reported.
+    """
+    baseline = {'reload.10': 0.01, 'publish.AW_EVENT_CHAT.1': 1e-6, 'injector.overhead': 1e-6}
+    results = {
+        'reload.10': 0.1,
+        'publish.AW_EVENT_CHAT.1': 1.4e-6,
+        'injector.overhead': 1e-5,
+        'reload.100': 1.0,
+    }
+
+    regressions = compare(results, baseline, threshold=1.5)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith('reload.10:')
+    assert '10.00x' in regressions[0]
+
+def test_metrics_are_in_calibration_loops() -> None:
+    """
+    Test that timing the calibration loop itself comes out at about one loop per call.
+    """
+    assert 0.5 < typical(calibrate, rounds=3) < 2
+
+def test_baseline_round_trip(tmp_path) -> None:
+    """
+    Test that a stored baseline loads back, and a missing one loads empty.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    filename = str(tmp_path / 'baseline.json')
+    assert load_baseline(filename) == {}
+
+    save_baseline({'reload.10': 0.01}, filename)
+    assert load_baseline(filename) == {'reload.10': 0.01}
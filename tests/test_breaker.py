@@ -0,0 +1,196 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import new_event_loop
+from threading import Barrier, Thread
+from unittest.mock import Mock
+
+from plugin_bot.plugin import BreakerState, CircuitBreaker, PluginBus
+from pytest import fixture
+
+
+class BrokenPlugin:
+    """
+    A fake plugin that fails until it is fixed.
+    """
+    on_event = 'version_requested'
+
+    def __init__(self) -> None:
+        """
+        Constructs the class.
+        """
+        self.broken = True
+        self.calls = 0
+
+    def handle_event(self, event: object) -> None:
+        """
+        Fails on the event while broken.
+
+        Args:
+            event (object): The event.
+        """
+        self.calls += 1
+        if self.broken:
+            raise RuntimeError('broken')
+
+@fixture
+def breaker() -> CircuitBreaker:
+    """
+    The fixture for a circuit breaker that opens after three failures.
+
+    Returns:
+        CircuitBreaker: The circuit breaker.
+    """
+    return CircuitBreaker(threshold=3, window=60, cooldown=60)
+
+def test_failure_does_not_stop_other_subscribers(caplog) -> None:
+    """
+    Test that a raising subscriber is logged and the rest still receive the event.
+
+    Args:
+        caplog (LogCaptureFixture): The captured logs.
+    """
+    plugin_bus = PluginBus(Mock())
+    after = Mock()
+    plugin_bus.register_plugin(BrokenPlugin())
+    plugin_bus.subscribe('version_requested', after)
+
+    plugin_bus.publish('version_requested', 'event')
+
+    after.assert_called_once_with('event')
+    assert 'RuntimeError: broken' in caplog.text
+
+def test_breaker_opens_after_threshold(breaker: CircuitBreaker, caplog) -> None:
+    """
+    Test that a plugin failing too often is skipped without being called or logged.
+
+    Args:
+        breaker (CircuitBreaker): The circuit breaker.
+        caplog (LogCaptureFixture): The captured logs.
+    """
+    plugin = BrokenPlugin()
+    plugin_bus = PluginBus(Mock(), middleware=[breaker]).register_plugin(plugin)
+
+    for _ in range(10):
+        plugin_bus.publish('version_requested', 'event')
+
+    assert plugin.calls == 3
+    assert breaker.states() == {'BrokenPlugin': BreakerState.OPEN}
+    assert caplog.text.count('Traceback') == 3
+
+def test_breaker_probes_after_cooldown(breaker: CircuitBreaker) -> None:
+    """
+    Test that one call probes an open breaker after the cooldown, reopening or closing it.
+
+    Args:
+        breaker (CircuitBreaker): The circuit breaker.
+    """
+    plugin = BrokenPlugin()
+    guarded = breaker.guard(plugin.handle_event, plugin, 'BrokenPlugin')
+    for _ in range(3):
+        guarded('event')
+
+    guarded.circuit.retry_at = 0
+    guarded('event')
+    assert plugin.calls == 4
+    assert guarded.circuit.state is BreakerState.OPEN
+
+    guarded('event')
+    assert plugin.calls == 4
+
+    plugin.broken = False
+    guarded.circuit.retry_at = 0
+    guarded('event')
+    guarded('event')
+    assert plugin.calls == 6
+    assert guarded.circuit.state is BreakerState.CLOSED
+
+def test_breaker_guards_async_subscribers(breaker: CircuitBreaker) -> None:
+    """
+    Test that an async subscriber stays a coroutine function and its failures are counted.
+
+    Args:
+        breaker (CircuitBreaker): The circuit breaker.
+    """
+    calls = []
+
+    async def handle_event(event: object) -> None:
+        calls.append(event)
+        raise RuntimeError('broken')
+
+    guarded = breaker.guard(handle_event, handle_event, 'AsyncPlugin')
+    loop = new_event_loop()
+    try:
+        for _ in range(5):
+            assert loop.run_until_complete(guarded('event')) is None
+    finally:
+        loop.close()
+
+    assert len(calls) == 3
+    assert breaker.states() == {'AsyncPlugin': BreakerState.OPEN}
+
+def test_breaker_is_shared_by_the_handlers_of_a_plugin(breaker: CircuitBreaker) -> None:
+    """
+    Test that failures on one event open the breaker for every event of the plugin,
+    and that unregistering the plugin forgets its breaker.
+
+    Args:
+        breaker (CircuitBreaker): The circuit breaker.
+    """
+    class MappedPlugin(BrokenPlugin):
+        on_event = {'version_requested': 'handle_event', 'about_requested': 'about'}
+        about = Mock()
+
+    plugin = MappedPlugin()
+    plugin_bus = PluginBus(Mock(), middleware=[breaker]).register_plugin(plugin)
+
+    for _ in range(3):
+        plugin_bus.publish('version_requested', 'event')
+    plugin_bus.publish('about_requested', 'event')
+
+    assert not plugin.about.called
+    assert breaker.states() == {'MappedPlugin': BreakerState.OPEN}
+
+    plugin_bus.unregister_plugin(plugin)
+    assert breaker.states() == {}
+
+def test_breaker_lets_one_probe_through_across_threads() -> None:
+    """
+    Test that blocking handlers racing on executor threads let exactly one probe through a cooled down breaker.
+    """
+    breaker = CircuitBreaker(threshold=3, window=60, cooldown=0)
+    circuit = breaker.guard(Mock(side_effect=RuntimeError('broken')), 'owner', 'BrokenPlugin').circuit
+    for _ in range(3):
+        circuit.failed(RuntimeError('broken'))
+    barrier = Barrier(16)
+    allowed = []
+
+    def probe() -> None:
+        barrier.wait()
+        allowed.append(circuit.allows())
+
+    threads = [Thread(target=probe) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert allowed.count(True) == 1
+    assert circuit.state is BreakerState.HALF_OPEN
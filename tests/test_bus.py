@@ -18,11 +18,16 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-from typing import Any
+from asyncio import new_event_loop, sleep
+from functools import partial
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, List
 from unittest.mock import Mock
 
 from korth_spirit import EventEnum
-from plugin_bot.plugin import PluginBus
+from plugin_bot.plugin import CONSUMED, Equals, EventQueue, PluginBus, PluginStats
+from plugin_bot.plugin.bus import RESOLVED_LIMIT
 from pytest import fixture
 
 
@@ -126,9 +131,9 @@ def test_register_plugins(plugin_bus: PluginBus, generic_plugin: FakePlugin, aw_
         [generic_plugin, aw_plugin],
     )
 
-    assert len(plugin_bus._subscribers) == 1
-    assert plugin_bus._subscribers == {"generic": [generic_plugin.handle_event]}
-    assert plugin_bus.instance.subscribe.called_once
+    assert len(plugin_bus._subscribers) == 2
+    assert plugin_bus._subscribers["generic"] == [generic_plugin.handle_event]
+    assert plugin_bus.instance.bus.subscribe.call_count == 1
 
 def test_unregister_plugin(plugin_bus: PluginBus) -> None:
     """
@@ -168,7 +173,7 @@ def test_register_aw_plugin(plugin_bus: PluginBus) -> None:
         handle_event=Mock(),
     ))
 
-    assert plugin_bus.instance.subscribe.called
+    assert plugin_bus.instance.bus.subscribe.called
 
 def test_unregister_aw_plugin(plugin_bus: PluginBus) -> None:
     """
@@ -177,9 +182,574 @@ def test_unregister_aw_plugin(plugin_bus: PluginBus) -> None:
     Args:
         plugin_bus (PluginBus): The plugin bus.
     """
-    plugin_bus.unregister_plugin(Mock(
+    plugin = Mock(
         on_event=EventEnum.AW_EVENT_AVATAR_ADD,
         handle_event=Mock(),
-    ))
+    )
+    plugin_bus.register_plugin(plugin)
+
+    plugin_bus.unregister_plugin(plugin)
+
+    assert plugin_bus.instance.bus.unsubscribe.called
+    assert plugin_bus._relays == {}
+
+def test_aw_event_is_relayed(plugin_bus: PluginBus, aw_plugin: FakePlugin) -> None:
+    """
+    Test that an Active Worlds event reaches the plugin through one relay.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+        aw_plugin (FakePlugin): The aw plugin.
+    """
+    second = FakePlugin(EventEnum.AW_EVENT_AVATAR_ADD)
+    second.handle_event = Mock()
+    plugin_bus.register_plugins([aw_plugin, second])
+
+    relay = plugin_bus.instance.bus.subscribe.call_args.kwargs['subscriber']
+    relay('event')
+
+    assert plugin_bus.instance.bus.subscribe.call_count == 1
+    second.handle_event.assert_called_once_with('event')
+
+def test_unregister_plugins_only_removes_given_plugins(plugin_bus: PluginBus, generic_plugin: FakePlugin, aw_plugin: FakePlugin) -> None:
+    """
+    Test that unregistering plugins leaves other subscriptions alone.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+        generic_plugin (FakePlugin): The generic plugin.
+        aw_plugin (FakePlugin): The aw plugin.
+    """
+    other = FakePlugin('generic')
+    plugin_bus.register_plugins([generic_plugin, aw_plugin, other])
+
+    plugin_bus.unregister_plugins([generic_plugin, aw_plugin])
+
+    assert plugin_bus._subscribers == {"generic": [other.handle_event]}
+    assert plugin_bus.has_subscriber("generic", other.handle_event)
+    assert not plugin_bus.has_subscriber("generic", generic_plugin.handle_event)
+    assert plugin_bus.instance.bus.unsubscribe.call_count == 1
+    assert not plugin_bus.instance.bus.unsubscribe_all.called
+
+def test_publish_calls_subscribers(plugin_bus: PluginBus) -> None:
+    """
+    Test that publish calls every subscriber with the arguments.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    first, second = Mock(), Mock()
+    plugin_bus.subscribe('generic', first).subscribe('generic', second)
+
+    plugin_bus.publish('generic', 1, key='value')
+
+    first.assert_called_once_with(1, key='value')
+    second.assert_called_once_with(1, key='value')
+
+def test_publish_with_equal_key(plugin_bus: PluginBus) -> None:
+    """
+    Test that publish finds subscribers for an equal but not identical key.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    subscriber = Mock()
+    plugin_bus.subscribe('generic', subscriber)
+
+    plugin_bus.publish(''.join(['gen', 'eric']))
+
+    assert subscriber.called
+
+def test_subscribe_during_publish(plugin_bus: PluginBus) -> None:
+    """
+    Test that a subscriber added during dispatch only sees later events.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    late = Mock()
+    plugin_bus.subscribe('generic', lambda: plugin_bus.subscribe('generic', late))
+
+    plugin_bus.publish('generic')
+    assert not late.called
+
+    plugin_bus.publish('generic')
+    assert late.called
+
+def test_unsubscribe_last_subscriber(plugin_bus: PluginBus) -> None:
+    """
+    Test that removing the last subscriber removes the dispatch entry.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    subscriber = Mock()
+    plugin_bus.subscribe(EventEnum.AW_EVENT_CHAT, subscriber)
+    plugin_bus.unsubscribe(EventEnum.AW_EVENT_CHAT, subscriber)
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT)
+
+    assert not subscriber.called
+    assert plugin_bus._dispatch == {}
+    assert plugin_bus._keys == {}
+
+def test_publish_schedules_async_subscriber(plugin_bus: PluginBus) -> None:
+    """
+    Test that publish schedules an async subscriber on the bus loop.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    received = []
+
+    async def subscriber(value: Any) -> None:
+        received.append(value)
+
+    plugin_bus.subscribe('generic', subscriber)
+    plugin_bus.publish('generic', 1)
+
+    plugin_bus.loop.run_until_complete(sleep(0))
+    plugin_bus.loop.close()
+
+    assert received == [1]
+
+def test_publish_async_runs_subscribers_concurrently(plugin_bus: PluginBus) -> None:
+    """
+    Test that publish async awaits async subscribers together.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    started = []
+
+    async def subscriber() -> None:
+        started.append(True)
+        await sleep(0.05)
+
+    for _ in range(10):
+        plugin_bus.subscribe('generic', partial(subscriber))
+    sync_subscriber = Mock()
+    plugin_bus.subscribe('generic', sync_subscriber)
+
+    loop = new_event_loop()
+    began = perf_counter()
+    loop.run_until_complete(plugin_bus.publish_async('generic'))
+    loop.close()
+
+    assert len(started) == 10
+    assert sync_subscriber.called
+    assert perf_counter() - began < 0.5
+
+def test_blocking_plugin_runs_on_executor(plugin_bus: PluginBus) -> None:
+    """
+    Test that a blocking plugin is dispatched through the executor with its ordering key.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakePlugin('generic')
+    plugin.blocking = True
+    plugin.ordering_key = lambda event: event
+    plugin_bus._executor = Mock()
+
+    plugin_bus.register_plugin(plugin)
+    plugin_bus.publish('generic', 'session')
+
+    plugin_bus.executor.submit.assert_called_once_with('session', plugin.handle_event, 'session')
+
+def test_aw_event_is_queued_until_drained(aw_plugin: FakePlugin) -> None:
+    """
+    Test that with a queue, relayed events wait for drain.
+
+    Args:
+        aw_plugin (FakePlugin): The aw plugin.
+    """
+    plugin_bus = PluginBus(Mock(), queue=EventQueue())
+    aw_plugin.handle_event = Mock()
+    plugin_bus.register_plugin(aw_plugin)
+
+    relay = plugin_bus.instance.bus.subscribe.call_args.kwargs['subscriber']
+    relay('event')
+    assert not aw_plugin.handle_event.called
+
+    assert plugin_bus.drain() == 1
+    aw_plugin.handle_event.assert_called_once_with('event')
+
+class FakeBatchPlugin(FakePlugin):
+    """
+    A fake plugin that takes its events in batches.
+    """
+    batch_size = 3
+    batch_window = 60
+
+    def handle_events(self, events: List[Any]) -> None:
+        """
+        Handles a batch of events.
+
+        Args:
+            events (List[Any]): The events.
+        """
+        self.batches.append(events)
+
+def test_batch_plugin_flushes_when_full(plugin_bus: PluginBus) -> None:
+    """
+    Test that a batch plugin receives its events once the batch is full.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakeBatchPlugin('generic')
+    plugin.batches = []
+    plugin_bus.register_plugin(plugin)
+
+    for number in range(4):
+        plugin_bus.publish('generic', number)
+
+    assert plugin.batches == [[0, 1, 2]]
+    assert 0 < plugin_bus.next_flush() <= 60
+
+def test_batch_plugin_flushes_on_window(plugin_bus: PluginBus) -> None:
+    """
+    Test that a pending batch is delivered once its window has elapsed, and not before.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakeBatchPlugin('generic')
+    plugin.batches = []
+    plugin.batch_window = 0
+    plugin_bus.register_plugin(plugin)
+    plugin_bus.publish('generic', 'a', 'b')
+
+    assert plugin_bus.flush() == 1
+    assert plugin.batches == [[('a', 'b')]]
+    assert plugin_bus.next_flush() is None
+
+def test_batch_plugin_keeps_keyword_arguments(plugin_bus: PluginBus) -> None:
+    """
+    Test that events published with keyword arguments are batched with them.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakeBatchPlugin('generic')
+    plugin.batches = []
+    plugin.batch_window = 0
+    plugin_bus.register_plugin(plugin)
+    plugin_bus.publish('generic', 'Bob', reason='spam').publish('generic', reason='flood')
+
+    assert plugin_bus.flush() == 2
+    assert plugin.batches == [[(('Bob',), {'reason': 'spam'}), ((), {'reason': 'flood'})]]
+
+def test_unregister_batch_plugin_delivers_pending(plugin_bus: PluginBus) -> None:
+    """
+    Test that unregistering a batch plugin delivers what it was holding.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakeBatchPlugin('generic')
+    plugin.batches = []
+    plugin_bus.register_plugin(plugin)
+    plugin_bus.publish('generic', 1)
+
+    plugin_bus.unregister_plugins([plugin])
+
+    assert plugin.batches == [[1]]
+    assert plugin_bus._batches == set()
+
+def test_filtered_plugin_only_receives_matching_events(plugin_bus: PluginBus) -> None:
+    """
+    Test that a plugin declaring predicates is never called for other events.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakePlugin(EventEnum.AW_EVENT_CHAT)
+    plugin.where = {'chat_message': Equals('!version', ignore_case=True)}
+    plugin.handle_event = Mock()
+    plugin_bus.register_plugin(plugin)
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='hello'))
+    assert not plugin.handle_event.called
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='!VERSION'))
+    assert plugin.handle_event.called
+
+    plugin_bus.unregister_plugins([plugin])
+    assert plugin_bus._where == {}
+
+def test_command_plugin_is_routed(plugin_bus: PluginBus) -> None:
+    """
+    Test that a command plugin is reached through the router and released with it.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = Mock(spec=['on_command', 'handle_event'], on_command='version')
+    plugin_bus.register_plugin(plugin)
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='hello'))
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='!version'))
+
+    assert plugin.handle_event.call_count == 1
+
+    plugin_bus.unregister_plugins([plugin])
+
+    assert plugin_bus._subscribers == {}
+
+def test_priority_orders_subscribers(plugin_bus: PluginBus) -> None:
+    """
+    Test that higher priorities run first and ties keep registration order.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    calls = []
+    plugin_bus.subscribe('generic', lambda: calls.append('low'), priority=-1)
+    plugin_bus.subscribe('generic', lambda: calls.append('first'))
+    plugin_bus.subscribe('generic', lambda: calls.append('high'), priority=5)
+    plugin_bus.subscribe('generic', lambda: calls.append('second'))
+
+    plugin_bus.publish('generic')
+
+    assert calls == ['high', 'first', 'second', 'low']
+
+def test_consumed_event_skips_lower_priorities(plugin_bus: PluginBus) -> None:
+    """
+    Test that a moderation plugin consuming a chat line stops the plugins after it.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    moderation = FakePlugin(EventEnum.AW_EVENT_CHAT)
+    moderation.priority = 10
+    moderation.where = {'chat_message': Equals('buy gold')}
+    moderation.handle_event = Mock(return_value=CONSUMED)
+    chat = FakePlugin(EventEnum.AW_EVENT_CHAT)
+    chat.handle_event = Mock()
+    plugin_bus.register_plugins([chat, moderation])
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='buy gold'))
+    assert moderation.handle_event.called
+    assert not chat.handle_event.called
+
+    plugin_bus.publish(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='hello'))
+    assert chat.handle_event.called
+
+def test_wildcard_subscriptions(plugin_bus: PluginBus) -> None:
+    """
+    Test that wildcard patterns receive every topic under them, after the topic's own subscribers.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    calls = []
+    plugin_bus.subscribe('moderation.*', lambda: calls.append('any moderation'))
+    plugin_bus.subscribe('moderation.#', lambda: calls.append('all moderation'))
+    plugin_bus.subscribe('moderation.kick', lambda: calls.append('kick'))
+
+    plugin_bus.publish('moderation.kick')
+    assert calls == ['kick', 'any moderation', 'all moderation']
+
+    calls.clear()
+    plugin_bus.publish('moderation.kick.reason')
+    plugin_bus.publish('stats.chat')
+    assert calls == ['all moderation']
+
+def test_wildcard_resolution_is_cached(plugin_bus: PluginBus) -> None:
+    """
+    Test that a topic is resolved once and resolved again only when subscriptions change.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    audit = Mock()
+    plugin_bus.subscribe('stats.#', audit)
+    plugin_bus.publish('stats.chat.daily')
+    resolved = plugin_bus._resolved['stats.chat.daily']
+
+    plugin_bus.publish('stats.chat.daily')
+    assert plugin_bus._resolved['stats.chat.daily'] is resolved
+    assert 'stats.chat.daily' not in plugin_bus._keys
+    assert audit.call_count == 2
+
+    late = Mock()
+    plugin_bus.subscribe('stats.*.daily', late)
+    assert 'stats.chat.daily' not in plugin_bus._resolved
+
+    plugin_bus.publish('stats.chat.daily')
+    assert late.called
+
+    plugin_bus.unsubscribe('stats.#', audit).unsubscribe('stats.*.daily', late)
+    plugin_bus.publish('stats.chat.daily')
+    assert audit.call_count == 3
+    assert late.call_count == 1
+    assert not plugin_bus._patterns
+
+def test_wildcard_resolution_is_bounded(plugin_bus: PluginBus) -> None:
+    """
+    Test that topics named per session are resolved into a bounded cache, most recent kept.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    audit = Mock()
+    plugin_bus.subscribe('session.#', audit)
+    dispatch = plugin_bus._dispatch
+
+    for session in range(RESOLVED_LIMIT * 2):
+        plugin_bus.publish(f'session.{session}.joined')
+        plugin_bus.publish(f'user.{session}.joined')
+
+    assert audit.call_count == RESOLVED_LIMIT * 2
+    assert len(plugin_bus._resolved) == RESOLVED_LIMIT
+    assert f'user.{RESOLVED_LIMIT * 2 - 1}.joined' in plugin_bus._resolved
+    assert plugin_bus._dispatch is dispatch
+
+def test_wildcard_plugin_with_priority(plugin_bus: PluginBus) -> None:
+    """
+    Test that an audit plugin on a pattern can outrank the topic's own subscribers.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    audit = FakePlugin('moderation.*')
+    audit.priority = 1
+    audit.handle_event = Mock(return_value=CONSUMED)
+    kick = Mock()
+    plugin_bus.subscribe('moderation.kick', kick)
+    plugin_bus.register_plugin(audit)
+
+    plugin_bus.publish('moderation.kick', 'Bob')
+
+    audit.handle_event.assert_called_once_with('Bob')
+    assert not kick.called
+
+    plugin_bus.unregister_plugin(audit).publish('moderation.kick', 'Bob')
+    kick.assert_called_once_with('Bob')
+
+def test_stats_records_plugin_handlers() -> None:
+    """
+    Test that a bus with stats times each plugin under its module, class and event, and one without leaves handlers bare.
+    """
+    stats = PluginStats()
+    plugin = FakePlugin('version_requested')
+    PluginBus(Mock(), middleware=[stats]).register_plugin(plugin).publish('version_requested', 'event')
+
+    assert stats.get(f'{__name__}.FakePlugin', 'version_requested').calls == 1
+
+    other = type('FakePlugin', (FakePlugin,), {'__module__': 'plugins.other_plugin'})('version_requested')
+    PluginBus(Mock(), middleware=[stats]).register_plugin(other).publish('version_requested', 'event')
+    assert stats.get(f'{__name__}.FakePlugin', 'version_requested').calls == 1
+    assert stats.get('plugins.other_plugin.FakePlugin', 'version_requested').calls == 1
+
+    bare = PluginBus(Mock()).register_plugin(plugin)
+    assert bare.has_subscriber('version_requested', plugin.handle_event)
+
+class PresencePlugin:
+    """
+    A fake plugin keeping one roster across several events.
+    """
+    on_event = {
+        EventEnum.AW_EVENT_AVATAR_ADD: 'arrived',
+        EventEnum.AW_EVENT_AVATAR_DELETE: 'left',
+    }
+
+    def __init__(self) -> None:
+        """
+        Constructs the class.
+        """
+        self.roster = set()
+
+    def arrived(self, event: Any) -> None:
+        """
+        Adds the avatar to the roster.
+
+        Args:
+            event (Any): The avatar event.
+        """
+        self.roster.add(event.avatar_name)
+
+    def left(self, event: Any) -> None:
+        """
+        Removes the avatar from the roster.
+
+        Args:
+            event (Any): The avatar event.
+        """
+        self.roster.discard(event.avatar_name)
+
+def test_collection_of_events(plugin_bus: PluginBus) -> None:
+    """
+    Test that a plugin listing several events receives each of them, and unregistering removes them all.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = FakePlugin(['version_requested', EventEnum.AW_EVENT_CHAT])
+    plugin.handle_event = Mock()
+    plugin_bus.register_plugin(plugin)
+
+    plugin_bus.publish('version_requested', 'custom').publish(EventEnum.AW_EVENT_CHAT, 'chat')
+
+    assert [call.args for call in plugin.handle_event.call_args_list] == [('custom',), ('chat',)]
+    assert plugin_bus.instance.bus.subscribe.call_count == 1
+
+    plugin_bus.unregister_plugin(plugin)
+
+    assert not plugin_bus._subscribers
+    assert not plugin_bus._dispatch
+    assert plugin_bus.instance.bus.unsubscribe.call_count == 1
+
+def test_mapping_of_events_to_methods(plugin_bus: PluginBus) -> None:
+    """
+    Test that a plugin mapping events to methods keeps one state across them.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = PresencePlugin()
+    plugin_bus.register_plugin(plugin)
+
+    plugin_bus.publish(EventEnum.AW_EVENT_AVATAR_ADD, SimpleNamespace(avatar_name='Bob'))
+    plugin_bus.publish(EventEnum.AW_EVENT_AVATAR_ADD, SimpleNamespace(avatar_name='Alice'))
+    plugin_bus.publish(EventEnum.AW_EVENT_AVATAR_DELETE, SimpleNamespace(avatar_name='Bob'))
+
+    assert plugin.roster == {'Alice'}
+
+    plugin_bus.unregister_plugins([plugin])
+    assert not plugin_bus._owners
+    assert not plugin_bus._subscribers
+
+def test_middleware_wraps_handlers_in_order() -> None:
+    """
+    Test that middleware wraps each plugin handler, the first innermost, and hears of unregistered plugins.
+    """
+    calls = []
+
+    class Layer:
+        def __init__(self, name: str) -> None:
+            self.name = name
+            self.released = []
+
+        def wrap(self, handler, plugin, event):
+            def wrapped(*args, **kwargs):
+                calls.append(self.name)
+                return handler(*args, **kwargs)
+            return wrapped
+
+        def release(self, plugin) -> None:
+            self.released.append(plugin)
+
+    inner, outer = Layer('inner'), Layer('outer')
+    plugin = FakePlugin('version_requested')
+    plugin.handle_event = Mock()
+    plugin_bus = PluginBus(Mock(), middleware=[inner, outer]).register_plugin(plugin)
+
+    plugin_bus.publish('version_requested', 'event')
+    assert calls == ['outer', 'inner']
+    plugin.handle_event.assert_called_once_with('event')
 
-    assert plugin_bus.instance.unsubscribe.called
+    plugin_bus.unregister_plugin(plugin)
+    assert inner.released == outer.released == [plugin]
@@ -0,0 +1,141 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from unittest.mock import Mock
+
+from plugin_bot.plugin import ChatQueue
+from pytest import fixture
+
+
+@fixture
+def instance() -> Mock:
+    """
+    The fixture for a fake instance.
+
+    Returns:
+        Mock: The fake instance.
+    """
+    return Mock()
+
+def said(instance: Mock) -> list:
+    """
+    Get the lines said through a fake instance.
+
+    Args:
+        instance (Mock): The fake instance.
+
+    Returns:
+        list: The lines.
+    """
+    return [call.args[0] for call in instance.say.call_args_list]
+
+def test_nothing_is_sent_until_flushed(instance: Mock) -> None:
+    """
+    Test that queueing a message does not call the SDK.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    chat = ChatQueue(instance).say('Welcome, Bob!')
+
+    assert not instance.say.called
+    assert len(chat) == 1
+    assert chat.next_flush() == 0
+    assert chat.flush() == 1
+    assert said(instance) == ['Welcome, Bob!']
+    assert chat.next_flush() is None
+
+def test_messages_are_merged_up_to_the_limit(instance: Mock) -> None:
+    """
+    Test that fifty greetings queued together go out in as few lines as fit.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    chat = ChatQueue(instance, burst=20, limit=60)
+    for number in range(50):
+        chat.say(f'Welcome, Avatar{number:02}!')
+
+    chat.flush()
+
+    lines = said(instance)
+    assert all(len(line) <= 60 for line in lines)
+    assert len(lines) == 17
+    assert ' | '.join(lines).split(' | ') == [f'Welcome, Avatar{number:02}!' for number in range(50)]
+
+def test_token_bucket_limits_lines(instance: Mock) -> None:
+    """
+    Test that only a burst of lines is sent at once, and the rest as tokens are earned.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    chat = ChatQueue(instance, rate=1000, burst=2, limit=10)
+    for message in ('one', 'two', 'three'):
+        chat.say(message * 3)
+
+    assert chat.flush() == 2
+    assert 0 < chat.next_flush() <= 0.001
+
+    chat._refilled -= 1
+    assert chat.flush() == 2
+    assert said(instance) == ['oneoneone', 'twotwotwo', 'threethree', 'three']
+
+def test_whispers_are_not_merged_across_sessions(instance: Mock) -> None:
+    """
+    Test that messages only merge with the next ones to the same audience.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    chat = ChatQueue(instance)
+    chat.whisper(1, 'a').whisper(1, 'b').whisper(2, 'c').say('d')
+
+    chat.flush()
+
+    assert [call.args for call in instance.whisper.call_args_list] == [(1, 'a | b'), (2, 'c')]
+    assert said(instance) == ['d']
+
+def test_long_messages_split_between_words(instance: Mock) -> None:
+    """
+    Test that a message over the limit is split at a space.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    chat = ChatQueue(instance, limit=12)
+    chat.say('hello there general kenobi')
+
+    chat.flush()
+
+    assert said(instance) == ['hello there', 'general', 'kenobi']
+
+def test_queueing_notifies(instance: Mock) -> None:
+    """
+    Test that saying or whispering wakes whatever flushes the queue.
+
+    Args:
+        instance (Mock): The fake instance.
+    """
+    notify = Mock()
+    chat = ChatQueue(instance, notify=notify)
+    chat.say('a').whisper(1, 'b')
+
+    assert notify.call_count == 2
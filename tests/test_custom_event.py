@@ -0,0 +1,172 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import Callable, List
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, PluginData, PluginInjector, PluginLoader, custom_event
+from plugin_bot.plugin.offload import to_payload
+from plugin_bot.plugin.recording import revive
+from pytest import raises
+
+
+@custom_event("test.kicked")
+class Kicked:
+    """
+    A custom event for the tests.
+    """
+    name: str
+    reasons: List[str]
+
+
+@custom_event("test.banned")
+class Banned:
+    """
+    Another custom event for the tests.
+    """
+    name: str
+
+
+class KickPlugin:
+    """
+    A plugin handling kicks, with a handler chosen per test.
+    """
+    on_event = "test.kicked"
+
+    def __init__(self, handler: Callable) -> None:
+        self.handle_event = handler
+
+
+def test_declared_events_are_slotted() -> None:
+    """
+    Test that a declared event is a dataclass without an instance dict.
+    """
+    kicked = Kicked(name="Bob", reasons=["spam"])
+
+    assert Kicked.__slots__ == ("name", "reasons")
+    assert not hasattr(kicked, "__dict__")
+    assert kicked == Kicked("Bob", ["spam"])
+
+def test_publish_passes_the_event_by_reference() -> None:
+    """
+    Test that subscribers of the topic and of patterns over it receive the published object itself.
+    """
+    bus = PluginBus(Mock())
+    exact, pattern, other = Mock(), Mock(), Mock()
+    bus.subscribe("test.kicked", exact).subscribe("test.*", pattern).subscribe("test.banned", other)
+    kicked = Kicked(name="Bob", reasons=["spam"])
+
+    bus.publish(kicked)
+
+    assert exact.call_args.args[0] is kicked
+    assert pattern.call_args.args[0] is kicked
+    other.assert_not_called()
+
+def test_handlers_are_checked_at_registration() -> None:
+    """
+    Test that handlers which could not receive the declared event are refused before anything is published.
+    """
+    bus = PluginBus(Mock())
+
+    def takes_nothing() -> None:
+        pass
+
+    def takes_two(event: Kicked, other: str) -> None:
+        pass
+
+    def takes_banned(event: Banned) -> None:
+        pass
+
+    for handler in (takes_nothing, takes_two, takes_banned):
+        with raises(TypeError):
+            bus.register_plugin(KickPlugin(handler))
+
+    assert not bus.has_subscriber("test.kicked", takes_nothing)
+
+def test_compatible_handlers_register() -> None:
+    """
+    Test that handlers taking the event, annotated or not and with injected keywords, are accepted.
+    """
+    bus = PluginBus(Mock())
+
+    def annotated(event: Kicked, publish: Callable = None) -> None:
+        pass
+
+    bus.register_plugin(KickPlugin(annotated)).register_plugin(KickPlugin(lambda event: None))
+
+    assert len(bus._subscribers["test.kicked"]) == 2
+
+def test_loader_skips_incompatible_plugins() -> None:
+    """
+    Test that a plugin refused by the bus is logged and skipped, leaving the rest loaded.
+    """
+    class Broken:
+        on_event = "test.kicked"
+
+        def handle_event(self) -> None:
+            pass
+
+    class Working:
+        on_event = "test.kicked"
+
+        def handle_event(self, event: Kicked) -> None:
+            pass
+
+    finder = Mock()
+    finder.find_plugins.return_value = [
+        PluginData(name="broken", module=None, class_=Broken),
+        PluginData(name="working", module=None, class_=Working),
+    ]
+    loader = PluginLoader(injector=PluginInjector(dependencies={}), bus=PluginBus(Mock()), finder=finder)
+
+    loader.load_all()
+
+    assert [type(plugin) for plugin in loader.plugins()] == [Working]
+
+def test_redeclaring() -> None:
+    """
+    Test that a reloaded class may declare its topic again, but no other class or pattern may.
+    """
+    reloaded = custom_event("test.banned")(
+        type("Banned", (), {"__annotations__": {"name": str}, "__module__": __name__, "__qualname__": "Banned"})
+    )
+
+    subscriber = Mock()
+    PluginBus(Mock()).subscribe("test.banned", subscriber).publish(Banned(name="Bob"))
+
+    subscriber.assert_called_once_with(Banned(name="Bob"))
+    assert to_payload(Banned(name="Bob")) == to_payload(reloaded(name="Bob"))
+    assert type(revive("test.banned", {"name": "Bob"})) is reloaded
+
+    with raises(ValueError):
+        @custom_event("test.kicked")
+        class Other:
+            name: str
+
+    with raises(ValueError):
+        custom_event("test.*")
+
+def test_payload_round_trip() -> None:
+    """
+    Test that a declared event crossing a process boundary arrives as its own class.
+    """
+    kicked = Kicked(name="Bob", reasons=["spam", "flood"])
+
+    assert revive("test.kicked", to_payload(kicked)) == kicked
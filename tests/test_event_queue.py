@@ -0,0 +1,161 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from threading import Thread
+from unittest.mock import Mock, call
+
+from korth_spirit import EventEnum
+from plugin_bot.plugin import EventQueue, OverflowPolicy
+from pytest import mark, raises
+
+
+def test_drain_in_order() -> None:
+    """
+    Test that queued events are dispatched first in, first out.
+    """
+    queue = EventQueue(capacity=10)
+    dispatch = Mock()
+    queue.put('a', 1).put('b', key=2)
+
+    assert queue.drain(dispatch) == 2
+    assert dispatch.call_args_list == [call('a', 1), call('b', key=2)]
+    assert len(queue) == 0
+
+def test_drain_limit() -> None:
+    """
+    Test that drain stops at its limit and leaves the rest queued.
+    """
+    queue = EventQueue(capacity=10)
+    for number in range(5):
+        queue.put('a', number)
+
+    assert queue.drain(Mock(), limit=2) == 2
+    assert len(queue) == 3
+
+def test_drop_oldest() -> None:
+    """
+    Test that a full queue sheds its oldest event.
+    """
+    queue = EventQueue(capacity=2, policy=OverflowPolicy.DROP_OLDEST)
+    dispatch = Mock()
+    queue.put('a', 1).put('a', 2).put('a', 3)
+
+    queue.drain(dispatch)
+
+    assert dispatch.call_args_list == [call('a', 2), call('a', 3)]
+    assert queue.stats().dropped == {'a': 1}
+
+def test_priority_burst_keeps_chat() -> None:
+    """
+    Test that an avatar burst is shed in favour of chat, and chat is drained first.
+    """
+    queue = EventQueue(
+        capacity=100,
+        policy=OverflowPolicy.PRIORITY,
+        priorities={EventEnum.AW_EVENT_CHAT: 1},
+    )
+    for session in range(5000):
+        queue.put(EventEnum.AW_EVENT_AVATAR_ADD, session)
+        if session % 1000 == 0:
+            queue.put(EventEnum.AW_EVENT_CHAT, '!version')
+
+    dispatch = Mock()
+    queue.drain(dispatch, limit=5)
+    stats = queue.stats()
+
+    assert dispatch.call_args_list == [call(EventEnum.AW_EVENT_CHAT, '!version')] * 5
+    assert stats.dropped == {EventEnum.AW_EVENT_AVATAR_ADD: 4905}
+    assert stats.queued == 95
+
+def test_priority_sheds_incoming_lower_event() -> None:
+    """
+    Test that a lower priority event is shed when the queue is full of higher ones.
+    """
+    queue = EventQueue(capacity=1, policy=OverflowPolicy.PRIORITY, priorities={'chat': 1})
+    queue.put('chat').put('avatar')
+
+    assert queue.stats().dropped == {'avatar': 1}
+    assert len(queue) == 1
+
+def test_coalesce_replaces_queued_event() -> None:
+    """
+    Test that an event sharing a coalescing key replaces the queued one in place.
+    """
+    queue = EventQueue(
+        capacity=10,
+        policy=OverflowPolicy.COALESCE,
+        coalesce={'move': lambda session, position: session},
+    )
+    queue.put('move', 1, 'a').put('chat', 'hi').put('move', 1, 'b').put('move', 2, 'c')
+    dispatch = Mock()
+
+    queue.drain(dispatch)
+
+    assert dispatch.call_args_list == [call('move', 1, 'b'), call('chat', 'hi'), call('move', 2, 'c')]
+    assert queue.stats().coalesced == 1
+
+def test_block_waits_for_drain() -> None:
+    """
+    Test that a blocking queue holds the producer until there is room.
+    """
+    queue = EventQueue(capacity=1, policy=OverflowPolicy.BLOCK)
+    queue.put('a', 1)
+    producer = Thread(target=queue.put, args=('a', 2))
+    producer.start()
+    producer.join(0.05)
+
+    assert producer.is_alive()
+
+    dispatch = Mock()
+    queue.drain(dispatch)
+    producer.join(1)
+    queue.drain(dispatch)
+
+    assert dispatch.call_args_list == [call('a', 1), call('a', 2)]
+
+def test_block_timeout_sheds() -> None:
+    """
+    Test that a blocking queue sheds the event when the wait times out.
+    """
+    queue = EventQueue(capacity=1, policy=OverflowPolicy.BLOCK, timeout=0.01)
+    queue.put('a', 1).put('a', 2)
+
+    assert queue.stats().dropped == {'a': 1}
+
+def test_put_notifies() -> None:
+    """
+    Test that queueing an event wakes the drainer, and shedding one does not.
+    """
+    notify = Mock()
+    queue = EventQueue(capacity=1, policy=OverflowPolicy.BLOCK, timeout=0, notify=notify)
+    queue.put('a', 1).put('a', 2)
+
+    assert notify.call_count == 1
+
+@mark.parametrize('capacity', [0, -1])
+def test_capacity_must_hold_an_event(capacity: int) -> None:
+    """
+    Test that a queue that could hold no event is refused.
+
+    Args:
+        capacity (int): The capacity.
+    """
+    with raises(ValueError):
+        EventQueue(capacity=capacity)
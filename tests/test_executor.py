@@ -0,0 +1,195 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import new_event_loop, sleep as async_sleep
+from threading import Event, get_ident
+from time import sleep
+from unittest.mock import Mock
+
+from plugin_bot.plugin import KeyedExecutor, PluginBus, PumpProxy
+from pytest import fixture, raises
+
+
+@fixture
+def executor() -> KeyedExecutor:
+    """
+    The fixture for the keyed executor.
+
+    Returns:
+        KeyedExecutor: The keyed executor.
+    """
+    executor = KeyedExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+def test_same_key_runs_in_order(executor: KeyedExecutor) -> None:
+    """
+    Test that tasks sharing a key run in submission order.
+
+    Args:
+        executor (KeyedExecutor): The keyed executor.
+    """
+    seen = []
+    for number in range(50):
+        executor.submit('avatar', seen.append, number)
+    executor.shutdown()
+
+    assert seen == list(range(50))
+
+def test_different_keys_run_in_parallel(executor: KeyedExecutor) -> None:
+    """
+    Test that a slow key does not hold back another key.
+
+    Args:
+        executor (KeyedExecutor): The keyed executor.
+    """
+    release, finished = Event(), Event()
+    executor.submit('slow', release.wait, 5)
+    executor.submit('fast', finished.set)
+
+    assert finished.wait(1)
+    release.set()
+
+def test_stats_report_queue_depth(executor: KeyedExecutor) -> None:
+    """
+    Test that queued and active work is observable.
+
+    Args:
+        executor (KeyedExecutor): The keyed executor.
+    """
+    release = Event()
+    executor.submit('avatar', release.wait, 5)
+    executor.submit('avatar', release.wait, 5)
+    sleep(0.05)
+
+    stats = executor.stats()
+    release.set()
+
+    assert stats.active == 1
+    assert stats.queued == 1
+    assert stats.keys == 1
+    assert stats.workers == 4
+
+def test_failing_task_does_not_stall_key(executor: KeyedExecutor) -> None:
+    """
+    Test that a failing task is logged and the next task for its key still runs.
+
+    Args:
+        executor (KeyedExecutor): The keyed executor.
+    """
+    finished = Event()
+    executor.submit('avatar', lambda: 1 / 0)
+    executor.submit('avatar', finished.set)
+
+    assert finished.wait(1)
+
+def test_submit_after_shutdown_leaves_nothing_pending() -> None:
+    """
+    Test that a task refused by a shut down executor is not counted as pending.
+    """
+    executor = KeyedExecutor(max_workers=1)
+    executor.shutdown()
+
+    for key in ('avatar', None):
+        with raises(RuntimeError):
+            executor.submit(key, Mock())
+
+    assert executor.pending() == 0
+    assert executor.stats().keys == 0
+
+class FakeInstance:
+    """
+    A fake instance that notes the thread every call is made on.
+    """
+    name = 'Plugin Bot'
+
+    def __init__(self) -> None:
+        """
+        Constructs the class.
+        """
+        self.threads = []
+
+    def say(self, message: str) -> "FakeInstance":
+        """
+        Notes the thread saying the message.
+
+        Args:
+            message (str): The message.
+
+        Returns:
+            FakeInstance: The instance.
+        """
+        self.threads.append(get_ident())
+        return self
+
+class BlockingSayPlugin:
+    """
+    A fake blocking plugin that talks to the SDK from the executor.
+    """
+    on_event = 'say_requested'
+    blocking = True
+
+    def __init__(self, instance: PumpProxy) -> None:
+        """
+        Constructs the class.
+
+        Args:
+            instance (PumpProxy): The instance.
+        """
+        self.instance = instance
+        self.said = Event()
+
+    def handle_event(self, event: str) -> None:
+        """
+        Says the event.
+
+        Args:
+            event (str): The event.
+        """
+        assert self.instance.say(event) is self.instance
+        self.said.set()
+
+def test_blocking_plugin_sdk_calls_run_on_the_pump(executor: KeyedExecutor) -> None:
+    """
+    Test that the SDK calls of a blocking plugin are made on the pump thread, and calls on the pump go straight through.
+
+    Args:
+        executor (KeyedExecutor): The keyed executor.
+    """
+    loop = new_event_loop()
+    target = FakeInstance()
+    wake = Mock()
+    instance = PumpProxy(target, loop, notify=wake)
+    plugin = BlockingSayPlugin(instance)
+    PluginBus(Mock(), executor=executor).register_plugin(plugin).publish('say_requested', 'hello')
+
+    async def pump() -> None:
+        while not plugin.said.is_set():
+            await async_sleep(0.01)
+
+    try:
+        loop.run_until_complete(pump())
+    finally:
+        loop.close()
+
+    instance.say('direct')
+    assert instance.name == 'Plugin Bot'
+    assert target.threads == [get_ident(), get_ident()]
+    wake.assert_called_once_with()
@@ -287,3 +287,18 @@ def test_mixed_arguments(injector: PluginInjector) -> None:
     ))
 
     assert FakeClass().test_mixed(number=777, positional='changed') == (777, 'changed')
+
+def test_bindings(injector: PluginInjector) -> None:
+    """
+    Test that bindings match arguments by annotation or name and skip variadic ones.
+
+    Args:
+        injector (PluginInjector): The injector to test.
+    """
+    def function(first: int, string, *args, **kwargs) -> None:
+        pass
+
+    assert injector.bindings(function, (int, 'string', 'args', 'kwargs')) == {
+        'first': int,
+        'string': 'string',
+    }
@@ -18,9 +18,10 @@
 # LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from logging import ERROR
 from unittest.mock import Mock, patch
 
-from plugin_bot.plugin import PluginData, PluginLoader
+from plugin_bot.plugin import PluginBus, PluginData, PluginLoader
 from pytest import raises
 
 
@@ -63,4 +64,34 @@ def test_load_raises_value_error_on_duplicate() -> None:
 
     with raises(ValueError):
         plugin_loader.load(plugin_data)
-    
+
+def test_load_all_logs_duplicate_commands(caplog) -> None:
+    """
+    Test that a plugin answering a command another plugin already answers is logged and left unloaded,
+    without any handler being built for it.
+
+    Args:
+        caplog (LogCaptureFixture): The captured logs.
+    """
+    class FirstVersion:
+        on_command = 'version'
+
+        def handle_event(self, event) -> None:
+            pass
+
+    class SecondVersion(FirstVersion):
+        pass
+
+    bus = PluginBus(Mock())
+    finder = Mock()
+    finder.find_plugins.return_value = [
+        PluginData(name=class_.__name__, class_=class_, module=Mock()) for class_ in (FirstVersion, SecondVersion)
+    ]
+    plugin_loader = PluginLoader(injector=Mock(), bus=bus, finder=finder)
+
+    with patch.object(bus, '_handler', wraps=bus._handler) as handler, caplog.at_level(ERROR):
+        plugin_loader.load_all()
+
+    assert [type(plugin) for plugin in plugin_loader.plugins()] == [FirstVersion]
+    assert handler.call_count == 1
+    assert 'SecondVersion' in caplog.text and 'FirstVersion' in caplog.text
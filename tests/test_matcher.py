@@ -0,0 +1,124 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from plugin_bot.plugin import Trigger, TriggerMatcher
+from pytest import fixture
+
+
+@fixture
+def matcher() -> TriggerMatcher:
+    """
+    The fixture for the trigger matcher.
+
+    Returns:
+        TriggerMatcher: The trigger matcher.
+    """
+    return TriggerMatcher()
+
+def test_scan_finds_overlapping_phrases(matcher: TriggerMatcher) -> None:
+    """
+    Test that phrases from different plugins are all found, even when they overlap.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+    """
+    matcher.register(['hi', 'hello'], Mock(), owner='greeter')
+    matcher.register('hi bot', Mock(), owner='salutation')
+    matcher.register(Trigger('bot', anchored=True), Mock(), owner='anchored')
+    matcher.register('spam', Mock(), owner='moderation')
+
+    assert matcher.scan('Well HI Bot there') == {'greeter': 'hi', 'salutation': 'hi bot'}
+
+def test_scan_only_matches_whole_words(matcher: TriggerMatcher) -> None:
+    """
+    Test that a phrase inside a longer word does not match.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+    """
+    matcher.register('hi', Mock(), owner='greeter')
+
+    assert matcher.scan('this and that') == {}
+    assert matcher.scan('oh, hi!') == {'greeter': 'hi'}
+
+def test_anchored_trigger(matcher: TriggerMatcher) -> None:
+    """
+    Test that an anchored trigger only matches at the start of the line.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+    """
+    matcher.register(Trigger('hello bot', anchored=True), Mock(), owner='salutation')
+
+    assert matcher.scan('hello bot') == {'salutation': 'hello bot'}
+    assert matcher.scan('I said hello bot') == {}
+
+def test_unregister_rebuilds(matcher: TriggerMatcher) -> None:
+    """
+    Test that removing a plugin stops its phrases and keeps the others.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+    """
+    matcher.register(['ban', 'banana'], Mock(), owner='first')
+    matcher.register('banana split', Mock(), owner='second')
+    matcher.scan('')
+
+    matcher.unregister('first')
+
+    assert matcher.scan('banana split') == {'second': 'banana split'}
+    assert matcher.scan('ban') == {}
+    assert len(matcher) == 1
+    assert 'first' not in matcher
+
+def test_route_passes_trigger(matcher: TriggerMatcher) -> None:
+    """
+    Test that route calls each triggered handler once with the phrase it declares.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+    """
+    received, plain = [], []
+    matcher.register(['hey', 'yo'], lambda event, trigger: received.append(trigger), owner='greeter')
+    matcher.register('yo', lambda event: plain.append(event), owner='plain')
+
+    matcher.route(SimpleNamespace(chat_message='yo hey'))
+
+    assert received == ['yo']
+    assert len(plain) == 1
+
+def test_route_isolates_failing_handlers(matcher: TriggerMatcher, caplog) -> None:
+    """
+    Test that a handler which raises does not stop the handlers triggered after it.
+
+    Args:
+        matcher (TriggerMatcher): The trigger matcher.
+        caplog (LogCaptureFixture): The captured logs.
+    """
+    working = Mock(return_value='handled')
+    matcher.register('ban', Mock(side_effect=RuntimeError('broken')), owner='broken')
+    matcher.register('ban', working, owner='working')
+
+    assert matcher.route(SimpleNamespace(chat_message='ban Bob')) == 'handled'
+    working.assert_called_once()
+    assert 'broken' in caplog.text
@@ -0,0 +1,182 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from queue import Queue
+from time import monotonic, sleep
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, ProcessOffloader
+from plugin_bot.plugin.offload import to_payload
+from pytest import fixture, raises
+
+
+class CpuPlugin:
+    """
+    A fake plugin doing cpu bound work on chat text.
+    """
+    cpu_bound = True
+
+    def __init__(self, instance: Mock) -> None:
+        """
+        Constructs the class.
+
+        Args:
+            instance (Mock): The fake instance.
+        """
+        self.instance = instance
+
+    @property
+    def on_event(self) -> str:
+        """
+        Event to listen for.
+
+        Returns:
+            str: The event.
+        """
+        return 'chat'
+
+    @staticmethod
+    def compute(event: dict) -> int:
+        """
+        Count vowels the slow way, in a worker process.
+
+        Args:
+            event (dict): The event attributes.
+
+        Returns:
+            int: The number of vowels.
+        """
+        return sum(1 for character in event['chat_message'] if character in 'aeiou')
+
+    def handle_event(self, event: SimpleNamespace, result: int) -> None:
+        """
+        Handles the result on the delivering thread.
+
+        Args:
+            event (SimpleNamespace): The event.
+            result (int): The computed result.
+        """
+        self.instance.say(f"{event.avatar_name}: {result}")
+
+@fixture
+def results() -> Queue:
+    """
+    The queue offloaded results are delivered to.
+
+    Returns:
+        Queue: The queue.
+    """
+    return Queue()
+
+@fixture
+def offloader(results: Queue) -> ProcessOffloader:
+    """
+    The fixture for the process offloader.
+
+    Args:
+        results (Queue): The queue offloaded results are delivered to.
+
+    Returns:
+        ProcessOffloader: The process offloader.
+    """
+    offloader = ProcessOffloader(workers=2, deliver=results.put)
+    yield offloader
+    offloader.shutdown()
+
+def test_to_payload_keeps_primitive_attributes() -> None:
+    """
+    Test that events are reduced to their public primitive attributes.
+    """
+    event = SimpleNamespace(avatar_name='Bob', avatar_session=5, event_type=object(), _private='x')
+
+    assert to_payload(event) == {'avatar_name': 'Bob', 'avatar_session': 5}
+    assert to_payload('text') == 'text'
+
+def test_cpu_plugin_result_reaches_handler(offloader: ProcessOffloader, results: Queue) -> None:
+    """
+    Test that a cpu bound plugin computes in a worker and says the result on the delivering thread.
+
+    Args:
+        offloader (ProcessOffloader): The process offloader.
+        results (Queue): The queue offloaded results are delivered to.
+    """
+    instance = Mock()
+    bus = PluginBus(instance, offloader=offloader)
+    bus.register_plugin(CpuPlugin(instance))
+
+    for name in ('Ann', 'Bob', 'Cat'):
+        bus.publish('chat', SimpleNamespace(avatar_name=name, chat_message='hello there'))
+    for _ in range(3):
+        results.get(timeout=30)()
+
+    assert sorted(call.args[0] for call in instance.say.call_args_list) == ['Ann: 4', 'Bob: 4', 'Cat: 4']
+    assert offloader.pending() == 0
+
+def test_failed_task_is_not_delivered(offloader: ProcessOffloader, results: Queue) -> None:
+    """
+    Test that a failing compute function is logged instead of delivered.
+
+    Args:
+        offloader (ProcessOffloader): The process offloader.
+        results (Queue): The queue offloaded results are delivered to.
+    """
+    callback = Mock()
+    offloader.submit('math', 'sqrt', (-1,), callback)
+    offloader.submit('math', 'sqrt', (16,), callback)
+
+    results.get(timeout=30)()
+
+    callback.assert_called_once_with(4.0)
+    assert results.empty()
+
+def test_unmarshallable_task_is_not_awaited(offloader: ProcessOffloader) -> None:
+    """
+    Test that a task whose arguments marshal cannot encode fails without being counted as pending.
+
+    Args:
+        offloader (ProcessOffloader): The process offloader.
+    """
+    with raises(ValueError):
+        offloader.submit('math', 'sqrt', (object(),), Mock())
+
+    assert offloader.pending() == 0
+
+def test_tasks_of_a_dead_worker_are_dropped(results: Queue) -> None:
+    """
+    Test that the tasks of a worker that exits are forgotten, and that nothing more is sent to it.
+
+    Args:
+        results (Queue): The queue offloaded results are delivered to.
+    """
+    offloader = ProcessOffloader(workers=1, deliver=results.put)
+    callback = Mock()
+    offloader.submit('os', '_exit', (1,), callback)
+
+    deadline = monotonic() + 30
+    while offloader.pending() and monotonic() < deadline:
+        sleep(0.01)
+
+    assert offloader.pending() == 0
+    with raises(RuntimeError):
+        offloader.submit('math', 'sqrt', (16,), callback)
+    offloader.shutdown()
+
+    callback.assert_not_called()
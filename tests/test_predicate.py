@@ -0,0 +1,99 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from plugin_bot.plugin import Between, Equals, OneOf, Prefix
+from plugin_bot.plugin.predicate import PredicateIndex
+from pytest import mark
+
+
+@mark.parametrize('predicate, value, expected', [
+    (Equals('!version'), '!version', True),
+    (Equals('!version'), '!VERSION', False),
+    (Equals('!version', ignore_case=True), '!VERSION', True),
+    (OneOf(1, 2, 3), 2, True),
+    (OneOf(1, 2, 3), 4, False),
+    (OneOf('ann', 1, None, ignore_case=True), 'ANN', True),
+    (OneOf('ann', 1, None, ignore_case=True), 1, True),
+    (OneOf('ann', 1, None, ignore_case=True), None, True),
+    (OneOf('ann', ignore_case=True), 7, False),
+    (Prefix('hello', 'hi'), 'hi there', True),
+    (Prefix('hello', ignore_case=True), 'HELLO there', True),
+    (Prefix('hello'), 5, False),
+    (Between(100, 200), 150, True),
+    (Between(100, 200), 201, False),
+    (Between(100, 200), 'text', False),
+])
+def test_predicate_matches(predicate, value, expected) -> None:
+    """
+    Test each predicate on its own.
+
+    Args:
+        predicate (Predicate): The predicate.
+        value (Any): The attribute value.
+        expected (bool): Whether the value should match.
+    """
+    assert predicate.matches(value) == expected
+
+def test_index_returns_only_matching_subscribers() -> None:
+    """
+    Test that the index only returns subscribers whose predicates all hold, in order.
+    """
+    version, greet, staff, everyone = Mock(), Mock(), Mock(), Mock()
+    index = PredicateIndex(
+        [version, greet, staff, everyone],
+        [
+            {'chat_message': Equals('!version', ignore_case=True)},
+            {'chat_message': Prefix('hello', 'hi ', ignore_case=True)},
+            {'chat_message': Prefix('!'), 'chat_citizen': Between(1, 10)},
+            None,
+        ],
+    )
+
+    def match(message: str, citizen: int) -> tuple:
+        return index.match(SimpleNamespace(chat_message=message, chat_citizen=citizen))
+
+    assert match('!Version', 500) == (version, everyone)
+    assert match('!version', 5) == (version, staff, everyone)
+    assert match('Hi there', 5) == (greet, everyone)
+    assert match('nothing', 5) == (everyone,)
+
+def test_index_reads_keyword_arguments() -> None:
+    """
+    Test that attributes may come from keyword arguments of a custom event.
+    """
+    subscriber = Mock()
+    index = PredicateIndex([subscriber], [{'user': OneOf('ann', 'bob')}])
+
+    assert index.match(user='bob') == (subscriber,)
+    assert index.match(user='cat') == ()
+
+def test_index_ignores_case_of_strings_only() -> None:
+    """
+    Test that a case insensitive index matches values that are not strings as they are.
+    """
+    subscriber = Mock()
+    index = PredicateIndex([subscriber], [{'chat_citizen': OneOf('Guest', 1, ignore_case=True)}])
+
+    assert index.match(chat_citizen='GUEST') == (subscriber,)
+    assert index.match(chat_citizen=1) == (subscriber,)
+    assert index.match(chat_citizen=None) == ()
@@ -0,0 +1,204 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from ctypes import c_void_p
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from korth_spirit import EventEnum
+from plugin_bot.plugin import PluginBus, Recorder, Replayer, ReplayInstance
+from plugin_bot.plugin.recording import ReplayBus, read_log
+from plugin_bot.plugin_instance import PluginInstance
+from plugin_bot.supervisor import DictConfiguration
+from pytest import fixture, raises
+
+
+class Clock:
+    """
+    A clock that only moves when something sleeps on it.
+    """
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Move the clock forward.
+
+        Args:
+            seconds (float): The seconds slept.
+        """
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ReplayWorld(PluginInstance):
+    """
+    A bot replaying a log in place of the SDK, keeping what it says and when.
+    """
+    STATS = True
+
+    def __init__(self, clock: Clock) -> None:
+        super().__init__(DictConfiguration({
+            "bot_name": "Plugin Bot", "world_name": "Replay", "plugin_path": "plugins",
+        }))
+        self.clock = clock
+        self.said: List[Tuple[float, str]] = []
+        self.bus = ReplayBus()
+
+    def __enter__(self) -> "ReplayWorld":
+        self._instance = c_void_p(0x1000)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def say(self, message: str) -> "ReplayWorld":
+        self.said.append((self.clock(), message))
+        return self
+
+@fixture
+def clock() -> Clock:
+    """
+    The fixture for a clock moved by hand.
+
+    Returns:
+        Clock: The clock.
+    """
+    return Clock()
+
+
+@fixture
+def log(tmp_path, clock: Clock) -> str:
+    """
+    A recorded session: an avatar arrives, greets the bot a second later and asks its version half a second after.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+        clock (Clock): The clock the session is recorded on.
+
+    Returns:
+        str: The path of the log.
+    """
+    path = str(tmp_path / 'session.log')
+    with Recorder(path, clock=clock) as recorder:
+        recorder.record(EventEnum.AW_EVENT_AVATAR_ADD, SimpleNamespace(avatar_name='Bob', avatar_session=7))
+        clock.sleep(1.0)
+        recorder.record(EventEnum.AW_EVENT_CHAT, SimpleNamespace(avatar_name='Bob', chat_message='hello Plugin Bot'))
+        clock.sleep(0.5)
+        recorder.record(EventEnum.AW_EVENT_CHAT, SimpleNamespace(avatar_name='Bob', chat_message='!version'))
+
+    return path
+
+def test_round_trip(tmp_path) -> None:
+    """
+    Test that events come back with their kind, offsets and attributes.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    path = str(tmp_path / 'round_trip.log')
+    with Recorder(path) as recorder:
+        recorder.record(EventEnum.AW_EVENT_CHAT, SimpleNamespace(chat_message='hi', _private=object()))
+        recorder.record('stats.chat', 3, [1, 'two'], flag=True)
+
+    chat, stats = list(read_log(path))
+
+    assert chat[1] is EventEnum.AW_EVENT_CHAT
+    assert chat[2][0].chat_message == 'hi'
+    assert chat[2][0].event_type is EventEnum.AW_EVENT_CHAT
+    assert not hasattr(chat[2][0], '_private')
+    assert stats[1:] == ('stats.chat', (3, [1, 'two']), {'flag': True})
+    assert 0 <= chat[0] <= stats[0]
+
+def test_rejects_other_files(tmp_path) -> None:
+    """
+    Test that a file without the header is refused.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    path = tmp_path / 'other.log'
+    path.write_bytes(b'not a log')
+
+    with raises(ValueError):
+        list(read_log(str(path)))
+
+def test_bus_records_relayed_events(tmp_path) -> None:
+    """
+    Test that the bus records Active Worlds events as they are relayed in, and not custom events.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    path = str(tmp_path / 'relayed.log')
+    instance = ReplayInstance()
+    recorder = Recorder(path)
+    bus = PluginBus(instance, recorder=recorder)
+    bus.subscribe(EventEnum.AW_EVENT_AVATAR_ADD, lambda event: bus.publish('greeted', event))
+    bus.subscribe('greeted', lambda event: None)
+
+    instance.bus.publish(EventEnum.AW_EVENT_AVATAR_ADD, SimpleNamespace(avatar_name='Bob'))
+    recorder.close()
+
+    assert [(event, args[0].avatar_name) for _, event, args, _ in read_log(path)] == [
+        (EventEnum.AW_EVENT_AVATAR_ADD, 'Bob'),
+    ]
+
+def test_replay_through_a_bot(log: str) -> None:
+    """
+    Test replaying a session through a bot and the shipped plugins without the SDK, at twice its pace:
+    every event goes through the queue, the middleware and a pump tick, and is answered in order when due.
+
+    Args:
+        log (str): The path of the log.
+    """
+    clock = Clock()
+    with ReplayWorld(clock) as world:
+        world.reload()
+        replayed = Replayer(log, clock=clock, sleep=clock.sleep).replay(
+            world.bus.publish, speed=2.0, between=world.service,
+        )
+
+        assert replayed == 3
+        assert clock.slept == [0.5, 0.25]
+        assert world.said == [
+            (0.0, 'Welcome, Bob!'),
+            (0.5, 'Hello, Bob!'),
+            (0.75, 'I am a creation of Johnathan Irvin [https://johnathanirvin.com]! | '
+                   'The most up to date version of plugin bot is on github [https://github.com/Korth-Spirit/Plugin-Bot]!'),
+        ]
+        assert world._stats.get('plugins.greeter_plugin.GreeterPlugin', EventEnum.AW_EVENT_AVATAR_ADD).calls == 1
+
+def test_replay_without_speed_does_not_wait(log: str) -> None:
+    """
+    Test that replaying without a speed publishes every event at once.
+
+    Args:
+        log (str): The path of the log.
+    """
+    clock, seen = Clock(), []
+    Replayer(log, clock=clock, sleep=clock.sleep).replay(lambda event, *args: seen.append(event))
+
+    assert len(seen) == 3
+    assert clock.slept == []
@@ -0,0 +1,145 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from plugin_bot.plugin import Command, CommandRouter, DuplicateCommandError
+from pytest import fixture, raises
+
+
+class FakeCommandPlugin:
+    """
+    A fake command plugin.
+    """
+    def __init__(self) -> None:
+        """
+        Constructs the class.
+        """
+        self.received = []
+
+    def handle_event(self, event: SimpleNamespace, command: Command) -> None:
+        """
+        Handles the command.
+
+        Args:
+            event (SimpleNamespace): The chat event.
+            command (Command): The parsed command.
+        """
+        self.received.append(command)
+
+def chat(message: str) -> SimpleNamespace:
+    """
+    Builds a chat event.
+
+    Args:
+        message (str): The chat message.
+
+    Returns:
+        SimpleNamespace: The chat event.
+    """
+    return SimpleNamespace(chat_message=message)
+
+@fixture
+def router() -> CommandRouter:
+    """
+    The fixture for the command router.
+
+    Returns:
+        CommandRouter: The command router.
+    """
+    return CommandRouter()
+
+def test_route_parses_command(router: CommandRouter) -> None:
+    """
+    Test that the command and its arguments reach the handler.
+
+    Args:
+        router (CommandRouter): The command router.
+    """
+    plugin = FakeCommandPlugin()
+    router.register('kick', plugin.handle_event, owner=plugin)
+
+    router.route(chat('!KICK Bob  for spam'))
+
+    assert plugin.received == [Command(name='kick', text='Bob  for spam', args=['Bob', 'for', 'spam'])]
+
+def test_route_ignores_unknown_and_plain_chat(router: CommandRouter) -> None:
+    """
+    Test that unknown commands and ordinary chat call nothing.
+
+    Args:
+        router (CommandRouter): The command router.
+    """
+    handler = Mock()
+    router.register('version', handler, owner=handler)
+
+    router.route(chat('!versions'))
+    router.route(chat('version'))
+
+    assert not handler.called
+
+def test_handler_without_command_argument(router: CommandRouter) -> None:
+    """
+    Test that a handler only receives the parsed values it declares.
+
+    Args:
+        router (CommandRouter): The command router.
+    """
+    received = []
+    handler = lambda event, args: received.append(args)
+    router.register(('roll', 'dice'), handler, owner=handler)
+
+    router.route(chat('!dice 2 6'))
+
+    assert received == [['2', '6']]
+
+def test_duplicate_command_raises(router: CommandRouter) -> None:
+    """
+    Test that two plugins cannot claim the same command.
+
+    Args:
+        router (CommandRouter): The command router.
+    """
+    first, second = FakeCommandPlugin(), Mock()
+    router.register('version', Mock(), owner=first)
+
+    with raises(DuplicateCommandError) as error:
+        router.register(['about', 'Version'], Mock(), owner=second)
+
+    assert error.value.command == '!version'
+    assert error.value.owner is first and error.value.plugin is second
+    assert 'FakeCommandPlugin' in str(error.value) and 'Mock' in str(error.value)
+
+    assert len(router) == 1
+
+def test_unregister_removes_aliases(router: CommandRouter) -> None:
+    """
+    Test that unregistering a plugin removes every alias.
+
+    Args:
+        router (CommandRouter): The command router.
+    """
+    router.register(('roll', 'dice'), Mock(), owner='dice')
+
+    router.unregister('dice')
+
+    assert len(router) == 0
+    assert 'dice' not in router
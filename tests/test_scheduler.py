@@ -0,0 +1,199 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from typing import List
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, Scheduler
+from pytest import approx, fixture
+
+
+class Clock:
+    """
+    A clock the tests move by hand.
+    """
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, scheduler: Scheduler, seconds: float, step: float = 0.01) -> int:
+        """
+        Move the clock forward, firing timers along the way as the pump would.
+
+        Args:
+            scheduler (Scheduler): The scheduler.
+            seconds (float): The seconds to move.
+            step (float, optional): The seconds between pump ticks. Defaults to 0.01.
+
+        Returns:
+            int: The number of callbacks fired.
+        """
+        fired = 0
+        for _ in range(round(seconds / step)):
+            self.now += step
+            fired += scheduler.advance()
+        return fired
+
+
+class TickingPlugin:
+    """
+    A plugin scheduling its own work.
+    """
+    on_event = "tick"
+
+    def __init__(self, scheduler: Scheduler) -> None:
+        self.ticks: List[float] = []
+        self.timer = scheduler.call_every(1, self.tick)
+        scheduler.idle(self.tick)
+
+    def tick(self) -> None:
+        self.ticks.append(0)
+
+    def handle_event(self, event: str) -> None:
+        pass
+
+
+@fixture
+def clock() -> Clock:
+    """
+    The fixture for the clock.
+    """
+    return Clock()
+
+@fixture
+def scheduler(clock: Clock) -> Scheduler:
+    """
+    The fixture for a scheduler on the clock.
+    """
+    return Scheduler(clock=clock)
+
+def test_call_later(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that a delayed call fires once, when due.
+    """
+    callback = Mock()
+    scheduler.call_later(0.5, callback, "arg")
+
+    assert clock.advance(scheduler, 0.49) == 0
+    assert clock.advance(scheduler, 0.02) == 1
+    assert clock.advance(scheduler, 5) == 0
+    callback.assert_called_once_with("arg")
+    assert len(scheduler) == 0
+
+def test_call_every(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that a periodic call repeats at its interval until cancelled.
+    """
+    callback = Mock()
+    timer = scheduler.call_every(0.25, callback)
+
+    clock.advance(scheduler, 1.001)
+    assert callback.call_count == 4
+
+    assert timer.cancel()
+    assert not timer.cancel()
+    clock.advance(scheduler, 1)
+    assert callback.call_count == 4
+
+def test_far_timers_cascade(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that timers beyond the first wheel fire on time after cascading in, even across long pump stalls.
+    """
+    fired = []
+    for delay in (3, 30, 300, 3000):
+        scheduler.call_later(delay, lambda delay=delay: fired.append((delay, clock.now)))
+
+    clock.advance(scheduler, 200, step=0.1)
+    clock.advance(scheduler, 3000, step=7)
+
+    assert [delay for delay, _ in fired] == [3, 30, 300, 3000]
+    assert [when - 1000 for _, when in fired[:3]] == [approx(3, abs=0.11), approx(30, abs=0.11), approx(300, abs=7)]
+
+def test_cancel_is_constant_time(scheduler: Scheduler) -> None:
+    """
+    Test that cancelling leaves the other timers in place.
+    """
+    timers = [scheduler.call_later(delay / 10, Mock()) for delay in range(1, 1000)]
+
+    for timer in timers[::2]:
+        timer.cancel()
+
+    assert len(scheduler) == 499
+    assert all(timer.active for timer in timers[1::2])
+
+def test_next_due(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that the pump is told when the next timer or cascade is due, and idle work does not bring it forward.
+    """
+    assert scheduler.next_due() is None
+
+    scheduler.call_later(0.3, Mock())
+    assert scheduler.next_due() == approx(0.3, abs=0.011)
+
+    scheduler.idle(Mock(return_value=True))
+    assert scheduler.next_due() == approx(0.3, abs=0.011)
+
+def test_idle_budget(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that idle work stops when the budget is spent, and work asking for more is queued again.
+    """
+    calls = []
+
+    def slow() -> bool:
+        calls.append("slow")
+        clock.now += 0.004
+        return calls.count("slow") < 3
+
+    scheduler.idle(slow).idle(calls.append, "quick")
+
+    assert scheduler.run_idle(0.005) == 2
+    assert calls == ["slow", "quick"]
+    assert scheduler.run_idle(0.005) == 1
+    assert scheduler.run_idle(0.001) == 1
+    assert scheduler.run_idle(0.005) == 0
+
+def test_failing_callbacks_are_isolated(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that a failing timer neither stops the others nor its own repeats.
+    """
+    after = Mock()
+    scheduler.call_every(0.1, Mock(side_effect=ValueError("boom")))
+    scheduler.call_later(0.1, after)
+
+    assert clock.advance(scheduler, 0.3) == 4
+    after.assert_called_once()
+
+def test_unregistering_cancels_plugin_timers(clock: Clock, scheduler: Scheduler) -> None:
+    """
+    Test that unloading a plugin cancels the timers and idle work it scheduled.
+    """
+    bus = PluginBus(Mock(), middleware=[scheduler])
+    plugin, other = TickingPlugin(scheduler), TickingPlugin(scheduler)
+    bus.register_plugins([plugin, other])
+
+    bus.unregister_plugin(plugin)
+    clock.advance(scheduler, 1.001)
+    scheduler.run_idle(1)
+
+    assert not plugin.timer.active
+    assert plugin.ticks == []
+    assert other.ticks == [0, 0]
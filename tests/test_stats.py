@@ -0,0 +1,138 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from asyncio import new_event_loop
+
+from korth_spirit import EventEnum
+from plugin_bot.plugin import Histogram, LoopStats, PluginStats
+from pytest import fixture, mark, raises
+
+
+@fixture
+def stats() -> PluginStats:
+    """
+    Empty plugin stats.
+    """
+    return PluginStats()
+
+@mark.parametrize('value', [0, 1, 31, 32, 47, 1000, 123456, 10 ** 9])
+def test_histogram_precision(value: int) -> None:
+    """
+    Test that a recorded value is reported within the bucket precision.
+
+    Args:
+        value (int): The value to record.
+    """
+    histogram = Histogram()
+    histogram.record(value)
+
+    assert histogram.count == 1
+    assert histogram.max == value
+    assert abs(histogram.percentile(50) - value) <= value / 16
+
+def test_histogram_percentiles() -> None:
+    """
+    Test percentiles over a spread of values.
+    """
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value * 1000)
+
+    assert abs(histogram.percentile(50) - 5_000_000) <= 5_000_000 / 16
+    assert abs(histogram.percentile(99) - 9_900_000) <= 9_900_000 / 16
+    assert histogram.percentile(100) == 10_000_000
+    assert Histogram().percentile(99) == 0
+
+def test_timed_records_calls_and_errors(stats: PluginStats) -> None:
+    """
+    Test that calls and exceptions are counted per plugin and event.
+
+    Args:
+        stats (PluginStats): The plugin stats.
+    """
+    def handle_event(fail: bool) -> str:
+        if fail:
+            raise ValueError()
+        return 'handled'
+
+    timed = stats.timed(handle_event, 'FakePlugin', EventEnum.AW_EVENT_CHAT)
+    assert timed(False) == 'handled'
+    with raises(ValueError):
+        timed(True)
+
+    handler = stats.get('FakePlugin', EventEnum.AW_EVENT_CHAT)
+    assert handler.event == 'AW_EVENT_CHAT'
+    assert handler.calls == 2
+    assert handler.errors == 1
+    assert handler.max >= handler.p50 > 0
+    assert stats.get('FakePlugin', 'version_requested').calls == 0
+
+def test_timed_async_subscriber(stats: PluginStats) -> None:
+    """
+    Test that an async subscriber stays a coroutine function and is timed until it finishes.
+
+    Args:
+        stats (PluginStats): The plugin stats.
+    """
+    async def handle_event() -> str:
+        return 'handled'
+
+    timed = stats.timed(handle_event, 'FakePlugin', 'version_requested')
+    loop = new_event_loop()
+    try:
+        assert loop.run_until_complete(timed()) == 'handled'
+    finally:
+        loop.close()
+
+    assert stats.get('FakePlugin', 'version_requested').calls == 1
+
+def test_snapshot_report_and_reset(stats: PluginStats) -> None:
+    """
+    Test that the snapshot puts the most expensive handler first and reset keeps wrapped handlers recording.
+
+    Args:
+        stats (PluginStats): The plugin stats.
+    """
+    cheap = stats.timed(lambda: None, 'CheapPlugin', 'tick')
+    stats.histogram('SlowPlugin', 'tick').record(10 ** 9)
+    cheap()
+
+    assert [handler.plugin for handler in stats.snapshot()] == ['SlowPlugin', 'CheapPlugin']
+    assert 'SlowPlugin' in stats.report().splitlines()[1]
+
+    stats.reset()
+    assert stats.get('SlowPlugin', 'tick').calls == 0
+    cheap()
+    assert stats.get('CheapPlugin', 'tick').calls == 1
+
+def test_loop_stats() -> None:
+    """
+    Test that loop stats keep the tick latency, the wakeups and the share of time spent waiting.
+    """
+    stats = LoopStats()
+    assert stats.idle_ratio == 1.0
+
+    stats.record(waited=9_000_000, worked=1_000_000, woken=True)
+    stats.record(waited=0, worked=0)
+
+    assert stats.ticks.count == 2
+    assert stats.woken == 1
+    assert stats.idle_ratio == 0.9
+    assert 'idle 90.0%' in stats.report()
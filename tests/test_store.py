@@ -0,0 +1,186 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from multiprocessing import get_context
+from threading import Thread
+
+from plugin_bot.plugin import SharedStore, open_store
+from pytest import fixture, raises
+
+
+def count(file: str, times: int) -> None:
+    """
+    Increment a shared counter from another process.
+
+    Args:
+        file (str): The store file.
+        times (int): The number of increments.
+    """
+    with open_store(file) as store:
+        for _ in range(times):
+            store.add("visits")
+
+def claim(file: str, times: int) -> None:
+    """
+    Add to a shared counter from another process, and record every value that add returned.
+
+    Args:
+        file (str): The store file.
+        times (int): The number of additions.
+    """
+    with open_store(file) as store:
+        for _ in range(times):
+            store.set(f"seen:{store.add('tickets')}", 1)
+
+@fixture
+def store(tmp_path) -> SharedStore:
+    """
+    The fixture for a small shared store.
+    """
+    with SharedStore(str(tmp_path / "store"), slots=8) as store:
+        yield store
+
+def test_set_get_delete(store: SharedStore) -> None:
+    """
+    Test that values are set, read and deleted by key.
+    """
+    store.set("ban:griefer", 1).set("cooldown:wave", 1_700_000_000)
+
+    assert store.get("ban:griefer") == 1
+    assert store.get("cooldown:wave") == 1_700_000_000
+    assert store.get("missing", -1) == -1
+    assert "ban:griefer" in store
+    assert store.delete("ban:griefer")
+    assert not store.delete("ban:griefer")
+    assert "ban:griefer" not in store
+    assert dict(store.items()) == {"cooldown:wave": 1_700_000_000}
+
+def test_add_and_compare_and_set(store: SharedStore) -> None:
+    """
+    Test that counters start from zero and compare and set only replaces the expected value.
+    """
+    assert store.add("visits") == 1
+    assert store.add("visits", 4) == 5
+    assert not store.compare_and_set("visits", 4, 0)
+    assert store.compare_and_set("visits", 5, 0)
+    assert store.compare_and_set("fresh", None, 7)
+    assert store.get("visits") == 0
+    assert store.get("fresh") == 7
+
+def test_deleted_key_reuses_its_slot(store: SharedStore) -> None:
+    """
+    Test that a deleted key is set again in the slot it already had.
+    """
+    for number in range(8):
+        store.set(f"key{number}", number)
+    store.delete("key3")
+
+    store.set("key3", 33)
+
+    assert store.get("key3") == 33
+    assert len(store) == 8
+
+def test_full_and_long_keys(store: SharedStore) -> None:
+    """
+    Test that a full store and oversized keys raise.
+    """
+    for number in range(8):
+        store.set(f"key{number}", number)
+
+    with raises(ValueError):
+        store.set("one too many", 0)
+    with raises(ValueError):
+        store.get("x" * 51)
+
+def test_survives_reopening(tmp_path) -> None:
+    """
+    Test that values outlive the store object, as they must across plugin reloads.
+    """
+    file = str(tmp_path / "store")
+    with SharedStore(file, slots=8) as store:
+        store.set("visits", 3)
+
+    with SharedStore(file, slots=1024) as store:
+        assert store.slots == 8
+        assert store.get("visits") == 3
+
+def test_rejects_other_files(tmp_path) -> None:
+    """
+    Test that a file which is not a store is refused.
+    """
+    file = tmp_path / "other"
+    file.write_bytes(b"not a store")
+
+    with raises(ValueError):
+        SharedStore(str(file))
+
+def test_shared_within_a_process(tmp_path) -> None:
+    """
+    Test that a file is opened once per process, and stays mapped until its last user closes it.
+    """
+    file = str(tmp_path / "store")
+    first = open_store(file, slots=8)
+    second = open_store(str(tmp_path / "." / "store"))
+
+    assert first is second
+
+    first.close()
+    second.set("visits", 1)
+    assert second.get("visits") == 1
+
+    second.close()
+    third = open_store(file)
+    assert third is not first
+    assert third.get("visits") == 1
+    third.close()
+
+def test_atomic_across_threads_and_processes(tmp_path) -> None:
+    """
+    Test that increments from threads and processes are never lost.
+    """
+    file = str(tmp_path / "store")
+    SharedStore(file).close()
+    context = get_context("spawn")
+    processes = [context.Process(target=count, args=(file, 500)) for _ in range(3)]
+    threads = [Thread(target=count, args=(file, 500)) for _ in range(3)]
+    for worker in processes + threads:
+        worker.start()
+    for worker in processes + threads:
+        worker.join()
+
+    with SharedStore(file) as store:
+        assert store.get("visits") == 3000
+
+def test_add_is_atomic_across_processes(tmp_path) -> None:
+    """
+    Test that processes adding to one key never lose an update, nor both see the same new value.
+    """
+    file = str(tmp_path / "store")
+    SharedStore(file, slots=1024).close()
+    context = get_context("spawn")
+    processes = [context.Process(target=claim, args=(file, 200)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    with SharedStore(file) as store:
+        assert store.get("tickets") == 800
+        assert all(store.get(f"seen:{ticket}") == 1 for ticket in range(1, 801))
@@ -0,0 +1,239 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from ctypes import c_void_p
+from inspect import isfunction
+from threading import Timer
+from time import sleep
+from itertools import count
+from typing import List
+from unittest.mock import patch
+
+import plugins.custom_event_plugin
+from korth_spirit import EventEnum
+from plugin_bot.plugin import finder
+from plugin_bot.plugin_instance import PluginInstance, Runtime
+from plugin_bot.supervisor import (DictConfiguration, EventRouter,
+                                   RoutedEventBus, Supervisor)
+from plugins.version_plugin import VersionRequested
+from pytest import fixture
+
+WORLDS = 50
+ADDRESSES = count(0x1000, 0x10)
+
+
+class FakeWorld(PluginInstance):
+    """
+    A bot that enters its world without the SDK and keeps what it says.
+    """
+    STATS = False
+
+    def __enter__(self) -> "FakeWorld":
+        self._instance = c_void_p(next(ADDRESSES))
+        self.said: List[str] = []
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def say(self, message: str) -> "FakeWorld":
+        self.said.append(message)
+        return self
+
+
+@fixture
+def supervisor() -> Supervisor:
+    """
+    The fixture for a supervisor of fifty worlds running the bundled plugins.
+    """
+    with patch("plugin_bot.supervisor.aw_event_set"), patch("plugin_bot.supervisor.aw_callback_set"):
+        with Supervisor(
+            (
+                DictConfiguration({"bot_name": f"Bot {world}", "world_name": f"World {world}", "plugin_path": "plugins"})
+                for world in range(WORLDS)
+            ),
+            world=FakeWorld,
+        ) as supervisor:
+            yield supervisor
+
+def test_imports_plugins_once(supervisor: Supervisor) -> None:
+    """
+    Test that the plugin modules are imported once for every world.
+    """
+    with patch.object(finder, "reload", wraps=finder.reload) as reload:
+        supervisor.reload()
+
+    assert reload.call_count == len([
+        plugin_file for plugin_file in finder.listdir("plugins") if plugin_file.endswith(".py")
+    ])
+
+def test_worlds_get_their_own_plugins(supervisor: Supervisor) -> None:
+    """
+    Test that every world injects itself into its own plugin instances, leaving the imported classes alone.
+    """
+    supervisor.reload()
+
+    for world in supervisor.worlds():
+        assert all(plugin.instance._target is world for plugin in world._loader.plugins() if hasattr(plugin, "instance"))
+
+    classes = [{type(plugin) for plugin in world._loader.plugins()} for world in supervisor.worlds()]
+    assert not set.intersection(*classes)
+    assert isfunction(vars(plugins.custom_event_plugin.CustomEventPlugin)["__init__"])
+
+def test_worlds_open_no_store(supervisor: Supervisor) -> None:
+    """
+    Test that worlds leave the shared store alone unless they are configured with one.
+    """
+    assert all(world._store is None for world in supervisor.worlds())
+
+def test_custom_events_stay_in_their_world(supervisor: Supervisor) -> None:
+    """
+    Test that a custom event published in one world reaches only that world's plugins.
+    """
+    supervisor.reload()
+    worlds = supervisor.worlds()
+
+    worlds[7]._bus.publish(VersionRequested(avatar_name="Bob"))
+    for world in worlds:
+        world.service()
+
+    assert len(worlds[7].said) == 1
+    assert all(not world.said for world in worlds if world is not worlds[7])
+
+def test_router_routes_by_instance(supervisor: Supervisor) -> None:
+    """
+    Test that the router hands an SDK event to the bus of the world it arrived for.
+    """
+    supervisor.reload()
+    worlds = supervisor.worlds()
+
+    with patch.object(worlds[3].bus, "publish") as publish, patch.object(worlds[4].bus, "publish") as other:
+        assert supervisor._router.route(EventEnum.AW_EVENT_AVATAR_ADD, worlds[3]._instance.value)
+
+    publish.assert_called_once_with(EventEnum.AW_EVENT_AVATAR_ADD)
+    other.assert_not_called()
+
+def test_router_hooks_each_event_once() -> None:
+    """
+    Test that many buses subscribing to an event set its SDK handler once.
+    """
+    router = EventRouter()
+    with patch("plugin_bot.supervisor.aw_event_set") as aw_event_set:
+        for _ in range(WORLDS):
+            RoutedEventBus(router).subscribe(EventEnum.AW_EVENT_CHAT, lambda event: None)
+
+    aw_event_set.assert_called_once()
+
+def test_router_ignores_unknown_instances() -> None:
+    """
+    Test that events for an instance no world entered are dropped.
+    """
+    assert not EventRouter().route(EventEnum.AW_EVENT_CHAT, 0xdead)
+
+def test_sdk_events_reach_their_world(supervisor: Supervisor) -> None:
+    """
+    Test that an SDK event routed to one world is handled by that world's plugins alone.
+    """
+    supervisor.reload()
+    worlds = supervisor.worlds()
+
+    supervisor._router.route(EventEnum.AW_EVENT_AVATAR_ADD, worlds[3]._instance.value)
+    for world in worlds:
+        world.service()
+
+    assert len(worlds[3].said) == 1
+    assert worlds[3].said[0].startswith("Welcome")
+    assert all(not world.said for world in worlds if world is not worlds[3])
+
+def test_idle_worlds_back_off(supervisor: Supervisor) -> None:
+    """
+    Test that a world waits longer after every idle tick, and goes back to its timer once it has work.
+    """
+    supervisor.reload()
+    world = supervisor.worlds()[0]
+    for _ in range(10):
+        world.service()
+
+    assert world._timer == PluginInstance.MAX_TIMER
+
+    supervisor._router.route(EventEnum.AW_EVENT_AVATAR_ADD, world._instance.value)
+    assert world.timeout(False) == 0
+    assert supervisor._runtime.wakeup.is_set()
+
+    assert world.service() > 0
+    assert world._timer == PluginInstance.TIMER
+
+def test_idle_work_does_not_spin(supervisor: Supervisor) -> None:
+    """
+    Test that idle work which keeps queueing itself runs on ticks without keeping the wait at 0.
+    """
+    supervisor.reload()
+    world = supervisor.worlds()[0]
+    runs = []
+    world._scheduler.idle(lambda: runs.append(True) or True)
+    for _ in range(10):
+        world.service()
+
+    assert len(runs) == 10
+    assert world._timer == PluginInstance.MAX_TIMER
+    assert world.timeout(False) > 0
+
+def test_wakeup_cuts_the_wait_short() -> None:
+    """
+    Test that waking the runtime from another thread ends its wait within a slice.
+    """
+    runtime = Runtime()
+    with patch("plugin_bot.plugin_instance.aw_wait", side_effect=lambda milliseconds: sleep(milliseconds / 1000)):
+        Timer(0.05, runtime.wake).start()
+        waited, woken = runtime.wait(5000)
+
+        assert woken
+        assert waited < 1_000_000_000
+        assert not runtime.wakeup.is_set()
+
+        waited, woken = runtime.wait(20)
+        assert not woken
+        assert waited >= 20_000_000
+    runtime.close()
+
+def test_idle_wait_makes_few_sdk_calls() -> None:
+    """
+    Test that an idle wait grows its slices, and keeps them short after SDK events or while blocking tasks are in flight.
+    """
+    runtime = Runtime()
+    with patch("plugin_bot.plugin_instance.aw_wait", side_effect=lambda milliseconds: sleep(milliseconds / 1000)) as aw_wait:
+        waited, woken = runtime.wait(PluginInstance.MAX_TIMER)
+
+        assert not woken
+        assert waited >= PluginInstance.MAX_TIMER * 1_000_000
+        assert aw_wait.call_count <= 15
+
+        aw_wait.reset_mock()
+        runtime.arrive()
+        runtime.wakeup.clear()
+        runtime.wait(100)
+        assert all(call.args[0] <= Runtime.WAKE_SLICE for call in aw_wait.call_args_list)
+
+        aw_wait.reset_mock()
+        runtime.arrived = float("-inf")
+        runtime.executor.submit(None, sleep, 0.2)
+        runtime.wait(100)
+        assert all(call.args[0] <= Runtime.WAKE_SLICE for call in aw_wait.call_args_list)
+    runtime.close()
@@ -0,0 +1,65 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from plugin_bot.plugin.topic import is_pattern, matches
+from pytest import mark
+
+
+@mark.parametrize('pattern, topic, expected', [
+    ('moderation.*', 'moderation.kick', True),
+    ('moderation.*', 'moderation', False),
+    ('moderation.*', 'moderation.kick.ban', False),
+    ('*.kick', 'moderation.kick', True),
+    ('stats.#', 'stats', True),
+    ('stats.#', 'stats.chat.daily', True),
+    ('stats.#', 'statistics', False),
+    ('#.daily', 'stats.chat.daily', True),
+    ('stats.#.daily', 'stats.daily', True),
+    ('stats.#.daily', 'stats.chat.weekly', False),
+    ('#', 'version_requested', True),
+])
+def test_matches(pattern, topic, expected) -> None:
+    """
+    Test matching concrete topics against wildcard patterns.
+
+    Args:
+        pattern (str): The pattern.
+        topic (str): The topic.
+        expected (bool): Whether the topic should match.
+    """
+    assert matches(pattern, topic) == expected
+
+@mark.parametrize('topic, expected', [
+    ('moderation.*', True),
+    ('stats.#', True),
+    ('moderation.kick', False),
+    ('version_requested', False),
+    ('5*3', False),
+    (5, False),
+])
+def test_is_pattern(topic, expected) -> None:
+    """
+    Test that only whole wildcard segments make a pattern.
+
+    Args:
+        topic (Any): The topic.
+        expected (bool): Whether the topic is a pattern.
+    """
+    assert is_pattern(topic) == expected
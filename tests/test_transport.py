@@ -0,0 +1,242 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from multiprocessing import get_context
+from socket import SOCK_STREAM, socket
+from threading import Thread
+from time import perf_counter, sleep
+from types import SimpleNamespace
+from typing import Callable
+from unittest.mock import Mock
+
+from plugin_bot.plugin import PluginBus, SocketTransport
+from plugin_bot.plugin.transport import AF_UNIX, decode, encode
+from pytest import fixture
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5) -> bool:
+    """
+    Wait until a condition holds.
+
+    Args:
+        condition (Callable[[], bool]): The condition.
+        timeout (float, optional): The seconds to wait. Defaults to 5.
+
+    Returns:
+        bool: Whether the condition held in time.
+    """
+    deadline = perf_counter() + timeout
+    while not condition():
+        if perf_counter() > deadline:
+            return False
+        sleep(0.001)
+
+    return True
+
+def echo(directory: str) -> None:
+    """
+    Run a bot process that answers every ping with a pong until it is told to stop.
+
+    Args:
+        directory (str): The transport directory.
+    """
+    bus = PluginBus(Mock())
+    transport = SocketTransport(directory, ['ping', 'pong', 'stop'], name='echo').attach(bus)
+    stopped = []
+    bus.subscribe('ping', lambda event: bus.publish('pong', event))
+    bus.subscribe('stop', lambda: stopped.append(True))
+
+    while not stopped:
+        transport.poll()
+        transport.flush()
+        sleep(0.0001)
+    transport.close()
+
+@fixture
+def pair(tmp_path) -> tuple:
+    """
+    Two transports on two buses, as two bot processes would have.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+
+    Returns:
+        tuple: The first bus and transport, then the second.
+    """
+    first_bus, second_bus = PluginBus(Mock()), PluginBus(Mock())
+    first = SocketTransport(str(tmp_path), ['moderation.ban'], name='first').attach(first_bus)
+    second = SocketTransport(str(tmp_path), ['moderation.ban'], name='second').attach(second_bus)
+    yield first_bus, first, second_bus, second
+    first.close()
+    second.close()
+
+def test_frames_round_trip() -> None:
+    """
+    Test that frames split across reads decode once complete, objects as namespaces.
+    """
+    data = encode('moderation.ban', (SimpleNamespace(avatar_name='Bob'), 3), {'reason': 'spam'}) * 2
+    buffer = bytearray(data[:-5])
+
+    frames = decode(buffer)
+    assert len(frames) == 1
+    topic, args, kwargs = frames[0]
+    assert (topic, args[0].avatar_name, args[1], kwargs) == ('moderation.ban', 'Bob', 3, {'reason': 'spam'})
+
+    buffer += data[-5:]
+    assert len(decode(buffer)) == 1
+    assert not buffer
+
+def test_plain_containers_round_trip() -> None:
+    """
+    Test that plain dicts stay dicts and tuples stay tuples, while objects inside them are revived.
+    """
+    data = encode('moderation.ban', ({'avatar': 'Bob', 'at': (1, 2)}, ('spam', 3)), {
+        'targets': [SimpleNamespace(avatar_name='Alice')],
+    })
+
+    topic, args, kwargs = decode(bytearray(data))[0]
+    assert args == ({'avatar': 'Bob', 'at': (1, 2)}, ('spam', 3))
+    assert isinstance(args[0], dict)
+    assert kwargs['targets'][0].avatar_name == 'Alice'
+
+def test_other_threads_wake_the_pump(tmp_path) -> None:
+    """
+    Test that a frame buffered from another thread wakes the pump, and one buffered on the pump does not.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    bus, notify = PluginBus(Mock()), Mock()
+    transport = SocketTransport(str(tmp_path), ['moderation.ban'], name='first', notify=notify).attach(bus)
+    try:
+        bus.publish('moderation.ban', 'Bob')
+        notify.assert_not_called()
+
+        publisher = Thread(target=bus.publish, args=('moderation.ban', 'Alice'))
+        publisher.start()
+        publisher.join()
+        notify.assert_called_once()
+        assert transport.pending() == 2
+    finally:
+        transport.close()
+
+def test_forwards_opted_in_topics(pair: tuple) -> None:
+    """
+    Test that an opted in topic reaches the peer, other topics stay local, and nothing echoes back.
+
+    Args:
+        pair (tuple): The two buses and transports.
+    """
+    first_bus, first, second_bus, second = pair
+    banned = Mock()
+    second_bus.subscribe('moderation.ban', banned)
+
+    first_bus.publish('moderation.ban', SimpleNamespace(avatar_name='Bob')).publish('moderation.kick', 'Alice')
+    assert first.flush() == 1
+    assert wait_for(lambda: second.received == 1)
+
+    assert second.poll() == 1
+    assert banned.call_args.args[0].avatar_name == 'Bob'
+    assert second.pending() == 0
+    assert second.flush() == 0
+
+def test_across_processes(tmp_path) -> None:
+    """
+    Test a round trip through another bot process.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    directory = str(tmp_path)
+    process = get_context('spawn').Process(target=echo, args=(directory,))
+    process.start()
+
+    bus = PluginBus(Mock())
+    transport = SocketTransport(directory, ['ping', 'pong', 'stop'], name='parent').attach(bus)
+    pongs = []
+    bus.subscribe('pong', pongs.append)
+    try:
+        assert wait_for(lambda: (tmp_path / 'echo.sock').exists(), timeout=30)
+        bus.publish('ping', 'hello')
+
+        def answered() -> bool:
+            transport.flush()
+            transport.poll()
+            return bool(pongs)
+
+        assert wait_for(answered, timeout=10)
+        assert pongs == ['hello']
+    finally:
+        bus.publish('stop')
+        transport.flush()
+        process.join(10)
+        transport.close()
+
+    assert process.exitcode == 0
+
+def test_removes_stale_sockets(tmp_path) -> None:
+    """
+    Test that the socket file of a process that died without removing it is removed when found.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    stale = socket(AF_UNIX, SOCK_STREAM)
+    stale.bind(str(tmp_path / 'dead.sock'))
+    stale.close()
+
+    transport = SocketTransport(str(tmp_path), ['moderation.ban'], name='alive').attach(PluginBus(Mock()))
+    try:
+        transport.flush()
+        assert not (tmp_path / 'dead.sock').exists()
+        assert (tmp_path / 'alive.sock').exists()
+    finally:
+        transport.close()
+
+def test_slow_peers_do_not_block(tmp_path) -> None:
+    """
+    Test that a peer which stops reading is owed its frames instead of blocking the flush, then dropped.
+
+    Args:
+        tmp_path (Path): A temporary directory.
+    """
+    silent = socket(AF_UNIX, SOCK_STREAM)
+    silent.bind(str(tmp_path / 'silent.sock'))
+    silent.listen()
+    bus = PluginBus(Mock())
+    transport = SocketTransport(str(tmp_path), ['moderation.ban'], name='first', backlog=1 << 22).attach(bus)
+    try:
+        started = perf_counter()
+        for _ in range(64):
+            bus.publish('moderation.ban', 'x' * 65536)
+            assert transport.flush() == 1
+            if transport.pending():
+                break
+        assert perf_counter() - started < 1
+        assert transport.pending() == 1
+
+        transport.backlog = 0
+        bus.publish('moderation.ban', 'Bob')
+        transport.flush()
+        assert transport.pending() == 0
+        assert not transport._peers
+    finally:
+        transport.close()
+        silent.close()
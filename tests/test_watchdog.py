@@ -0,0 +1,192 @@
+# Copyright (c) 2021-2022 Johnathan P. Irvin
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+from threading import Thread, get_ident
+from time import sleep, thread_time
+from typing import Any
+from unittest.mock import Mock
+
+from plugin_bot.plugin import CONSUMED, PluginBus, Watchdog
+from pytest import fixture
+
+
+class SlowPlugin:
+    """
+    A fake plugin that takes its time over every event, and keeps it from plugins of lower priority.
+    """
+    on_event = 'version_requested'
+    time_budget = 0.02
+    priority = 1
+
+    def __init__(self, delay: float) -> None:
+        """
+        Constructs the class.
+
+        Args:
+            delay (float): The seconds each event takes.
+        """
+        self.delay = delay
+        self.threads = []
+
+    def handle_event(self, event: Any) -> Any:
+        """
+        Sleeps through the event.
+
+        Args:
+            event (Any): The event.
+
+        Returns:
+            Any: CONSUMED.
+        """
+        sleep(self.delay)
+        self.threads.append(get_ident())
+        return CONSUMED
+
+class GreedyPlugin:
+    """
+    A fake plugin that burns cpu on every event.
+    """
+    on_event = 'version_requested'
+    cpu_quota = 0.05
+    time_budget = 1.0
+
+    def __init__(self) -> None:
+        """
+        Constructs the class.
+        """
+        self.calls = 0
+
+    def handle_event(self, event: Any) -> None:
+        """
+        Spins through the event.
+
+        Args:
+            event (Any): The event.
+        """
+        began = thread_time()
+        while thread_time() - began < 0.03:
+            pass
+        self.calls += 1
+
+@fixture
+def watchdog() -> Watchdog:
+    """
+    The fixture for the watchdog.
+
+    Returns:
+        Watchdog: The watchdog, checking often.
+    """
+    watchdog = Watchdog(window=0.3, overruns=2, interval=0.01)
+    yield watchdog
+    watchdog.stop()
+
+@fixture
+def plugin_bus(watchdog: Watchdog) -> PluginBus:
+    """
+    The fixture for a plugin bus with a watchdog.
+
+    Args:
+        watchdog (Watchdog): The watchdog.
+
+    Returns:
+        PluginBus: The plugin bus.
+    """
+    return PluginBus(Mock(), middleware=[watchdog])
+
+def test_overrunning_plugin_is_suspended(plugin_bus: PluginBus) -> None:
+    """
+    Test that a plugin overrunning its budget too often misses events for a window,
+    then runs inline again and can still consume events.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = SlowPlugin(delay=0.03)
+    after = Mock()
+    plugin_bus.register_plugin(plugin)
+    plugin_bus.subscribe('version_requested', after)
+
+    for _ in range(3):
+        plugin_bus.publish('version_requested', 'event')
+
+    assert plugin.threads == [get_ident()] * 2
+    after.assert_called_once_with('event')
+
+    sleep(0.35)
+    plugin.delay = 0
+    plugin_bus.publish('version_requested', 'event')
+
+    assert plugin.threads == [get_ident()] * 3
+    after.assert_called_once_with('event')
+
+def test_fast_plugin_stays_inline(plugin_bus: PluginBus) -> None:
+    """
+    Test that a plugin within its budget keeps running on the pump.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+    """
+    plugin = SlowPlugin(delay=0)
+    plugin_bus.register_plugin(plugin)
+
+    for _ in range(3):
+        plugin_bus.publish('version_requested', 'event')
+
+    assert plugin.threads == [get_ident()] * 3
+
+def test_stuck_plugin_is_reported_while_running(plugin_bus: PluginBus, caplog) -> None:
+    """
+    Test that the monitor notices a call still running past its budget.
+
+    Args:
+        plugin_bus (PluginBus): The plugin bus.
+        caplog (LogCaptureFixture): The captured logs.
+    """
+    plugin = SlowPlugin(delay=0.3)
+    plugin_bus.register_plugin(plugin)
+    pump = Thread(target=plugin_bus.publish, args=('version_requested', 'event'))
+    pump.start()
+
+    sleep(0.15)
+    reported = 'SlowPlugin is stuck' in caplog.text
+    pump.join()
+
+    assert reported
+    assert 'handle_event' in caplog.text
+    assert caplog.text.count('is stuck') == 1
+
+def test_greedy_plugin_is_suspended() -> None:
+    """
+    Test that a plugin exhausting its cpu quota misses events until the window passes.
+    """
+    watchdog = Watchdog(window=0.3)
+    plugin_bus = PluginBus(Mock(), middleware=[watchdog])
+    plugin = GreedyPlugin()
+    plugin_bus.register_plugin(plugin)
+
+    for _ in range(4):
+        plugin_bus.publish('version_requested', 'event')
+    assert plugin.calls == 2
+
+    sleep(0.35)
+    plugin_bus.publish('version_requested', 'event')
+    watchdog.stop()
+
+    assert plugin.calls == 3